@@ -0,0 +1,77 @@
+# src/alertas.py
+"""
+Alertas de stock bajo y sugerencias de reposición.
+
+Las consultas filtran con ``stock <= stock_minimo``, la misma condición del
+índice parcial idx_productos_bajo_stock (ver migraciones), de modo que sólo
+se recorren los productos en alerta y no todo el catálogo. La velocidad de
+venta se calcula sobre las líneas de ventas recientes usando el índice
+(codigo, fecha).
+"""
+
+import logging
+import math
+import sqlite3
+from database import conectar_db
+
+logger = logging.getLogger(__name__)
+
+def contar_bajo_stock():
+    """Cantidad de productos con stock en o por debajo del mínimo"""
+    try:
+        with conectar_db() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM productos WHERE stock <= stock_minimo"
+            ).fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error("Error contando productos con stock bajo: %s", e)
+        return 0
+
+def sugerencias_reposicion(dias=30, cobertura_dias=14):
+    """
+    Productos en alerta con la cantidad sugerida a reponer.
+
+    La sugerencia cubre ``cobertura_dias`` de ventas al ritmo de los últimos
+    ``dias`` días, por encima del stock mínimo.
+
+    Args:
+        dias (int): Ventana usada para medir la velocidad de venta
+        cobertura_dias (int): Días de venta que debe cubrir la reposición
+
+    Returns:
+        list: Dicts con codigo, nombre, stock, stock_minimo, por_dia
+            (unidades vendidas por día), dias_restantes (None sin ventas)
+            y sugerido, ordenados por urgencia
+    """
+    try:
+        with conectar_db() as conn:
+            filas = conn.execute('''
+                SELECT p.codigo, p.nombre, p.stock, p.stock_minimo,
+                       (SELECT COALESCE(SUM(v.cantidad), 0) FROM ventas v
+                        WHERE v.codigo = p.codigo
+                          AND v.fecha >= datetime('now', 'localtime', ?)) AS vendidas
+                FROM productos p
+                WHERE stock <= stock_minimo
+            ''', (f"-{int(dias)} days",)).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error obteniendo sugerencias de reposición: %s", e)
+        return []
+
+    sugerencias = []
+    for codigo, nombre, stock, minimo, vendidas in filas:
+        por_dia = vendidas / dias
+        objetivo = minimo + math.ceil(por_dia * cobertura_dias)
+        sugerencias.append({
+            "codigo": codigo,
+            "nombre": nombre,
+            "stock": stock,
+            "stock_minimo": minimo,
+            "por_dia": por_dia,
+            "dias_restantes": stock / por_dia if por_dia else None,
+            "sugerido": max(objetivo - stock, 1),
+        })
+    sugerencias.sort(key=lambda s: (
+        s["dias_restantes"] if s["dias_restantes"] is not None else math.inf,
+        s["stock"] - s["stock_minimo"]
+    ))
+    return sugerencias
@@ -0,0 +1,382 @@
+# src/archivado.py
+"""
+Archivo histórico de movimientos y ventas por año.
+
+Los años cerrados se mueven de inventario.db a archivos
+data/archivo/inventario_AAAA.db, de modo que la base de uso diario sólo
+guarda el año en curso. Los acumulados ventas_diarias y ventas_por_producto
+quedan en la base principal con los totales de todo el historial, y
+movimientos_archivados guarda la cantidad y el total de los movimientos
+archivados de cada año.
+
+Los reportes que necesitan las líneas del historial usan
+``consultar_historial()``, que recorre el rango pedido por tramos: cada año
+archivado se lee adjuntando (ATTACH) sólo su archivo y el resto se lee de la
+base principal.
+
+Archivar no reduce el tamaño de inventario.db; ``compactar()`` (VACUUM) lo
+hace, pero bloquea las escrituras mientras dura, así que es una acción
+aparte que la interfaz ofrece y ejecuta en la cola de las ventas.
+"""
+
+import logging
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from database import conectar_db, ruta_db
+
+logger = logging.getLogger(__name__)
+
+_COLUMNAS_MOVIMIENTOS = "id, fecha, detalle, total_bs, detalles_extra, cliente"
+_COLUMNAS_VENTAS = "id, movimiento_id, producto, codigo, cantidad, precio, fecha"
+
+# Sin claves foráneas: los productos no se archivan
+_ESQUEMA_ARCHIVO = (
+    """CREATE TABLE IF NOT EXISTS {esquema}.movimientos (
+        id INTEGER PRIMARY KEY,
+        fecha TEXT NOT NULL,
+        detalle TEXT NOT NULL,
+        total_bs REAL NOT NULL,
+        detalles_extra TEXT,
+        cliente TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS {esquema}.ventas (
+        id INTEGER PRIMARY KEY,
+        movimiento_id INTEGER,
+        producto TEXT,
+        codigo TEXT NOT NULL,
+        cantidad INTEGER NOT NULL,
+        precio REAL NOT NULL,
+        fecha TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_movimientos_fecha ON movimientos(fecha)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_ventas_fecha ON ventas(fecha)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_ventas_codigo_fecha ON ventas(codigo, fecha)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_ventas_movimiento ON ventas(movimiento_id)",
+)
+
+# Líneas de ventas del año: las de sus movimientos y las sueltas por fecha
+_VENTAS_DEL_ANIO = """
+    (movimiento_id IN (SELECT id FROM {principal}.movimientos
+                       WHERE fecha >= :desde AND fecha < :hasta)
+     OR (movimiento_id IS NULL AND fecha >= :desde AND fecha < :hasta))
+"""
+
+
+def directorio_archivo():
+    """Carpeta de los archivos anuales, junto a la base principal"""
+    return Path(ruta_db()).parent / "archivo"
+
+
+def ruta_archivo(anio):
+    """Archivo del año indicado (exista o no)"""
+    return directorio_archivo() / f"{Path(ruta_db()).stem}_{int(anio)}.db"
+
+
+def _archivo_valido(ruta):
+    """True si el archivo tiene las tablas movimientos y ventas"""
+    try:
+        conn = sqlite3.connect(f"{ruta.as_uri()}?mode=ro", uri=True)
+        try:
+            tablas = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master "
+                "WHERE type = 'table' AND name IN ('movimientos', 'ventas')"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("Archivo histórico ilegible %s: %s", ruta, e)
+        return False
+    if tablas != 2:
+        logger.warning("Archivo histórico sin tablas, se omite: %s", ruta)
+        return False
+    return True
+
+
+def anios_archivados():
+    """Años con un archivo utilizable, en orden"""
+    prefijo = f"{Path(ruta_db()).stem}_"
+    anios = []
+    for ruta in directorio_archivo().glob(f"{prefijo}*.db"):
+        sufijo = ruta.stem[len(prefijo):]
+        if sufijo.isdigit() and _archivo_valido(ruta.resolve()):
+            anios.append(int(sufijo))
+    return sorted(anios)
+
+
+def anios_archivables(hoy=None):
+    """Años anteriores al actual que todavía tienen datos en la base principal"""
+    limite = f"{(hoy or date.today()).year:04d}-01-01"
+    try:
+        with conectar_db() as conn:
+            filas = conn.execute('''
+                SELECT strftime('%Y', fecha) FROM movimientos WHERE fecha < :limite
+                UNION
+                SELECT strftime('%Y', fecha) FROM ventas WHERE fecha < :limite
+            ''', {"limite": limite}).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error buscando años para archivar: %s", e)
+        return []
+    return sorted(int(anio) for anio, in filas if anio and anio.isdigit())
+
+
+def _adjuntar(conn, anios):
+    """Adjunta los archivos de ``anios``; devuelve los nombres de esquema"""
+    if conn.in_transaction:
+        raise RuntimeError("No se pueden adjuntar archivos dentro de una transacción")
+    esquemas = []
+    try:
+        for anio in anios:
+            esquema = f"archivo_{int(anio)}"
+            conn.execute(f"ATTACH DATABASE ? AS {esquema}", (str(ruta_archivo(anio)),))
+            esquemas.append(esquema)
+    except sqlite3.Error:
+        _separar(conn, esquemas)
+        raise
+    return esquemas
+
+
+def _separar(conn, esquemas):
+    for esquema in esquemas:
+        try:
+            conn.execute(f"DETACH DATABASE {esquema}")
+        except sqlite3.Error as e:
+            logger.warning("No se pudo separar %s: %s", esquema, e)
+
+
+def _copiar_al_archivo(anio, rango):
+    """
+    Primera fase: copia el año al archivo con una conexión propia del
+    archivo, que lee la base principal adjunta. Sólo se escribe el archivo,
+    así que su transacción es atómica y queda en disco antes de borrar nada.
+    Si falla y el archivo es nuevo se elimina, para no dejar un archivo
+    vacío.
+    """
+    ruta = ruta_archivo(anio)
+    nuevo = not ruta.exists()
+    conn = sqlite3.connect(ruta, timeout=10.0)
+    try:
+        conn.execute("ATTACH DATABASE ? AS principal", (str(ruta_db()),))
+        conn.execute("BEGIN IMMEDIATE")
+        for paso in _ESQUEMA_ARCHIVO:
+            conn.execute(paso.format(esquema="main"))
+        conn.execute(f'''
+            INSERT OR IGNORE INTO main.movimientos ({_COLUMNAS_MOVIMIENTOS})
+            SELECT {_COLUMNAS_MOVIMIENTOS} FROM principal.movimientos
+            WHERE fecha >= :desde AND fecha < :hasta
+        ''', rango)
+        conn.execute(f'''
+            INSERT OR IGNORE INTO main.ventas ({_COLUMNAS_VENTAS})
+            SELECT {_COLUMNAS_VENTAS} FROM principal.ventas
+            WHERE {_VENTAS_DEL_ANIO.format(principal="principal")}
+        ''', rango)
+        conn.commit()
+    except BaseException:
+        conn.close()
+        if nuevo:
+            for sufijo in ("", "-journal"):
+                Path(f"{ruta}{sufijo}").unlink(missing_ok=True)
+        raise
+    conn.close()
+
+
+def _borrar_archivado(conn, esquema, rango):
+    """
+    Segunda fase: verifica que el archivo tenga todas las filas del año y
+    las borra de la base principal, compensando los acumulados. Sólo se
+    escribe la base principal.
+    """
+    ventas_del_anio = _VENTAS_DEL_ANIO.format(principal="main")
+    faltan_movimientos, faltan_ventas = conn.execute(f'''
+        SELECT
+            (SELECT COUNT(*) FROM main.movimientos
+             WHERE fecha >= :desde AND fecha < :hasta
+               AND id NOT IN (SELECT id FROM {esquema}.movimientos)),
+            (SELECT COUNT(*) FROM main.ventas
+             WHERE {ventas_del_anio} AND id NOT IN (SELECT id FROM {esquema}.ventas))
+    ''', rango).fetchone()
+    if faltan_movimientos or faltan_ventas:
+        raise RuntimeError(
+            f"El archivo no contiene {faltan_movimientos} movimientos y "
+            f"{faltan_ventas} ventas del año; no se borró nada"
+        )
+
+    # El total de por vida de los movimientos sigue incluyendo el año
+    conn.execute('''
+        INSERT INTO main.movimientos_archivados (anio, movimientos, total_bs)
+        SELECT CAST(substr(:desde, 1, 4) AS INTEGER), COUNT(*), COALESCE(SUM(total_bs), 0)
+        FROM main.movimientos WHERE fecha >= :desde AND fecha < :hasta
+        ON CONFLICT(anio) DO UPDATE SET
+            movimientos = movimientos + excluded.movimientos,
+            total_bs = total_bs + excluded.total_bs
+    ''', rango)
+
+    # Los triggers restan de los acumulados lo que se borra;
+    # se suma antes lo mismo para que no cambien
+    conn.execute(f'''
+        INSERT INTO main.ventas_diarias (dia, total, unidades)
+        SELECT date(fecha), SUM(precio * cantidad), SUM(cantidad)
+        FROM main.ventas WHERE {ventas_del_anio} GROUP BY date(fecha)
+        ON CONFLICT(dia) DO UPDATE SET
+            total = total + excluded.total, unidades = unidades + excluded.unidades
+    ''', rango)
+    conn.execute(f'''
+        INSERT INTO main.ventas_por_producto (producto, total, unidades)
+        SELECT codigo, SUM(precio * cantidad), SUM(cantidad)
+        FROM main.ventas WHERE {ventas_del_anio} GROUP BY codigo
+        ON CONFLICT(producto) DO UPDATE SET
+            total = total + excluded.total, unidades = unidades + excluded.unidades
+    ''', rango)
+
+    ventas = conn.execute(f"DELETE FROM main.ventas WHERE {ventas_del_anio}", rango).rowcount
+    movimientos = conn.execute(
+        "DELETE FROM main.movimientos WHERE fecha >= :desde AND fecha < :hasta", rango
+    ).rowcount
+    return movimientos, ventas
+
+
+def archivar_anio(anio, hoy=None):
+    """
+    Mueve los movimientos y ventas de un año cerrado a su archivo.
+
+    En WAL SQLite no confirma atómicamente una transacción que escribe en
+    la base principal y en una adjunta, así que se hace en dos fases: las
+    filas se copian al archivo y se confirman (ignorando las que ya estén,
+    por si una ejecución anterior se interrumpió); después, si el archivo
+    tiene todas las filas del año, se borran de la base principal. Los
+    acumulados se compensan para que sigan incluyendo lo archivado.
+
+    Args:
+        anio (int): Año a archivar; debe ser anterior al actual
+        hoy (date, optional): Fecha de referencia (hoy por defecto)
+
+    Returns:
+        dict: {'movimientos': int, 'ventas': int} filas movidas
+
+    Raises:
+        ValueError: Si el año no está cerrado
+        RuntimeError: Si falla la base de datos o el archivo está incompleto
+    """
+    anio = int(anio)
+    if anio >= (hoy or date.today()).year:
+        raise ValueError(f"El año {anio} todavía no está cerrado")
+    rango = {"desde": f"{anio:04d}-01-01", "hasta": f"{anio + 1:04d}-01-01"}
+    ruta_archivo(anio).parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        _copiar_al_archivo(anio, rango)
+        with conectar_db() as conn:
+            esquema, = _adjuntar(conn, [anio])
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                movimientos, ventas = _borrar_archivado(conn, esquema, rango)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                _separar(conn, [esquema])
+    except (sqlite3.Error, RuntimeError) as e:
+        logger.error("Error archivando el año %s: %s", anio, e)
+        raise RuntimeError(f"Error archivando el año {anio}: {e}")
+
+    logger.info("Año %s archivado: %s movimientos, %s ventas", anio, movimientos, ventas)
+    return {"movimientos": movimientos, "ventas": ventas}
+
+
+def compactar():
+    """
+    Libera el espacio de lo archivado (VACUUM).
+
+    Reescribe toda la base: mientras dura ninguna otra conexión puede
+    escribir, y con bases grandes puede superar la espera de 10 s del pool.
+    Debe ejecutarse cuando no haya ventas en curso.
+    """
+    try:
+        with conectar_db() as conn:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+    except sqlite3.Error as e:
+        logger.error("Error compactando la base de datos: %s", e)
+        raise RuntimeError(f"Error compactando la base de datos: {e}")
+    logger.info("Base de datos compactada")
+
+
+def archivar_anteriores(hoy=None):
+    """
+    Archiva todos los años cerrados que siguen en la base principal. No
+    compacta la base (ver ``compactar``).
+
+    Returns:
+        dict: {anio: {'movimientos': int, 'ventas': int}}
+    """
+    return {anio: archivar_anio(anio, hoy) for anio in anios_archivables(hoy)}
+
+
+def tramos(desde=None, hasta=None):
+    """
+    Divide un rango de días en tramos consecutivos según dónde están sus
+    datos: cada año archivado en su archivo y el resto en la base principal.
+
+    Args:
+        desde (date | str, optional): Día inicial (inclusive)
+        hasta (date | str, optional): Día final (inclusive)
+
+    Returns:
+        list: (anio, inicio, fin) en orden cronológico; anio es None para la
+            base principal, inicio es inclusive y fin exclusivo ('AAAA-MM-DD')
+    """
+    inicio = str(desde)[:10] if desde else "0000-01-01"
+    fin = (date.fromisoformat(str(hasta)[:10]) + timedelta(days=1)).isoformat() \
+        if hasta else "9999-12-31"
+    resultado = []
+    actual = inicio
+    for anio in anios_archivados():
+        inicio_anio, fin_anio = f"{anio:04d}-01-01", f"{anio + 1:04d}-01-01"
+        if fin_anio <= actual or inicio_anio >= fin:
+            continue
+        if actual < inicio_anio:
+            resultado.append((None, actual, inicio_anio))
+        resultado.append((anio, max(actual, inicio_anio), min(fin, fin_anio)))
+        actual = min(fin, fin_anio)
+    if actual < fin:
+        resultado.append((None, actual, fin))
+    return resultado
+
+
+def consultar_historial(consulta, desde=None, hasta=None, params=None):
+    """
+    Ejecuta ``consulta`` sobre cada tramo del rango, en orden cronológico,
+    y devuelve sus filas una tras otra.
+
+    En la consulta ``{esquema}`` se reemplaza por la base a leer y los
+    parámetros :inicio y :fin son los límites del tramo. Los archivos se
+    adjuntan de a uno, así que no hay límite de años. Un año se lee sólo de
+    su archivo, aunque una ejecución interrumpida haya dejado copias en la
+    base principal.
+
+    Args:
+        consulta (str): SELECT con ``{esquema}``, :inicio y :fin
+        params (dict, optional): Otros parámetros con nombre
+
+    Yields:
+        sqlite3.Row
+
+    Raises:
+        sqlite3.Error, RuntimeError: Si falla la lectura de algún tramo
+    """
+    for anio, inicio, fin in tramos(desde, hasta):
+        parametros = {**(params or {}), "inicio": inicio, "fin": fin}
+        with conectar_db() as conn:
+            esquemas = [] if anio is None else _adjuntar(conn, [anio])
+            try:
+                cursor = conn.execute(
+                    consulta.format(esquema=esquemas[0] if esquemas else "main"), parametros
+                )
+                try:
+                    yield from cursor
+                finally:
+                    cursor.close()
+            finally:
+                _separar(conn, esquemas)
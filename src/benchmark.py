@@ -0,0 +1,257 @@
+# src/benchmark.py
+"""
+Mediciones de rendimiento de la capa de datos y del refresco de tablas.
+
+Genera bases inventario.db sintéticas de distintos tamaños en un directorio
+temporal, mide cada operación con varias repeticiones y escribe los
+resultados en JSON para compararlos entre versiones. No necesita pantalla:
+el Treeview se reemplaza por un árbol simulado salvo que se pida ``--tk``.
+
+Uso:
+    python benchmark.py --tamanos 1000 10000 100000 --salida resultados.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import database
+from catalogo import cache_productos, catalogo
+
+PALABRAS = ("arroz", "harina", "aceite", "azucar", "cafe", "leche", "pasta", "atun",
+            "jabon", "queso", "mantequilla", "galleta", "salsa", "refresco", "pan")
+
+
+class ArbolSimulado:
+    """Sustituto mínimo de ttk.Treeview para medir sin pantalla"""
+
+    def __init__(self):
+        self.filas = {}
+        self.operaciones = 0
+
+    def insert(self, padre, posicion, iid=None, values=(), tags=()):
+        self.filas[iid] = (values, tags)
+        self.operaciones += 1
+        return iid
+
+    def item(self, iid, values=None, tags=None):
+        self.filas[iid] = (values, tags)
+        self.operaciones += 1
+
+    def move(self, iid, padre, posicion):
+        self.operaciones += 1
+
+    def detach(self, *iids):
+        self.operaciones += 1
+
+    def set_children(self, padre, *iids):
+        self.operaciones += 1
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.filas.pop(iid, None)
+        self.operaciones += len(iids)
+
+
+def generar_base(ruta, productos, movimientos, semilla=0):
+    """
+    Crea una base con el esquema actual y datos aleatorios reproducibles.
+
+    Args:
+        ruta (str): Archivo a crear (se reemplaza si existe)
+        productos (int): Cantidad de productos
+        movimientos (int): Cantidad de ventas (de 1 a 3 líneas cada una)
+        semilla (int): Semilla del generador aleatorio
+    """
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    database.configurar_pool(ruta=ruta)
+    cache_productos.cerrar()
+    database.crear_tablas()
+
+    azar = random.Random(semilla)
+    inicio = datetime.now() - timedelta(days=365)
+    with database.conectar_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT INTO productos VALUES (?, ?, ?, ?, ?, ?)", (
+            (f"{i:08d}", f"{azar.choice(PALABRAS)} {azar.choice(PALABRAS)} {i}", "",
+             round(azar.uniform(1, 500), 2), azar.randint(50, 500), azar.randint(0, 60))
+            for i in range(productos)
+        ))
+        conn.executemany("INSERT INTO tasa_dolar (monto, fecha) VALUES (?, ?)", (
+            (36.0 + dia * 0.1, (inicio + timedelta(days=dia)).strftime("%Y-%m-%d %H:%M:%S"))
+            for dia in range(0, 365, 7)
+        ))
+        lineas = []
+        cabeceras = []
+        for mov_id in range(1, movimientos + 1):
+            fecha = (inicio + timedelta(seconds=azar.randint(0, 365 * 86400))).strftime(
+                "%Y-%m-%d %H:%M:%S")
+            total = 0.0
+            for _ in range(azar.randint(1, 3)):
+                codigo = f"{azar.randrange(productos):08d}"
+                cantidad = azar.randint(1, 5)
+                precio = round(azar.uniform(1, 500), 2)
+                total += cantidad * precio
+                lineas.append((mov_id, codigo, codigo, cantidad, precio, fecha))
+            cabeceras.append((mov_id, fecha, f"Venta sintética {mov_id}", total))
+        conn.executemany(
+            "INSERT INTO movimientos (id, fecha, detalle, total_bs) VALUES (?, ?, ?, ?)",
+            cabeceras
+        )
+        conn.executemany('''
+            INSERT INTO ventas (movimiento_id, producto, codigo, cantidad, precio, fecha)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', lineas)
+    with database.conectar_db() as conn:
+        conn.execute("ANALYZE")
+
+
+def medir(funcion, repeticiones, argumentos=None):
+    """
+    Ejecuta ``funcion`` varias veces y devuelve estadísticas en milisegundos.
+
+    Args:
+        argumentos (callable, optional): Recibe el número de repetición y
+            devuelve la tupla de argumentos (preparada fuera del tiempo medido)
+    """
+    tiempos = []
+    for n in range(repeticiones):
+        args = argumentos(n) if argumentos else ()
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "repeticiones": repeticiones,
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "min_ms": round(min(tiempos), 3),
+        "max_ms": round(max(tiempos), 3),
+    }
+
+
+def _crear_arbol(usar_tk):
+    if not usar_tk:
+        return ArbolSimulado()
+    import tkinter as tk
+    from tkinter import ttk
+    root = tk.Tk()
+    root.withdraw()
+    return ttk.Treeview(root, columns=("cod", "nom", "desc", "precio", "stock", "min"),
+                        show="headings")
+
+
+def medir_tamano(productos, movimientos, repeticiones, directorio, usar_tk=False):
+    """Genera una base y mide todas las operaciones sobre ella"""
+    from productos import agregar_producto, obtener_productos
+    from movimientos import (registrar_movimiento, eliminar_movimiento,
+                             obtener_movimientos_pagina)
+    from ventas import vender
+    from reportes import ganancias_por_periodo, ventas_por_producto
+    from busqueda import buscar_productos
+    from alertas import sugerencias_reposicion
+    from tablas import SincronizadorTabla
+    from main_window import BodegaApp
+
+    ruta = os.path.join(directorio, f"bench_{productos}_{movimientos}.db")
+    inicio = time.perf_counter()
+    generar_base(ruta, productos, movimientos)
+    generacion_s = time.perf_counter() - inicio
+
+    azar = random.Random(1)
+    codigo = lambda: f"{azar.randrange(productos):08d}"
+    resultados = {
+        "agregar_producto": medir(agregar_producto, repeticiones, lambda n: (
+            f"B{n:07d}", f"Producto bench {n}", "", 10.0, 100, 5)),
+        "obtener_productos": medir(obtener_productos, repeticiones),
+        "buscar_productos": medir(buscar_productos, repeticiones,
+                                  lambda n: (azar.choice(PALABRAS)[:4],)),
+        "vender": medir(vender, repeticiones, lambda n: ([(codigo(), 1)],)),
+        "registrar_movimiento": medir(registrar_movimiento, repeticiones,
+                                      lambda n: (f"Movimiento bench {n}", 1.0)),
+        "eliminar_movimiento": medir(eliminar_movimiento, repeticiones,
+                                     lambda n: (movimientos - n,)),
+        "obtener_movimientos_pagina": medir(obtener_movimientos_pagina, repeticiones),
+        "ventas_por_producto": medir(ventas_por_producto, repeticiones, lambda n: (10,)),
+        "sugerencias_reposicion": medir(sugerencias_reposicion, repeticiones),
+        "catalogo_carga": medir(catalogo.actualizar, repeticiones, lambda n: (True,)),
+        "catalogo_filtrar": medir(catalogo.filtrar, repeticiones,
+                                  lambda n: (azar.choice(PALABRAS)[:4],)),
+    }
+    for periodo in ("dia", "semana", "mes"):
+        resultados[f"ganancias_{periodo}"] = medir(ganancias_por_periodo, repeticiones,
+                                                   lambda n: (periodo,))
+
+    # Refresco de la tabla de productos: carga inicial y refresco sin cambios
+    filas = obtener_productos()
+    vista = SimpleNamespace(_prod_sync=None)
+    aplicar = lambda: BodegaApp._aplicar_productos(vista, filas)
+
+    def nueva_tabla(n):
+        vista._prod_sync = SincronizadorTabla(_crear_arbol(usar_tk))
+        return ()
+
+    resultados["refresco_productos_inicial"] = medir(aplicar, repeticiones, nueva_tabla)
+    resultados["refresco_productos_sin_cambios"] = medir(aplicar, repeticiones)
+
+    # Pasar el WAL a la base antes de medirla; si otra conexión lo retiene,
+    # lo que quede en el -wal también cuenta
+    with database.conectar_db() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    tamano = sum(os.path.getsize(archivo) for archivo in (ruta, ruta + "-wal")
+                 if os.path.exists(archivo))
+    database.cerrar_conexiones()
+    cache_productos.cerrar()
+    return {
+        "productos": productos,
+        "movimientos": movimientos,
+        "generacion_s": round(generacion_s, 3),
+        "tamano_bytes": tamano,
+        "operaciones": resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la capa de datos de Bodega")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Cantidades de productos y de movimientos a generar")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--directorio", help="Dónde crear las bases (por defecto uno temporal)")
+    parser.add_argument("--tk", action="store_true",
+                        help="Usar un ttk.Treeview real (requiere pantalla)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as temporal:
+        directorio = args.directorio or temporal
+        informe = {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "resultados": [
+                medir_tamano(n, n, args.repeticiones, directorio, args.tk)
+                for n in args.tamanos
+            ],
+        }
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
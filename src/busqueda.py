@@ -0,0 +1,153 @@
+# src/busqueda.py
+"""
+Búsqueda de productos para la tabla principal y la venta por lote.
+
+Usa el índice FTS5 ``productos_fts`` (tokenizador trigram, búsqueda de
+subcadenas sin distinguir mayúsculas) cuando existe y el texto tiene al
+menos tres caracteres; en otro caso recurre a LIKE. El índice se enlaza con
+productos por codigo (ver migraciones). Las consultas pueden
+cancelarse y las pulsaciones de teclado se agrupan con BuscadorDiferido.
+"""
+
+import logging
+import sqlite3
+from database import conectar_db
+
+logger = logging.getLogger(__name__)
+
+# Mínimo de caracteres que admite el tokenizador trigram
+MIN_CARACTERES_FTS = 3
+
+_fts_disponible = None
+
+def _hay_indice_fts(conn):
+    global _fts_disponible
+    if _fts_disponible is None:
+        _fts_disponible = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        ).fetchone() is not None
+    return _fts_disponible
+
+def buscar_productos(texto, limite=None, cancelado=None):
+    """
+    Busca productos cuyo código, nombre o descripción contengan el texto.
+
+    Args:
+        texto (str): Texto a buscar; vacío devuelve todo el catálogo
+        limite (int, optional): Máximo de resultados
+        cancelado (callable, optional): Función que devuelve True cuando la
+            búsqueda ya no interesa; la consulta en curso se interrumpe
+
+    Returns:
+        list | None: Productos ordenados por nombre, o None si se canceló
+    """
+    texto = (texto or "").strip()
+    query = '''
+        SELECT p.codigo, p.nombre, p.descripcion, p.precio, p.stock, p.stock_minimo
+        FROM productos p
+    '''
+    params = []
+    try:
+        with conectar_db() as conn:
+            if texto and len(texto) >= MIN_CARACTERES_FTS and _hay_indice_fts(conn):
+                query += '''
+                    WHERE p.codigo IN (
+                        SELECT codigo FROM productos_fts WHERE productos_fts MATCH ?
+                    )
+                '''
+                params.append('"' + texto.replace('"', '""') + '"')
+            elif texto:
+                patron = f"%{texto}%"
+                query += " WHERE p.nombre LIKE ? OR p.descripcion LIKE ? OR p.codigo LIKE ?"
+                params += [patron, patron, patron]
+            query += " ORDER BY p.nombre COLLATE NOCASE"
+            if limite:
+                query += f" LIMIT {int(limite)}"
+
+            if cancelado is not None:
+                conn.set_progress_handler(lambda: 1 if cancelado() else 0, 1000)
+            try:
+                return conn.execute(query, params).fetchall()
+            finally:
+                if cancelado is not None:
+                    conn.set_progress_handler(None, 0)
+    except sqlite3.OperationalError as e:
+        if cancelado is not None and cancelado():
+            return None
+        logger.error("Error buscando productos '%s': %s", texto, e)
+        return []
+    except sqlite3.Error as e:
+        logger.error("Error buscando productos '%s': %s", texto, e)
+        return []
+
+
+def codigos_indexados(texto, cancelado=None):
+    """
+    Códigos de los productos que contienen el texto según el índice FTS5.
+
+    Returns:
+        list | None: None si el índice no sirve para este texto (no existe
+            o el texto es corto), si falló o si se canceló
+    """
+    texto = (texto or "").strip()
+    if len(texto) < MIN_CARACTERES_FTS:
+        return None
+    try:
+        with conectar_db() as conn:
+            if not _hay_indice_fts(conn):
+                return None
+            if cancelado is not None:
+                conn.set_progress_handler(lambda: 1 if cancelado() else 0, 1000)
+            try:
+                return [fila[0] for fila in conn.execute(
+                    "SELECT codigo FROM productos_fts WHERE productos_fts MATCH ?",
+                    ('"' + texto.replace('"', '""') + '"',)
+                )]
+            finally:
+                if cancelado is not None:
+                    conn.set_progress_handler(None, 0)
+    except sqlite3.Error as e:
+        if cancelado is None or not cancelado():
+            logger.error("Error consultando el índice de búsqueda '%s': %s", texto, e)
+        return None
+
+
+class BuscadorDiferido:
+    """
+    Agrupa cambios rápidos de un campo de búsqueda en una sola consulta.
+
+    Cada llamada a ``programar`` cancela la búsqueda pendiente y la vuelve a
+    agendar ``retardo_ms`` milisegundos después. ``vigente(generacion)``
+    permite descartar (o interrumpir) resultados de búsquedas ya superadas.
+
+    Args:
+        widget: Widget Tk usado para ``after``/``after_cancel``
+        accion (callable): Recibe el número de generación de la búsqueda
+        retardo_ms (int): Espera tras la última pulsación
+    """
+
+    def __init__(self, widget, accion, retardo_ms=200):
+        self.widget = widget
+        self.accion = accion
+        self.retardo_ms = retardo_ms
+        self.generacion = 0
+        self._pendiente = None
+
+    def programar(self, *_):
+        self.generacion += 1
+        if self._pendiente is not None:
+            self.widget.after_cancel(self._pendiente)
+        self._pendiente = self.widget.after(self.retardo_ms, self._ejecutar)
+
+    def _ejecutar(self):
+        self._pendiente = None
+        self.accion(self.generacion)
+
+    def vigente(self, generacion):
+        return generacion == self.generacion
+
+    def cancelar(self):
+        if self._pendiente is not None:
+            self.widget.after_cancel(self._pendiente)
+            self._pendiente = None
+        self.generacion += 1
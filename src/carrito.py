@@ -0,0 +1,130 @@
+# src/carrito.py
+"""
+Carrito de la venta por lote.
+
+Guarda precio y cantidad de cada línea como números, independiente del
+Treeview que lo muestra, y mantiene el total en Bs. sumando la diferencia de
+cada cambio. La venta completa se entrega a ``ventas.vender`` en una sola
+llamada (una transacción).
+"""
+
+from ventas import VentaError, vender
+
+
+class LineaCarrito:
+    """Producto del carrito con el precio que tenía al agregarlo"""
+
+    __slots__ = ("codigo", "nombre", "precio", "stock", "cantidad")
+
+    def __init__(self, codigo, nombre, precio, stock, cantidad=0):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.precio = precio
+        self.stock = stock
+        self.cantidad = cantidad
+
+    @property
+    def subtotal(self):
+        return self.precio * self.cantidad
+
+
+class Carrito:
+    """
+    Líneas de una venta en curso.
+
+    Args:
+        tasa (float): Tasa Bs./USD para el total en dólares
+    """
+
+    def __init__(self, tasa):
+        self.tasa = tasa
+        self._lineas = {}
+        self._total_bs = 0.0
+
+    def __len__(self):
+        return len(self._lineas)
+
+    def __contains__(self, codigo):
+        return codigo in self._lineas
+
+    def __iter__(self):
+        return iter(self._lineas.values())
+
+    @property
+    def total_bs(self):
+        return self._total_bs
+
+    @property
+    def total_usd(self):
+        return self._total_bs / self.tasa if self.tasa else 0.0
+
+    def cantidad(self, codigo):
+        linea = self._lineas.get(codigo)
+        return linea.cantidad if linea else 0
+
+    def fijar(self, producto, cantidad):
+        """
+        Cambia la cantidad de un producto; con 0 lo quita del carrito.
+
+        Args:
+            producto (tuple): Fila del catálogo (codigo, nombre, descripcion,
+                precio, stock, stock_minimo)
+            cantidad (int): Nueva cantidad
+
+        Returns:
+            LineaCarrito | None: La línea actualizada, o None si se quitó
+
+        Raises:
+            VentaError: Si la cantidad es negativa o supera el stock
+        """
+        codigo, nombre, _, precio, stock, _ = producto
+        if cantidad < 0:
+            raise VentaError(f"Cantidad inválida: {cantidad}")
+        if cantidad > stock:
+            raise VentaError(f"Stock insuficiente de {nombre} ({stock})")
+
+        linea = self._lineas.get(codigo)
+        if linea is not None:
+            self._total_bs -= linea.subtotal
+        if cantidad == 0:
+            self._lineas.pop(codigo, None)
+            if not self._lineas:
+                self._total_bs = 0.0   # sin residuos de redondeo
+            return None
+        if linea is None:
+            linea = self._lineas[codigo] = LineaCarrito(codigo, nombre, precio, stock)
+        linea.precio, linea.stock, linea.cantidad = precio, stock, cantidad
+        self._total_bs += linea.subtotal
+        return linea
+
+    def agregar(self, producto, cantidad=1):
+        """Suma ``cantidad`` unidades al producto (ver ``fijar``)"""
+        return self.fijar(producto, self.cantidad(producto[0]) + cantidad)
+
+    def quitar(self, codigo):
+        linea = self._lineas.pop(codigo, None)
+        if linea is not None:
+            self._total_bs -= linea.subtotal
+            if not self._lineas:
+                self._total_bs = 0.0
+
+    def vaciar(self):
+        self._lineas.clear()
+        self._total_bs = 0.0
+
+    def items(self):
+        """Pares (codigo, cantidad) en el formato de ``ventas.vender``"""
+        return [(linea.codigo, linea.cantidad) for linea in self._lineas.values()]
+
+    def vender(self, cliente=None):
+        """
+        Registra todo el carrito como una venta. El stock y los precios se
+        toman de la base dentro de la transacción.
+
+        Returns:
+            int: id del movimiento registrado
+
+        Raises:
+            VentaError: Si el carrito está vacío o falta stock
+        """
+        return vender(self.items(), cliente)
@@ -0,0 +1,330 @@
+# src/catalogo.py
+"""
+Caché en memoria de productos por código.
+
+Las búsquedas repetidas de un mismo producto (por ejemplo durante una venta)
+se resuelven con un diccionario. Las escrituras de la propia aplicación
+actualizan o invalidan las entradas afectadas; cualquier otro cambio en la
+base (otro proceso, o escrituras que no pasan por la caché) se detecta con
+``PRAGMA data_version`` y vacía la caché. La comprobación se repite justo
+antes de cada confirmación de la aplicación, para que su propia escritura no
+oculte un cambio externo anterior.
+
+CatalogoProductos es la copia compartida del catálogo completo para las
+vistas (tabla principal y venta por lote): columnas compactas con índice por
+código y claves de búsqueda ya en minúsculas. Las búsquedas nuevas usan el
+índice FTS5 (ver busqueda) y las que amplían la anterior se filtran en
+memoria.
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from database import conectar_db, observar_confirmaciones, ruta_db, version_datos
+from busqueda import codigos_indexados
+
+logger = logging.getLogger(__name__)
+
+
+class CacheProductos:
+    """
+    Caché de filas de productos indexada por código.
+
+    Args:
+        intervalo_verificacion (float): Segundos mínimos entre comprobaciones
+            de cambios externos con ``PRAGMA data_version``
+    """
+
+    def __init__(self, intervalo_verificacion=1.0):
+        self.intervalo_verificacion = intervalo_verificacion
+        self._filas = {}
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self._observador = None
+        self._ruta_observador = None
+        self._data_version = None
+        self._ultima_verificacion = 0.0
+
+    def _revisar_ruta(self):
+        """Si el pool cambió de archivo, descarta lo leído de la base anterior"""
+        if self._observador is not None and self._ruta_observador != str(ruta_db()):
+            self._observador.close()
+            self._observador = None
+            self._data_version = None
+            self._vaciar()
+
+    def _leer_data_version(self):
+        self._revisar_ruta()
+        if self._observador is None:
+            self._ruta_observador = str(ruta_db())
+            self._observador = sqlite3.connect(self._ruta_observador, check_same_thread=False)
+        return self._observador.execute("PRAGMA data_version").fetchone()[0]
+
+    def _verificar_cambios_externos(self, siempre=False):
+        """Vacía la caché si otra conexión modificó la base"""
+        self._revisar_ruta()
+        ahora = time.monotonic()
+        if not siempre and ahora - self._ultima_verificacion < self.intervalo_verificacion:
+            return
+        self._ultima_verificacion = ahora
+        try:
+            data_version = self._leer_data_version()
+        except sqlite3.Error as e:
+            logger.warning("No se pudo verificar data_version: %s", e)
+            self._vaciar()
+            return
+        if self._data_version is not None and data_version != self._data_version:
+            self._vaciar()
+        self._data_version = data_version
+
+    def antes_de_confirmar(self):
+        """
+        Antes de que la aplicación confirme una escritura: vacía la caché si
+        otra conexión modificó la base desde la última comprobación.
+        """
+        with self._lock:
+            self._verificar_cambios_externos(siempre=True)
+
+    def despues_de_confirmar(self):
+        """
+        Toma como referencia el data_version que dejó la escritura de la
+        propia aplicación, que actualiza o invalida sus entradas, para no
+        vaciar la caché por ella.
+        """
+        with self._lock:
+            try:
+                self._data_version = self._leer_data_version()
+            except sqlite3.Error:
+                self._data_version = None
+
+    def _vaciar(self):
+        self._filas.clear()
+        self._generacion += 1
+
+    def obtener(self, codigo):
+        """
+        Devuelve el producto (sqlite3.Row) con ese código o None.
+        """
+        with self._lock:
+            self._verificar_cambios_externos()
+            fila = self._filas.get(codigo)
+            generacion = self._generacion
+        if fila is not None:
+            return fila
+        with conectar_db() as conn:
+            fila = conn.execute(
+                "SELECT * FROM productos WHERE codigo = ?", (codigo,)
+            ).fetchone()
+        with self._lock:
+            # No guardar si hubo una escritura mientras se leía
+            if fila is not None and generacion == self._generacion:
+                self._filas[codigo] = fila
+        return fila
+
+    def guardar(self, codigo, fila):
+        """Escritura directa tras agregar o actualizar un producto"""
+        with self._lock:
+            self._generacion += 1
+            if fila is None:
+                self._filas.pop(codigo, None)
+            else:
+                self._filas[codigo] = fila
+
+    def invalidar(self, *codigos):
+        """Descarta las entradas indicadas (p. ej. tras cambiar su stock)"""
+        with self._lock:
+            self._generacion += 1
+            for codigo in codigos:
+                self._filas.pop(codigo, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._vaciar()
+
+    def cerrar(self):
+        with self._lock:
+            self._vaciar()
+            if self._observador is not None:
+                self._observador.close()
+                self._observador = None
+                self._data_version = None
+
+
+cache_productos = CacheProductos()
+observar_confirmaciones(cache_productos)
+atexit.register(cache_productos.cerrar)
+
+
+class _Columnas:
+    """Instantánea inmutable del catálogo en columnas paralelas"""
+
+    __slots__ = ("codigos", "nombres", "descripciones", "precios", "stocks",
+                 "minimos", "claves", "indice", "version")
+
+    def __init__(self, filas, version):
+        self.codigos = []
+        self.nombres = []
+        self.descripciones = []
+        self.precios = array("d")
+        self.stocks = array("q")
+        self.minimos = array("q")
+        self.claves = []
+        for codigo, nombre, descripcion, precio, stock, minimo in filas:
+            descripcion = descripcion or ""
+            self.codigos.append(codigo)
+            self.nombres.append(nombre)
+            self.descripciones.append(descripcion)
+            self.precios.append(precio)
+            self.stocks.append(stock)
+            self.minimos.append(minimo)
+            self.claves.append(f"{codigo}\x00{nombre}\x00{descripcion}".casefold())
+        self.indice = {codigo: pos for pos, codigo in enumerate(self.codigos)}
+        self.version = version
+
+    def fila(self, pos):
+        return (self.codigos[pos], self.nombres[pos], self.descripciones[pos],
+                self.precios[pos], self.stocks[pos], self.minimos[pos])
+
+
+class VistaCatalogo:
+    """
+    Resultado de un filtro: posiciones dentro de una instantánea. Las filas
+    (codigo, nombre, descripcion, precio, stock, stock_minimo) se arman al
+    recorrerla.
+    """
+
+    __slots__ = ("_columnas", "posiciones")
+
+    def __init__(self, columnas, posiciones):
+        self._columnas = columnas
+        self.posiciones = posiciones
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def __iter__(self):
+        fila = self._columnas.fila
+        return (fila(pos) for pos in self.posiciones)
+
+
+class CatalogoProductos:
+    """
+    Catálogo completo en memoria compartido por las vistas.
+
+    Se recarga con una sola consulta cuando cambia ``version_datos()`` o el
+    ``PRAGMA data_version`` de una conexión propia, que también detecta
+    escrituras de otros procesos; las lecturas usan siempre una instantánea
+    completa, por lo que pueden hacerse desde el hilo de trabajo mientras la
+    interfaz usa otra.
+    """
+
+    def __init__(self):
+        self._columnas = _Columnas((), None)
+        self._lock = threading.Lock()
+        self._ultimo_filtro = ("", None, None)
+        self._observador = None
+        self._ruta_observador = None
+
+    def _data_version(self):
+        ruta = ruta_db()
+        try:
+            with self._lock:
+                if self._observador is None or self._ruta_observador != ruta:
+                    self._cerrar_observador()
+                    self._observador = sqlite3.connect(ruta, check_same_thread=False)
+                    self._ruta_observador = ruta
+                return self._observador.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning("No se pudo verificar data_version: %s", e)
+            return None
+
+    def _cerrar_observador(self):
+        if self._observador is not None:
+            self._observador.close()
+            self._observador = None
+
+    def cerrar(self):
+        with self._lock:
+            self._cerrar_observador()
+
+    def actualizar(self, forzar=False):
+        """Recarga el catálogo si la base cambió desde la última carga"""
+        data_version = self._data_version()
+        # Sin data_version no se puede saber si hubo cambios externos
+        forzar = forzar or data_version is None
+        version = (version_datos(), data_version)
+        if not forzar and self._columnas.version == version:
+            return self._columnas
+        with self._lock:
+            if not forzar and self._columnas.version == version:
+                return self._columnas
+            with conectar_db() as conn:
+                filas = conn.execute('''
+                    SELECT codigo, nombre, descripcion, precio, stock, stock_minimo
+                    FROM productos ORDER BY nombre COLLATE NOCASE
+                ''')
+                self._columnas = _Columnas(filas, version)
+            self._ultimo_filtro = ("", None, None)
+            logger.debug("Catálogo cargado: %s productos", len(self._columnas.codigos))
+            return self._columnas
+
+    def producto(self, codigo):
+        """Fila (codigo, nombre, descripcion, precio, stock, stock_minimo) o None"""
+        columnas = self._columnas
+        pos = columnas.indice.get(codigo)
+        return None if pos is None else columnas.fila(pos)
+
+    def __contains__(self, codigo):
+        return codigo in self._columnas.indice
+
+    def __len__(self):
+        return len(self._columnas.codigos)
+
+    def filtrar(self, texto="", cancelado=None):
+        """
+        Productos cuyo código, nombre o descripción contienen el texto
+        (sin distinguir mayúsculas), en orden de nombre.
+
+        Si el texto amplía el del filtro anterior sólo se revisan los
+        resultados de ese filtro; si no, se consulta el índice FTS5 cuando
+        está disponible y se recorre todo el catálogo en otro caso.
+
+        Args:
+            cancelado (callable, optional): Devuelve True si el filtro ya no
+                interesa; se consulta cada pocos miles de productos
+
+        Returns:
+            VistaCatalogo | None: None si se canceló
+        """
+        columnas = self.actualizar()
+        texto = (texto or "").strip().casefold()
+        if not texto:
+            return VistaCatalogo(columnas, range(len(columnas.codigos)))
+
+        anterior, version, posiciones = self._ultimo_filtro
+        if version != columnas.version or not anterior or anterior not in texto:
+            codigos = codigos_indexados(texto, cancelado)
+            if cancelado is not None and cancelado():
+                return None
+            if codigos is not None:
+                indice = columnas.indice
+                resultado = sorted(indice[c] for c in codigos if c in indice)
+                self._ultimo_filtro = (texto, columnas.version, resultado)
+                return VistaCatalogo(columnas, resultado)
+            posiciones = range(len(columnas.codigos))
+        claves = columnas.claves
+        resultado = []
+        for n, pos in enumerate(posiciones):
+            if texto in claves[pos]:
+                resultado.append(pos)
+            if cancelado is not None and n & 0xFFF == 0 and cancelado():
+                return None
+        self._ultimo_filtro = (texto, columnas.version, resultado)
+        return VistaCatalogo(columnas, resultado)
+
+
+catalogo = CatalogoProductos()
+atexit.register(catalogo.cerrar)
@@ -1,22 +1,226 @@
 # src/database.py
 import sqlite3
-import json
+import time
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from migraciones import aplicar_migraciones, asegurar_indice_busqueda
+from perfilado import ConexionPerfilada
+
+logger = logging.getLogger(__name__)
 
 DB_DIR = Path("data")
 DB_DIR.mkdir(exist_ok=True)
 DB_PATH = DB_DIR / "inventario.db"
 
+# Objetos con antes_de_confirmar() y despues_de_confirmar(), avisados en cada
+# escritura confirmada por una conexión del pool (ver observar_confirmaciones)
+_observadores = []
+
+class ConexionPool(ConexionPerfilada):
+    """Conexión del pool que avisa a los observadores al confirmar"""
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        for observador in _observadores:
+            observador.antes_de_confirmar()
+        super().commit()
+        for observador in _observadores:
+            observador.despues_de_confirmar()
+
+class PoolConexiones:
+    """
+    Pool de conexiones SQLite persistentes.
+
+    Las conexiones se abren una sola vez (con sus PRAGMA ya aplicados) y se
+    reutilizan entre llamadas. Un mismo hilo que pide conexión mientras ya
+    tiene una prestada recibe la misma, de modo que las operaciones anidadas
+    comparten transacción.
+
+    Args:
+        ruta (Path | str): Archivo de base de datos
+        tamano (int): Máximo de conexiones abiertas simultáneamente
+        timeout (float): Segundos de espera por una conexión libre
+        intervalo_verificacion (float): Segundos de inactividad tras los
+            cuales se verifica la conexión con ``SELECT 1`` antes de prestarla
+    """
+
+    def __init__(self, ruta, tamano=4, timeout=10.0, intervalo_verificacion=30.0):
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.ruta = ruta
+        self.tamano = tamano
+        self.timeout = timeout
+        self.intervalo_verificacion = intervalo_verificacion
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(tamano)
+        self._local = threading.local()
+        self._todas = set()
+        self._lock = threading.Lock()
+        self._cerrado = False
+        # Contador que aumenta cada vez que un préstamo modificó datos
+        self.version = 0
+
+    def _abrir(self):
+        conn = sqlite3.connect(self.ruta, timeout=self.timeout, check_same_thread=False,
+                               factory=ConexionPool)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")  # Mejor rendimiento para operaciones concurrentes
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._todas.add(conn)
+        return conn
+
+    def _descartar(self, conn):
+        with self._lock:
+            self._todas.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _saludable(self, conn, ultimo_uso):
+        """Verifica que la conexión siga utilizable"""
+        try:
+            if time.monotonic() - ultimo_uso < self.intervalo_verificacion:
+                conn.total_changes  # Lanza ProgrammingError si está cerrada
+            else:
+                conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _tomar(self):
+        if self._cerrado:
+            raise RuntimeError("El pool de conexiones está cerrado")
+        if not self._cupos.acquire(timeout=self.timeout):
+            raise RuntimeError("No hay conexiones disponibles en el pool")
+        try:
+            while True:
+                try:
+                    conn, ultimo_uso = self._libres.get_nowait()
+                except queue.Empty:
+                    return self._abrir()
+                if self._saludable(conn, ultimo_uso):
+                    return conn
+                self._descartar(conn)
+        except BaseException:
+            self._cupos.release()
+            raise
+
+    def _devolver(self, conn):
+        try:
+            if self._cerrado:
+                self._descartar(conn)
+            else:
+                self._libres.put((conn, time.monotonic()))
+        finally:
+            self._cupos.release()
+
+    @contextmanager
+    def conexion(self):
+        """
+        Presta una conexión durante el bloque ``with``.
+
+        Al salir del bloque más externo confirma la transacción abierta, o la
+        revierte si hubo una excepción, y devuelve la conexión al pool.
+        """
+        actual = getattr(self._local, "conn", None)
+        if actual is not None:
+            self._local.nivel += 1
+            try:
+                yield actual
+            finally:
+                self._local.nivel -= 1
+            return
+
+        conn = self._tomar()
+        self._local.conn, self._local.nivel = conn, 1
+        cambios = conn.total_changes
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self._local.conn, self._local.nivel = None, 0
+            try:
+                if conn.total_changes != cambios:
+                    with self._lock:
+                        self.version += 1
+            except sqlite3.Error:
+                pass
+            self._devolver(conn)
+
+    def cerrar(self):
+        """Cierra todas las conexiones; las prestadas se cierran al devolverse"""
+        self._cerrado = True
+        while True:
+            try:
+                conn, _ = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+_pool = PoolConexiones(DB_PATH)
+
+def configurar_pool(tamano=4, timeout=10.0, intervalo_verificacion=30.0, ruta=None):
+    """Reemplaza el pool global con una nueva configuración"""
+    global _pool
+    _pool.cerrar()
+    version = _pool.version + 1
+    _pool = PoolConexiones(ruta or DB_PATH, tamano, timeout, intervalo_verificacion)
+    _pool.version = version
+    return _pool
+
+def cerrar_conexiones():
+    """Cierra las conexiones del pool global (al salir de la aplicación)"""
+    _pool.cerrar()
+
+def observar_confirmaciones(observador):
+    """
+    Registra un observador de las escrituras de la aplicación.
+
+    ``antes_de_confirmar()`` se llama con la transacción todavía abierta
+    (ninguna otra conexión puede confirmar en ese momento) y
+    ``despues_de_confirmar()`` justo después de confirmarla.
+    """
+    _observadores.append(observador)
+
 def conectar_db():
-    """Establece conexión con la base de datos con configuración optimizada"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA journal_mode = WAL")  # Mejor rendimiento para operaciones concurrentes
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Obtiene una conexión del pool con configuración optimizada.
+
+    Debe usarse como ``with conectar_db() as conn:``; la transacción se
+    confirma al salir del bloque y la conexión vuelve al pool.
+    """
+    return _pool.conexion()
+
+atexit.register(cerrar_conexiones)
+
+def version_datos():
+    """
+    Devuelve un contador que cambia cada vez que la aplicación modifica la
+    base de datos; permite a las vistas saltarse refrescos innecesarios.
+    """
+    return _pool.version
+
+def ruta_db():
+    """Archivo de base de datos del pool global"""
+    return _pool.ruta
 
 def crear_tablas():
-    """Crea las tablas necesarias con validación mejorada y transacción atómica"""
+    """Crea las tablas necesarias y aplica las migraciones de esquema pendientes"""
     tablas = {
         "productos": """
             CREATE TABLE IF NOT EXISTS productos (
@@ -55,13 +259,10 @@ def crear_tablas():
         """
     }
     
-    conn = None
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-        
         # Ejecutar todas las creaciones en una transacción
-        with conn:
+        with conectar_db() as conn:
+            cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             existing_tables = {row['name'] for row in cursor.fetchall()}
             
@@ -72,27 +273,40 @@ def crear_tablas():
             # Insertar tasa inicial si no existe
             if 'tasa_dolar' not in existing_tables:
                 cursor.execute("INSERT INTO tasa_dolar (monto) VALUES (36.0)")
-                
+            conn.commit()
+
+            # Evolucionar el esquema existente (índices, columnas nuevas...)
+            aplicar_migraciones(conn)
+            asegurar_indice_busqueda(conn)
+
     except sqlite3.Error as e:
         raise RuntimeError(f"Error inicializando base de datos: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def _ejecutar_consulta(query, params=(), commit=False):
-    """Función auxiliar para ejecutar consultas"""
-    conn = None
+def _ejecutar_consulta(query, params=(), commit=False, fetch=None):
+    """
+    Función auxiliar para ejecutar consultas con una conexión del pool.
+
+    Con ``fetch='one'`` o ``fetch='all'`` devuelve las filas leídas antes de
+    liberar la conexión; en otro caso devuelve el cursor (útil por rowcount).
+    """
     try:
-        conn = conectar_db()
-        cursor = conn.execute(query, params)
-        if commit:
-            conn.commit()
-        return cursor, conn if not commit else cursor
+        with conectar_db() as conn:
+            cursor = conn.execute(query, params)
+            if fetch == 'one':
+                return cursor.fetchone()
+            if fetch == 'all':
+                return cursor.fetchall()
+            if commit:
+                conn.commit()
+            return cursor
     except sqlite3.Error as e:
-        if conn:
-            conn.rollback()
         raise RuntimeError(f"Error de base de datos: {e}")
 
+def _invalidar_cache_producto(codigo):
+    # Importación diferida: catalogo depende de este módulo
+    from catalogo import cache_productos
+    cache_productos.invalidar(codigo)
+
 # CRUD para productos
 def agregar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
     try:
@@ -101,28 +315,28 @@ def agregar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
             (codigo, nombre, descripcion, precio, stock, stock_minimo),
             commit=True
         )
+        _invalidar_cache_producto(codigo)
         return True
-    except Exception as e:
-        print(f"Error agregando producto: {e}")
+    except Exception:
+        logger.exception("Error agregando producto %s", codigo)
         return False
 
 def obtener_productos():
     try:
-        cursor = _ejecutar_consulta('SELECT * FROM productos ORDER BY nombre')
-        return cursor.fetchall()
-    except Exception as e:
-        print(f"Error obteniendo productos: {e}")
+        return _ejecutar_consulta('SELECT * FROM productos ORDER BY nombre COLLATE NOCASE', fetch='all')
+    except Exception:
+        logger.exception("Error obteniendo productos")
         return []
 
 def obtener_producto_por_codigo(codigo):
     try:
-        cursor = _ejecutar_consulta(
+        return _ejecutar_consulta(
             'SELECT * FROM productos WHERE codigo = ?', 
-            (codigo,)
+            (codigo,),
+            fetch='one'
         )
-        return cursor.fetchone()
-    except Exception as e:
-        print(f"Error obteniendo producto: {e}")
+    except Exception:
+        logger.exception("Error obteniendo producto %s", codigo)
         return None
 
 def actualizar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
@@ -135,9 +349,10 @@ def actualizar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo
             (nombre, descripcion, precio, stock, stock_minimo, codigo),
             commit=True
         )
+        _invalidar_cache_producto(codigo)
         return cursor.rowcount > 0
-    except Exception as e:
-        print(f"Error actualizando producto: {e}")
+    except Exception:
+        logger.exception("Error actualizando producto %s", codigo)
         return False
 
 def eliminar_producto(codigo):
@@ -147,86 +362,23 @@ def eliminar_producto(codigo):
             (codigo,),
             commit=True
         )
+        _invalidar_cache_producto(codigo)
         return cursor.rowcount > 0
-    except Exception as e:
-        print(f"Error eliminando producto: {e}")
+    except Exception:
+        logger.exception("Error eliminando producto %s", codigo)
         return False
 
-# Operaciones para movimientos
-def registrar_movimiento_batch(detalle, total_bs, detalles_extra=None):
-    try:
-        detalles_json = json.dumps(detalles_extra, ensure_ascii=False) if detalles_extra else None
-        _ejecutar_consulta(
-            '''INSERT INTO movimientos (detalle, total_bs, detalles_extra)
-                VALUES (?, ?, ?)''',
-            (detalle, total_bs, detalles_json),
-            commit=True
-        )
-        return True
-    except Exception as e:
-        print(f"Error registrando movimiento: {e}")
-        return False
-
-def obtener_movimientos():
-    try:
-        cursor = _ejecutar_consulta('''
-            SELECT fecha, detalle, total_bs, detalles_extra
-            FROM movimientos
-            ORDER BY fecha DESC
-        ''')
-        return cursor.fetchall()
-    except Exception as e:
-        print(f"Error obteniendo movimientos: {e}")
-        return []
-
-def eliminar_movimiento(fecha):
-    try:
-        cursor = _ejecutar_consulta(
-            'DELETE FROM movimientos WHERE fecha = ?',
-            (fecha,),
-            commit=True
-        )
-        return cursor.rowcount > 0
-    except Exception as e:
-        print(f"Error eliminando movimiento: {e}")
-        return False
-
-# Operaciones para ventas
-def registrar_venta(producto, cantidad, precio):
-    """Registra una venta en la tabla ventas"""
-    try:
-        _ejecutar_consulta(
-            '''INSERT INTO ventas (producto, cantidad, precio) VALUES (?, ?, ?)''',
-            (producto, cantidad, precio),
-            commit=True
-        )
-        return True
-    except Exception as e:
-        print(f"Error registrando venta: {e}")
-        return False
-
-def obtener_ventas():
-    """Obtiene todas las ventas registradas"""
-    try:
-        cursor = _ejecutar_consulta('SELECT * FROM ventas ORDER BY fecha DESC')
-        return cursor.fetchall()
-    except Exception as e:
-        print(f"Error obteniendo ventas: {e}")
-        return []
-
 # Operaciones para tasa de dólar
 def obtener_tasa_dolar():
     """Obtiene la tasa de dólar más reciente"""
     try:
-        cursor, conn = _ejecutar_consulta('''
+        tasa = _ejecutar_consulta('''
             SELECT monto FROM tasa_dolar
-            ORDER BY fecha DESC LIMIT 1
-        ''')
-        tasa = cursor.fetchone()
-        conn.close()
+            ORDER BY fecha DESC, id DESC LIMIT 1
+        ''', fetch='one')
         return tasa['monto'] if tasa else 36.0
-    except Exception as e:
-        print(f"Error obteniendo tasa dólar: {e}")
+    except Exception:
+        logger.exception("Error obteniendo tasa dólar")
         return 36.0
 
 def actualizar_tasa_dolar(monto):
@@ -237,6 +389,6 @@ def actualizar_tasa_dolar(monto):
             commit=True
         )
         return True
-    except Exception as e:
-        print(f"Error actualizando tasa dólar: {e}")
+    except Exception:
+        logger.exception("Error actualizando tasa dólar a %s", monto)
         return False
\ No newline at end of file
@@ -0,0 +1,111 @@
+# src/exportacion.py
+"""
+Exportación de ventas a Excel o CSV en memoria constante.
+
+Las filas se leen del cursor por bloques y se escriben a medida que llegan
+(openpyxl en modo write-only para .xlsx, módulo csv para .csv), de modo que
+el consumo de memoria no depende del tamaño del historial. Las ventas de
+años archivados dentro del rango se leen de sus archivos (ver archivado).
+"""
+
+import csv
+import logging
+from datetime import datetime
+from itertools import islice
+from archivado import consultar_historial
+from reportes import ganancias_por_periodo
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_VENTAS = ['Producto', 'Cantidad', 'Precio', 'Fecha']
+
+def _a_fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return texto
+
+def _filas_resumen():
+    return [
+        ['Periodo', 'Ganancia'],
+        ['Día', ganancias_por_periodo('dia')],
+        ['Semana', ganancias_por_periodo('semana')],
+        ['Mes', ganancias_por_periodo('mes')],
+    ]
+
+class _EscritorCSV:
+    def __init__(self, ruta):
+        self._archivo = open(ruta, 'w', newline='', encoding='utf-8-sig')
+        self._csv = csv.writer(self._archivo)
+
+    def fila(self, valores):
+        self._csv.writerow(valores)
+
+    def cerrar(self):
+        self._archivo.close()
+
+class _EscritorExcel:
+    def __init__(self, ruta):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("Se requiere openpyxl para exportar a Excel; use .csv")
+        self._ruta = ruta
+        self._libro = Workbook(write_only=True)
+        self._hoja = self._libro.create_sheet('Reporte')
+
+    def fila(self, valores):
+        self._hoja.append(valores)
+
+    def cerrar(self):
+        self._libro.save(self._ruta)
+
+def exportar_ventas(ruta, desde=None, hasta=None, progreso=None, tamano_bloque=1000):
+    """
+    Escribe las ventas (y el resumen de ganancias) en un archivo .xlsx o .csv.
+
+    Args:
+        ruta (str): Archivo destino; la extensión define el formato
+        desde (str, optional): Día inicial 'YYYY-MM-DD' (inclusive)
+        hasta (str, optional): Día final 'YYYY-MM-DD' (inclusive)
+        progreso (callable, optional): Recibe (filas_escritas, total_filas)
+            tras cada bloque
+        tamano_bloque (int): Filas escritas entre avisos de progreso
+
+    Returns:
+        int: Cantidad de ventas exportadas
+    """
+    es_csv = str(ruta).lower().endswith('.csv')
+    escritor = _EscritorCSV(ruta) if es_csv else _EscritorExcel(ruta)
+    escritas = 0
+    try:
+        escritor.fila(COLUMNAS_VENTAS)
+        total = sum(fila[0] for fila in consultar_historial(
+            "SELECT COUNT(*) FROM {esquema}.ventas WHERE fecha >= :inicio AND fecha < :fin",
+            desde, hasta
+        ))
+        filas = consultar_historial('''
+            SELECT codigo, cantidad, precio, fecha FROM {esquema}.ventas
+            WHERE fecha >= :inicio AND fecha < :fin ORDER BY fecha
+        ''', desde, hasta)
+        while True:
+            bloque = list(islice(filas, tamano_bloque))
+            if not bloque:
+                break
+            for producto, cantidad, precio, fecha in bloque:
+                if not es_csv:
+                    fecha = _a_fecha(fecha)
+                escritor.fila([producto, cantidad, precio, fecha])
+            escritas += len(bloque)
+            if progreso:
+                progreso(escritas, total)
+
+        for _ in range(4):
+            escritor.fila([])
+        for valores in _filas_resumen():
+            escritor.fila(valores)
+    finally:
+        escritor.cerrar()
+
+    logger.info("Ventas exportadas: %s filas a %s", escritas, ruta)
+    return escritas
@@ -0,0 +1,89 @@
+# src/graficos.py
+"""
+Panel de gráficos embebido en la ventana principal.
+
+Las figuras se crean una sola vez con matplotlib.figure.Figure (sin pyplot,
+por lo que no se abren ventanas aparte) y cada actualización sólo cambia la
+altura/anchura de las barras y las etiquetas existentes antes de redibujar.
+"""
+
+from tkinter import ttk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from styles import COLOR_PALETTE
+
+PERIODOS = ['Día', 'Semana', 'Mes']
+
+
+class PanelGraficos(ttk.Frame):
+    """
+    Ganancias por periodo y los productos más vendidos.
+
+    Args:
+        master: Contenedor Tk
+        top_productos (int): Cantidad fija de barras de productos
+    """
+
+    def __init__(self, master, top_productos=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.top_productos = top_productos
+        # Versión de datos mostrada (ver database.version_datos)
+        self.version = None
+
+        self.figura = Figure(figsize=(10, 5), facecolor=COLOR_PALETTE["fondo"])
+        self._ax_periodos = self.figura.add_subplot(1, 2, 1)
+        self._ax_productos = self.figura.add_subplot(1, 2, 2)
+        for ax in (self._ax_periodos, self._ax_productos):
+            ax.set_facecolor(COLOR_PALETTE["entry_bg"])
+            ax.tick_params(colors=COLOR_PALETTE["text_secondary"])
+            ax.title.set_color(COLOR_PALETTE["text"])
+            for borde in ax.spines.values():
+                borde.set_color(COLOR_PALETTE["border"])
+
+        self._ax_periodos.set_title('Ganancias por Periodo (Bs.)')
+        self._barras_periodos = self._ax_periodos.bar(
+            PERIODOS, [0] * len(PERIODOS), color=COLOR_PALETTE["accent"]
+        )
+
+        self._ax_productos.set_title(f'Top {top_productos} Productos (Bs.)')
+        posiciones = list(range(top_productos))
+        self._barras_productos = self._ax_productos.barh(
+            posiciones, [0] * top_productos, color=COLOR_PALETTE["accent_dark"]
+        )
+        self._ax_productos.set_yticks(posiciones)
+        self._ax_productos.set_yticklabels([""] * top_productos)
+        self._ax_productos.invert_yaxis()
+
+        self.figura.tight_layout()
+        self.canvas = FigureCanvasTkAgg(self.figura, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def actualizar(self, ganancias, ventas, version=None):
+        """
+        Actualiza las barras existentes con datos nuevos.
+
+        Args:
+            ganancias (list): Totales de día, semana y mes
+            ventas (list): Filas (producto, nombre, total, unidades) ordenadas
+                de mayor a menor; se usan las primeras ``top_productos``
+            version: Versión de datos a la que corresponden
+        """
+        for barra, valor in zip(self._barras_periodos, ganancias):
+            barra.set_height(valor or 0)
+        self._ax_periodos.relim()
+        self._ax_periodos.autoscale_view()
+
+        etiquetas = []
+        for i, barra in enumerate(self._barras_productos):
+            if i < len(ventas):
+                barra.set_width(ventas[i]["total"])
+                etiquetas.append(ventas[i]["nombre"])
+            else:
+                barra.set_width(0)
+                etiquetas.append("")
+        self._ax_productos.set_yticklabels(etiquetas)
+        self._ax_productos.relim()
+        self._ax_productos.autoscale_view()
+
+        self.version = version
+        self.canvas.draw_idle()
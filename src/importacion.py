@@ -0,0 +1,201 @@
+# src/importacion.py
+"""
+Importación masiva de productos desde CSV o XLSX de proveedores.
+
+El archivo se recorre fila a fila (sin cargarlo completo), cada fila se
+valida con las mismas reglas que el alta manual y las válidas se insertan o
+actualizan por código con executemany en una única transacción. Las filas
+rechazadas se devuelven en un reporte de errores.
+"""
+
+import csv
+import logging
+import math
+import sqlite3
+import unicodedata
+import uuid
+from database import conectar_db
+from catalogo import cache_productos
+from productos import _validar_datos_producto
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS = ('codigo', 'nombre', 'descripcion', 'precio', 'stock', 'stock_minimo')
+
+# Encabezados alternativos aceptados (sin tildes, en minúsculas)
+_ALIAS = {
+    'codigo': 'codigo', 'cod': 'codigo',
+    'nombre': 'nombre', 'producto': 'nombre',
+    'descripcion': 'descripcion',
+    'precio': 'precio', 'precio bs.': 'precio', 'precio bs': 'precio',
+    'stock': 'stock', 'existencia': 'stock',
+    'stock_minimo': 'stock_minimo', 'stock minimo': 'stock_minimo', 'minimo': 'stock_minimo',
+}
+
+_UPSERT = '''
+    INSERT INTO productos (codigo, nombre, descripcion, precio, stock, stock_minimo)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(codigo) DO UPDATE SET
+        nombre = excluded.nombre,
+        descripcion = excluded.descripcion,
+        precio = excluded.precio,
+        stock = excluded.stock,
+        stock_minimo = excluded.stock_minimo
+'''
+
+def _normalizar_encabezado(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '').strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+def _mapear_encabezados(encabezados):
+    return [_ALIAS.get(_normalizar_encabezado(e)) for e in encabezados]
+
+def _filas_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(archivo, dialecto)
+        yield from lector
+
+def _filas_xlsx(ruta):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Se requiere openpyxl para importar desde Excel; use .csv")
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+def leer_filas(ruta):
+    """
+    Recorre el archivo devolviendo (numero_fila, dict) con las columnas
+    reconocidas; las columnas desconocidas se ignoran.
+    """
+    filas = _filas_csv(ruta) if str(ruta).lower().endswith('.csv') else _filas_xlsx(ruta)
+    columnas = None
+    for numero, valores in enumerate(filas, start=1):
+        if columnas is None:
+            columnas = _mapear_encabezados(valores)
+            if 'nombre' not in columnas or 'precio' not in columnas:
+                raise ValueError("El archivo debe tener al menos las columnas nombre y precio")
+            continue
+        if not any(v not in (None, '') for v in valores):
+            continue
+        yield numero, {c: v for c, v in zip(columnas, valores) if c}
+
+def _a_numero(valor, tipo):
+    if isinstance(valor, (int, float)):
+        numero = valor
+    else:
+        numero = float(str(valor).strip().replace(',', '.'))
+    if not math.isfinite(numero):
+        raise ValueError(f"{valor} no es un número finito")
+    if tipo is int:
+        if float(numero) != int(numero):
+            raise ValueError(f"{valor} no es un entero")
+        return int(numero)
+    return float(numero)
+
+def validar_fila(datos, codigos_por_nombre=None):
+    """
+    Convierte y valida una fila con las reglas de agregar_producto.
+
+    Una fila sin código toma el del producto con el mismo nombre (sin
+    distinguir mayúsculas) en ``codigos_por_nombre``; si no hay ninguno se
+    genera uno y se agrega al diccionario, de modo que importar otra vez el
+    mismo archivo actualiza esos productos en lugar de duplicarlos.
+
+    Args:
+        datos (dict): Columnas leídas de la fila
+        codigos_por_nombre (dict, optional): {nombre.casefold(): codigo};
+            sin él las filas sin código se rechazan
+
+    Returns:
+        tuple: Valores en el orden de COLUMNAS
+
+    Raises:
+        ValueError: Con el motivo del rechazo
+    """
+    codigo = datos.get('codigo')
+    if isinstance(codigo, float) and codigo.is_integer():
+        codigo = int(codigo)
+    codigo = str(codigo or '').strip()
+    nombre = str(datos.get('nombre') or '').strip()
+    descripcion = str(datos.get('descripcion') or '').strip()
+    if not nombre:
+        raise ValueError("Nombre obligatorio")
+    if codigo and len(codigo) != 8:
+        raise ValueError(f"Código inválido: {codigo}")
+    try:
+        precio = _a_numero(datos.get('precio'), float)
+        stock = _a_numero(datos.get('stock') or 0, int)
+        stock_minimo = _a_numero(datos.get('stock_minimo') or 0, int)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Precio, stock o mínimo no numérico")
+    if not _validar_datos_producto(precio, stock, stock_minimo) or precio <= 0:
+        raise ValueError("Precio debe ser positivo y stock/mínimo no negativos")
+    if not codigo:
+        if codigos_por_nombre is None:
+            raise ValueError("Código obligatorio")
+        clave = nombre.casefold()
+        codigo = codigos_por_nombre.get(clave)
+        if codigo is None:
+            codigo = codigos_por_nombre[clave] = str(uuid.uuid4())[:8]
+    return (codigo, nombre, descripcion, precio, stock, stock_minimo)
+
+def importar_productos(ruta, progreso=None, tamano_bloque=500):
+    """
+    Inserta o actualiza productos desde un archivo CSV o XLSX.
+
+    Args:
+        ruta (str): Archivo con encabezados (codigo, nombre, descripcion,
+            precio, stock, stock_minimo); las filas sin código se asocian
+            por nombre a un producto existente o reciben uno nuevo
+        progreso (callable, optional): Recibe la cantidad de filas leídas
+        tamano_bloque (int): Filas por llamada a executemany
+
+    Returns:
+        dict: {'importados': int, 'errores': [(numero_fila, motivo), ...]}
+    """
+    errores = []
+    importados = 0
+    bloque = []
+    leidas = 0
+    try:
+        with conectar_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            codigos_por_nombre = {
+                nombre.casefold(): codigo
+                for codigo, nombre in conn.execute("SELECT codigo, nombre FROM productos")
+            }
+            for numero, datos in leer_filas(ruta):
+                leidas += 1
+                try:
+                    bloque.append(validar_fila(datos, codigos_por_nombre))
+                except ValueError as e:
+                    errores.append((numero, str(e)))
+                if len(bloque) >= tamano_bloque:
+                    conn.executemany(_UPSERT, bloque)
+                    importados += len(bloque)
+                    bloque = []
+                    if progreso:
+                        progreso(leidas)
+            if bloque:
+                conn.executemany(_UPSERT, bloque)
+                importados += len(bloque)
+    except sqlite3.Error as e:
+        logger.error("Error importando productos desde %s: %s", ruta, e)
+        raise RuntimeError(f"Error de base de datos: {e}")
+    finally:
+        cache_productos.limpiar()
+
+    if progreso:
+        progreso(leidas)
+    logger.info("Productos importados: %s (%s filas con errores) desde %s", importados, len(errores), ruta)
+    return {'importados': importados, 'errores': errores}
@@ -1,21 +1,22 @@
 # src/main.py
+import time
+_INICIO = time.perf_counter()
+
 import os
 import tkinter as tk
 from tkinter import messagebox
 import logging
-from database import crear_tablas
+from database import crear_tablas, cerrar_conexiones
 from main_window import BodegaApp
 from styles import configurar_estilos, aplicar_estilo_ventana
+from registro import configurar_registro
 import sys
 import platform
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='data/app.log',
-    encoding='utf-8'
-)
+_FIN_IMPORTACIONES = time.perf_counter()
+
+# Log asíncrono con rotación (ver registro.py)
+configurar_registro()
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,18 @@ def cargar_icono(root):
     except Exception as e:
         logger.error("Error cargando el ícono: %s", str(e))
 
+def reportar_tiempos_inicio(marcas):
+    """Registra cuánto tardó cada fase del arranque hasta la ventana usable"""
+    anterior = _INICIO
+    fases = []
+    for nombre, instante in marcas:
+        fases.append(f"{nombre}={(instante - anterior) * 1000:.0f}ms")
+        anterior = instante
+    logger.info(
+        "Tiempos de inicio: %s total=%.0fms",
+        " ".join(fases), (anterior - _INICIO) * 1000
+    )
+
 def iniciar_interfaz():
     """Inicializa y ejecuta la interfaz gráfica"""
     try:
@@ -51,8 +64,14 @@ def iniciar_interfaz():
         cargar_icono(root)
         
         # Inicializar aplicación
+        marcas = [("importaciones", _FIN_IMPORTACIONES), ("ventana", time.perf_counter())]
         app = BodegaApp(root)
+        marcas.append(("aplicacion", time.perf_counter()))
+        root.after_idle(lambda: reportar_tiempos_inicio(
+            marcas + [("primer_dibujo", time.perf_counter())]
+        ))
         root.mainloop()
+        cerrar_conexiones()
         
     except Exception as e:
         logger.critical("Error en la interfaz gráfica: %s", str(e), exc_info=True)
@@ -3,28 +3,43 @@ from tkinter import ttk, messagebox, simpledialog
 from styles import configurar_estilos, COLOR_PALETTE
 from productos import (
     agregar_producto,
-    obtener_productos,
     obtener_producto_por_codigo,
     actualizar_producto,
     eliminar_producto
 )
 from movimientos import (
-    registrar_movimiento,
-    obtener_movimientos,
+    obtener_movimientos_pagina,
+    obtener_total_movimientos,
     eliminar_movimiento
 )
-from database import crear_tablas, obtener_tasa_dolar, actualizar_tasa_dolar, conectar_db
+from ventas import vender, VentaError
+from carrito import Carrito
+from database import crear_tablas, version_datos
+from tasas import servicio_tasa
+from trabajador import EjecutorDB
+from reportes import ganancias_por_periodo, ventas_por_producto
+from exportacion import exportar_ventas
+from importacion import importar_productos
+from precios import previsualizar_ajuste, aplicar_ajuste, deshacer_ajuste
+from tablas import SincronizadorTabla
+from busqueda import BuscadorDiferido
+from catalogo import catalogo
+from alertas import contar_bajo_stock, sugerencias_reposicion
+from perfilado import perfilador, LIMITES_HISTOGRAMA
+from archivado import anios_archivables, archivar_anteriores, compactar
 import uuid
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from tkinter import filedialog
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib import pyplot as plt
+# matplotlib se importa al generar gráficos para no demorar el arranque
 
 class BodegaApp:
     """Clase principal de la aplicación de gestión de bodega."""
 
+    # Filas de movimientos cargadas por página al desplazarse
+    MOV_PAGINA = 100
+    # Productos mostrados en el gráfico de más vendidos
+    TOP_PRODUCTOS = 10
+
     def __init__(self, root):
         self.root = root
         self.root.title("🗄️ Bodega Central")
@@ -35,9 +50,16 @@ class BodegaApp:
         configurar_estilos()
         crear_tablas()
 
-        # Variable para mostrar la tasa en el header
+        # Variable para mostrar la tasa en el header (la carga refresh_tables)
         self.tasa_var = tk.StringVar()
-        self._load_tasa()
+
+        # Versión de datos mostrada; None obliga al primer refresco
+        self._version_vista = None
+        # Precios anteriores del último ajuste masivo (para deshacer)
+        self._ultimo_ajuste = None
+
+        # Acceso a datos fuera del hilo de la interfaz
+        self.db = EjecutorDB(self.root)
 
         self._setup_ui()
         self._bind_shortcuts()
@@ -47,17 +69,23 @@ class BodegaApp:
         """Atajos de teclado."""
         self.root.bind("<Control-n>", lambda e: self.open_prod_form())
         self.root.bind("<Escape>", lambda e: self.root.attributes('-fullscreen', False))
+        self.root.protocol("WM_DELETE_WINDOW", self._al_cerrar)
+
+    def _al_cerrar(self):
+        """Espera la tarea de base de datos en curso y cierra la ventana."""
+        self.db.cerrar()
+        self.root.destroy()
 
     def _load_tasa(self):
         """Carga la tasa actual en self.tasa_var."""
-        try:
-            t = obtener_tasa_dolar()
-            self.tasa_var.set(f"USD: {t:.2f} Bs.")
-        except:
+        def fallo(_):
             self.tasa_var.set("USD: -- Bs.")
             messagebox.showerror("Error", "No se pudo cargar la tasa de dólar")
             self.root.after(1000, self._load_tasa)
-            return
+
+        self.db.enviar(servicio_tasa.actual,
+                       al_terminar=lambda t: self.tasa_var.set(f"USD: {t:.2f} Bs."),
+                       al_fallar=fallo)
 
     def configurar_estilos(self):
         style = ttk.Style()
@@ -181,144 +209,376 @@ class BodegaApp:
                 foreground=[("disabled", COLOR_PALETTE["text_secondary"])])
 
     def obtener_ganancias_por_periodo(self, periodo):
-        fecha_hoy = datetime.now()
-        
-        if periodo == 'dia':
-            fecha_inicio = fecha_hoy.replace(hour=0, minute=0, second=0, microsecond=0)
-            fecha_fin = fecha_hoy.replace(hour=23, minute=59, second=59, microsecond=999999)
-        elif periodo == 'semana':
-            fecha_inicio = fecha_hoy - timedelta(days=fecha_hoy.weekday())
-            fecha_inicio = fecha_inicio.replace(hour=0, minute=0, second=0, microsecond=0)
-            fecha_fin = fecha_inicio + timedelta(days=6, hours=23, minutes=59, seconds=59, microseconds=999999)
-        elif periodo == 'mes':
-            fecha_inicio = fecha_hoy.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            if fecha_hoy.month == 12:
-                fecha_fin = fecha_hoy.replace(year=fecha_hoy.year + 1, month=1, day=1) - timedelta(seconds=1)
-            else:
-                fecha_fin = fecha_hoy.replace(month=fecha_hoy.month + 1, day=1) - timedelta(seconds=1)
-        else:
-            return 0.0
-        
-        with conectar_db() as conn:
-            cursor = conn.execute(''' 
-                SELECT SUM(precio * cantidad) 
-                FROM ventas 
-                WHERE fecha >= ? AND fecha <= ?
-            ''', (fecha_inicio, fecha_fin))
-            resultado = cursor.fetchone()
-            return resultado[0] if resultado[0] else 0.0
-        
-    def generar_graficos(self):
-        import matplotlib
-        matplotlib.use('TkAgg')
-        from matplotlib import pyplot as plt
+        """Total vendido en el día, semana o mes actual (desde los acumulados)."""
+        return ganancias_por_periodo(periodo)
         
-        # Primera figura
-        fig1 = plt.figure(figsize=(8, 6))
-        periodos = ['Día', 'Semana', 'Mes']
+    def _leer_datos_graficos(self):
+        """Consulta (en el hilo de trabajo) los datos de los gráficos."""
         ganancias = [
             self.obtener_ganancias_por_periodo('dia'),
             self.obtener_ganancias_por_periodo('semana'), 
             self.obtener_ganancias_por_periodo('mes')
         ]
-        
-        plt.bar(periodos, ganancias, color=COLOR_PALETTE["accent"])
-        plt.title('Ganancias por Periodo')
-        plt.xlabel('Periodo')
-        plt.ylabel('Ganancia en $')
-        plt.tight_layout()
-        
-        # Segunda figura
-        fig2 = plt.figure(figsize=(8, 6))
-        with conectar_db() as conn:
-            ventas = conn.execute('''
-                SELECT producto, SUM(cantidad * precio) AS total_ventas
-                FROM ventas
-                GROUP BY producto
-            ''').fetchall()
-        
-        productos = [venta[0] for venta in ventas]
-        totales = [venta[1] for venta in ventas]
-        
-        plt.barh(productos, totales, color=COLOR_PALETTE["accent_dark"])
-        plt.title('Ventas por Producto')
-        plt.xlabel('Ventas Totales ($)')
-        plt.ylabel('Producto')
-        plt.tight_layout()
-
-        # Manejo de cierre
-        def cerrar_graficos(event):
-            plt.close('all')
-            self.root.focus_force()
-        
-        fig1.canvas.mpl_connect('close_event', cerrar_graficos)
-        fig2.canvas.mpl_connect('close_event', cerrar_graficos)
-        
-        plt.show()
-        
-    def generar_grafico_ventas_por_producto(self):
-        import matplotlib
-        matplotlib.use('TkAgg')
-        from matplotlib import pyplot as plt
-        
-        fig = plt.figure(figsize=(8, 6))
-        with conectar_db() as conn:
-            ventas = conn.execute('''
-                SELECT producto, SUM(cantidad * precio) AS total_ventas
-                FROM ventas
-                GROUP BY producto
-            ''').fetchall()
-
-        productos = [venta[0] for venta in ventas]
-        totales = [venta[1] for venta in ventas]
-
-        plt.figure(figsize=(8, 6))
-        plt.barh(productos, totales, color=COLOR_PALETTE["accent_dark"])
-        plt.title('Ventas por Producto')
-        plt.xlabel('Ventas Totales ($)')
-        plt.ylabel('Producto')
-        plt.tight_layout()
-        plt.show()
-    
-        def on_close(event):
-            plt.close(fig)
-            self.root.focus_force()
-        
-        fig.canvas.mpl_connect('close_event', on_close)
-        plt.show()
+        return ganancias, ventas_por_producto(limite=self.TOP_PRODUCTOS)
+
+    def generar_graficos(self):
+        """Muestra la pestaña de gráficos con los datos al día."""
+        if self.notebook.select() != str(self._tab_graficos):
+            self.notebook.select(self._tab_graficos)  # dispara _on_tab_change
+        else:
+            self._actualizar_graficos()
+
+    def _on_tab_change(self, _):
+        if self.notebook.select() == str(self._tab_graficos):
+            self._actualizar_graficos()
+        elif self.notebook.select() == str(self._tab_alertas):
+            self._actualizar_alertas()
+
+    def _actualizar_alertas(self):
+        """Recalcula las sugerencias de reposición si cambiaron los datos."""
+        version = version_datos()
+        if version == self._version_alertas:
+            return
+
+        def aplicar(sugerencias):
+            self._version_alertas = version
+            self._alertas_sync.sincronizar(
+                (s["codigo"], (
+                    s["nombre"], s["stock"], s["stock_minimo"], f"{s['por_dia']:.2f}",
+                    f"{s['dias_restantes']:.0f}" if s["dias_restantes"] is not None else "-",
+                    s["sugerido"]
+                ), ("bajo_stock",) if s["stock"] <= s["stock_minimo"] else ())
+                for s in sugerencias
+            )
+            self._titulo_alertas(len(sugerencias))
+
+        self.db.enviar(sugerencias_reposicion, al_terminar=aplicar, al_fallar=self._error_datos)
+
+    def _titulo_alertas(self, cantidad):
+        texto = f"Alertas ({cantidad})" if cantidad else "Alertas"
+        self.notebook.tab(self._tab_alertas, text=texto)
+
+    def _actualizar_graficos(self):
+        """Crea el panel la primera vez y lo actualiza si cambiaron los datos."""
+        if self._panel_graficos is None:
+            # Importación diferida: matplotlib sólo se carga al ver gráficos
+            from graficos import PanelGraficos
+            self._panel_graficos = PanelGraficos(self._tab_graficos, self.TOP_PRODUCTOS)
+            self._panel_graficos.pack(fill=tk.BOTH, expand=True)
+        version = version_datos()
+        if version == self._panel_graficos.version:
+            return
+        self.db.enviar(
+            self._leer_datos_graficos,
+            al_terminar=lambda datos: self._panel_graficos.actualizar(*datos, version=version),
+            al_fallar=self._error_datos
+        )
 
     def exportar_a_excel(self):
-        try:
-            with conectar_db() as conn:
-                ventas = conn.execute('SELECT producto, cantidad, precio, fecha FROM ventas').fetchall()
-            
-            columnas = ['Producto', 'Cantidad', 'Precio', 'Fecha']
-            df_ventas = pd.DataFrame(ventas, columns=columnas)
-            df_ventas['Fecha'] = pd.to_datetime(df_ventas['Fecha'])
-
-            df_ganancias = pd.DataFrame({
-                'Periodo': ['Día', 'Semana', 'Mes'],
-                'Ganancia': [
-                    self.obtener_ganancias_por_periodo('dia'),
-                    self.obtener_ganancias_por_periodo('semana'),
-                    self.obtener_ganancias_por_periodo('mes')
-                ]
-            })
-
-            archivo_excel = filedialog.asksaveasfilename(
+        """Modal para exportar ventas (opcionalmente por rango de fechas)."""
+        win = tk.Toplevel(self.root)
+        win.title("Exportar Ventas"); win.geometry("400x250"); win.grab_set()
+        vars_ = {}
+        for i, lbl in enumerate(("Desde (AAAA-MM-DD)", "Hasta (AAAA-MM-DD)")):
+            ttk.Label(win, text=f"{lbl}:").grid(row=i, column=0, padx=10, pady=5, sticky="e")
+            v = tk.StringVar()
+            ttk.Entry(win, textvariable=v).grid(row=i, column=1, sticky="ew", padx=10)
+            vars_[lbl[:5]] = v
+        win.columnconfigure(1, weight=1)
+        barra = ttk.Progressbar(win, mode="determinate", maximum=1)
+        barra.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=10)
+
+        def exportar():
+            try:
+                rango = {}
+                for clave, v in vars_.items():
+                    val = v.get().strip()
+                    if val:
+                        datetime.strptime(val, "%Y-%m-%d")
+                    rango[clave] = val or None
+            except ValueError:
+                return messagebox.showerror("Error", "Fecha inválida, use AAAA-MM-DD")
+
+            archivo = filedialog.asksaveasfilename(
+                parent=win,
                 defaultextension=".xlsx",
-                filetypes=[("Archivos de Excel", "*.xlsx")]
+                filetypes=[("Archivos de Excel", "*.xlsx"), ("CSV", "*.csv")]
             )
-            if archivo_excel:
-                with pd.ExcelWriter(archivo_excel, engine='openpyxl') as writer:
-                    df_ventas.to_excel(writer, sheet_name='Reporte', index=False, startrow=0)
-                    df_ganancias.to_excel(writer, sheet_name='Reporte', startrow=len(df_ventas) + 5, index=False)
-                messagebox.showinfo("Éxito", "Datos exportados correctamente", icon='info')
-            else:
+            if not archivo:
                 messagebox.showwarning("Advertencia", "No se seleccionó archivo", icon='warning')
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Ocurrió un error: {str(e)}", icon='error')
+                return
+            btn_exportar.config(state="disabled")
+
+            def avance(escritas, total):
+                if barra.winfo_exists():
+                    barra.config(maximum=max(total, 1), value=escritas)
+
+            def listo(filas):
+                if win.winfo_exists():
+                    win.destroy()
+                messagebox.showinfo("Éxito", f"{filas} ventas exportadas correctamente", icon='info')
+
+            def fallo(e):
+                if win.winfo_exists():
+                    btn_exportar.config(state="normal")
+                messagebox.showerror("Error", f"Ocurrió un error: {str(e)}", icon='error')
+
+            self.db.enviar_largo(
+                exportar_ventas, archivo, rango["Desde"], rango["Hasta"],
+                progreso=lambda n, total: self.db.en_hilo_ui(avance, n, total),
+                al_terminar=listo, al_fallar=fallo
+            )
+
+        btn_frame = ttk.Frame(win)
+        btn_frame.grid(row=3, column=0, columnspan=2, pady=15)
+        btn_exportar = ttk.Button(btn_frame, text="Exportar", style="Accent.TButton", command=exportar)
+        btn_exportar.pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Cancelar", command=win.destroy)\
+            .pack(side="left", padx=5)
+
+    def importar_productos(self):
+        """Carga o actualiza productos desde un CSV/XLSX de proveedor."""
+        archivo = filedialog.askopenfilename(
+            parent=self.root,
+            filetypes=[("Archivos de Excel", "*.xlsx"), ("CSV", "*.csv")]
+        )
+        if not archivo:
+            return
+
+        def listo(resultado):
+            errores = resultado['errores']
+            mensaje = f"{resultado['importados']} productos importados"
+            if errores:
+                detalle = "\n".join(f"Fila {n}: {motivo}" for n, motivo in errores[:15])
+                if len(errores) > 15:
+                    detalle += f"\n... y {len(errores) - 15} más"
+                messagebox.showwarning(
+                    "Importación", f"{mensaje}, {len(errores)} filas rechazadas:\n\n{detalle}"
+                )
+            else:
+                messagebox.showinfo("Éxito", mensaje)
+            self.refresh_tables()
+
+        def fallo(e):
+            messagebox.showerror("Error", f"No se pudo importar: {str(e)}", icon='error')
+
+        self.db.enviar_largo(importar_productos, archivo, al_terminar=listo, al_fallar=fallo)
+
+    def archivar_historial(self):
+        """Mueve los movimientos y ventas de años cerrados a sus archivos."""
+        def confirmar(anios):
+            if not anios:
+                return messagebox.showinfo("Archivar", "No hay años cerrados para archivar")
+            lista = ", ".join(str(anio) for anio in anios)
+            if not messagebox.askyesno(
+                "Archivar",
+                f"Se moverán los movimientos y ventas de {lista} a archivos históricos.\n"
+                "Los reportes y la exportación los seguirán incluyendo. ¿Continuar?"
+            ):
+                return
+            self.db.enviar_largo(archivar_anteriores, al_terminar=listo, al_fallar=fallo)
+
+        def listo(resultados):
+            detalle = "\n".join(
+                f"{anio}: {r['movimientos']} movimientos, {r['ventas']} ventas"
+                for anio, r in resultados.items()
+            )
+            messagebox.showinfo("Archivar", f"Historial archivado:\n\n{detalle}")
+            self.refresh_tables(forzar=True)
+            if resultados and messagebox.askyesno(
+                "Compactar",
+                "La base de datos puede compactarse para liberar el espacio archivado.\n"
+                "Mientras se compacta (varios minutos en bases grandes) no se registran "
+                "ventas: quedan en espera hasta que termine.\n¿Compactar ahora?"
+            ):
+                # En la cola de las ventas: ninguna corre mientras se compacta
+                self.db.enviar(
+                    compactar,
+                    al_terminar=lambda _: messagebox.showinfo("Compactar", "Base de datos compactada"),
+                    al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo compactar: {e}")
+                )
+
+        def fallo(e):
+            messagebox.showerror("Error", f"No se pudo archivar: {str(e)}", icon='error')
+
+        self.db.enviar(anios_archivables, al_terminar=confirmar, al_fallar=self._error_datos)
+
+    def ajustar_precios(self, modo="porcentaje", tasa_anterior=None):
+        """Modal para ajustar precios en lote con vista previa y deshacer."""
+        modos = {"Porcentaje (%)": "porcentaje", "Monto fijo (Bs.)": "fijo",
+                 "Dólar (tasa anterior)": "dolar"}
+        win = tk.Toplevel(self.root)
+        win.title("Ajustar Precios"); win.geometry("560x480"); win.grab_set()
+        modo_var = tk.StringVar(value=next(k for k, v in modos.items() if v == modo))
+        valor_var = tk.StringVar()
+        tasa_var = tk.StringVar(value=f"{tasa_anterior:.2f}" if tasa_anterior else "")
+        filtro_var = tk.StringVar()
+        sel_var = tk.BooleanVar(value=False)
+
+        ttk.Label(win, text="Modo:").grid(row=0, column=0, padx=10, pady=5, sticky="e")
+        ttk.Combobox(win, textvariable=modo_var, values=list(modos), state="readonly")\
+            .grid(row=0, column=1, sticky="ew", padx=10)
+        for i, (lbl, var) in enumerate((("Valor", valor_var), ("Tasa anterior", tasa_var),
+                                        ("Nombre contiene", filtro_var)), start=1):
+            ttk.Label(win, text=f"{lbl}:").grid(row=i, column=0, padx=10, pady=5, sticky="e")
+            ttk.Entry(win, textvariable=var).grid(row=i, column=1, sticky="ew", padx=10)
+        ttk.Checkbutton(win, text="Sólo productos seleccionados", variable=sel_var)\
+            .grid(row=4, column=1, sticky="w", padx=10)
+        win.columnconfigure(1, weight=1)
+        win.rowconfigure(6, weight=1)
+
+        resumen = tk.StringVar()
+        ttk.Label(win, textvariable=resumen).grid(row=5, column=0, columnspan=2, pady=5)
+        vista = ttk.Treeview(win, columns=("nombre", "precio", "nuevo"), show="headings", height=8)
+        for col, txt in (("nombre", "Producto"), ("precio", "Actual"), ("nuevo", "Nuevo")):
+            vista.heading(col, text=txt)
+        vista.grid(row=6, column=0, columnspan=2, sticky="nsew", padx=10)
+
+        def parametros():
+            m = modos[modo_var.get()]
+            try:
+                valor = float(valor_var.get().replace(",", ".")) if m != "dolar" else None
+                anterior = float(tasa_var.get().replace(",", ".")) if m == "dolar" else None
+            except ValueError:
+                raise ValueError("Valor o tasa inválidos")
+            codigos = None
+            if sel_var.get():
+                codigos = [self.prod_table.item(i, "values")[0] for i in self.prod_table.selection()]
+                if not codigos:
+                    raise ValueError("No hay productos seleccionados")
+            return dict(modo=m, valor=valor, tasa_anterior=anterior,
+                        codigos=codigos, filtro=filtro_var.get().strip() or None)
+
+        def con_tasa_actual(funcion, **params):
+            # En el hilo de trabajo: el modo dólar usa la tasa vigente
+            if params["modo"] == "dolar":
+                params["tasa_actual"] = servicio_tasa.actual()
+            return funcion(**params)
+
+        def previsualizar():
+            try:
+                params = parametros()
+            except ValueError as e:
+                return messagebox.showerror("Error", str(e), parent=win)
+
+            def mostrar(res):
+                if not win.winfo_exists():
+                    return
+                total, filas = res
+                vista.delete(*vista.get_children())
+                for f in filas:
+                    vista.insert("", "end", values=(f["nombre"], f"{f['precio']:.2f}", f"{f['nuevo']:.2f}"))
+                resumen.set(f"{total} productos serán ajustados")
+
+            self.db.enviar(con_tasa_actual, previsualizar_ajuste, al_terminar=mostrar,
+                           al_fallar=self._error_datos, **params)
+
+        def aplicar():
+            try:
+                params = parametros()
+            except ValueError as e:
+                return messagebox.showerror("Error", str(e), parent=win)
+            if not messagebox.askyesno("Confirmar", "¿Aplicar el ajuste de precios?", parent=win):
+                return
+
+            def listo(anteriores):
+                self._ultimo_ajuste = anteriores
+                if win.winfo_exists():
+                    btn_deshacer.config(state="normal")
+                    resumen.set(f"{len(anteriores)} productos ajustados")
+                self.refresh_tables()
+
+            self.db.enviar(con_tasa_actual, aplicar_ajuste, al_terminar=listo,
+                           al_fallar=self._error_datos, **params)
+
+        def deshacer():
+            anteriores, self._ultimo_ajuste = self._ultimo_ajuste, None
+            btn_deshacer.config(state="disabled")
+
+            def listo(n):
+                if win.winfo_exists():
+                    resumen.set(f"{n} precios restaurados")
+                self.refresh_tables()
+
+            self.db.enviar(deshacer_ajuste, anteriores, al_terminar=listo,
+                           al_fallar=self._error_datos)
+
+        btn_frame = ttk.Frame(win)
+        btn_frame.grid(row=7, column=0, columnspan=2, pady=15)
+        ttk.Button(btn_frame, text="Vista previa", command=previsualizar).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Aplicar", style="Accent.TButton", command=aplicar)\
+            .pack(side="left", padx=5)
+        btn_deshacer = ttk.Button(btn_frame, text="Deshacer último", command=deshacer,
+                                  state="normal" if self._ultimo_ajuste else "disabled")
+        btn_deshacer.pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Cerrar", command=win.destroy).pack(side="left", padx=5)
+
+    def abrir_diagnostico(self):
+        """Ventana con las consultas SQL más costosas según el perfilador."""
+        win = tk.Toplevel(self.root)
+        win.title("Diagnóstico de Consultas"); win.geometry("900x560")
+        win.columnconfigure(0, weight=1)
+        win.rowconfigure(1, weight=1)
+
+        barra = ttk.Frame(win)
+        barra.grid(row=0, column=0, sticky="ew", padx=10, pady=5)
+        activo_var = tk.BooleanVar(value=perfilador.activo)
+        ttk.Checkbutton(barra, text="Perfilado activo", variable=activo_var,
+                        command=lambda: perfilador.activar(activo_var.get())).pack(side="left")
+
+        cols = ("sql", "llamadas", "total", "media", "max", "filas", "origen")
+        tabla = ttk.Treeview(win, columns=cols, show="headings", selectmode="browse")
+        for col, texto, ancho in (
+            ("sql", "Sentencia", 330), ("llamadas", "Llamadas", 70), ("total", "Total ms", 80),
+            ("media", "Media ms", 80), ("max", "Máx ms", 80), ("filas", "Filas", 70),
+            ("origen", "Origen principal", 170),
+        ):
+            tabla.heading(col, text=texto)
+            tabla.column(col, width=ancho, anchor="w" if col in ("sql", "origen") else "e")
+        tabla.grid(row=1, column=0, sticky="nsew", padx=10)
+        detalle = tk.Text(win, height=10, wrap="word")
+        detalle.grid(row=2, column=0, sticky="ew", padx=10, pady=5)
+        sync = SincronizadorTabla(tabla)
+        estadisticas = {}
+
+        def actualizar():
+            estadisticas.clear()
+            filas = []
+            for i, est in enumerate(perfilador.consultas()):
+                estadisticas[str(i)] = est
+                origen = est.origenes.most_common(1)[0][0] if est.origenes else ""
+                filas.append((str(i), (
+                    est.sql[:120], est.llamadas, f"{est.total_ms:.1f}", f"{est.media_ms:.2f}",
+                    f"{est.max_ms:.2f}", est.filas, origen
+                ), ()))
+            sync.sincronizar(filas)
+            if not tabla.selection():
+                detalle.delete("1.0", "end")
+                detalle.insert("end", "Sentencias ejecutadas por SQLite (incluye triggers):\n")
+                for sql, n in perfilador.trazas()[:20]:
+                    detalle.insert("end", f"{n:>7}  {sql[:140]}\n")
+
+        def mostrar(_):
+            sel = tabla.selection()
+            if not sel or sel[0] not in estadisticas:
+                return
+            est = estadisticas[sel[0]]
+            limites = [f"<={l}" for l in LIMITES_HISTOGRAMA] + [f">{LIMITES_HISTOGRAMA[-1]}"]
+            histograma = "  ".join(f"{l}ms:{n}" for l, n in zip(limites, est.histograma) if n)
+            origenes = ", ".join(f"{o} ({n})" for o, n in est.origenes.most_common())
+            detalle.delete("1.0", "end")
+            detalle.insert("end", f"{est.sql}\n\nHistograma: {histograma}\n"
+                                  f"Origen: {origenes}\n\nPlan:\n{est.plan or '(no fue lenta)'}")
+
+        def reiniciar():
+            perfilador.reiniciar()
+            detalle.delete("1.0", "end")
+            actualizar()
+
+        tabla.bind("<<TreeviewSelect>>", mostrar)
+        ttk.Button(barra, text="Actualizar", command=actualizar).pack(side="left", padx=5)
+        ttk.Button(barra, text="Reiniciar", command=reiniciar).pack(side="left", padx=5)
+        actualizar()
 
     def _setup_ui(self):
         """Construye la UI principal."""
@@ -327,13 +587,46 @@ class BodegaApp:
         ttk.Label(header, text="Gestión de Inventario", style="title.TLabel").pack(side="left")
         ttk.Label(header, textvariable=self.tasa_var, style="header.TLabel").pack(side="right")
         
-        paned = ttk.PanedWindow(self.root, orient=tk.HORIZONTAL)
-        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        paned = ttk.PanedWindow(self.notebook, orient=tk.HORIZONTAL)
+        self.notebook.add(paned, text="Inventario")
+
+        # El panel de gráficos se construye al abrir la pestaña
+        self._tab_graficos = ttk.Frame(self.notebook)
+        self._panel_graficos = None
+        self.notebook.add(self._tab_graficos, text="Gráficos")
+        self._tab_alertas = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self._tab_alertas, text="Alertas")
+        self._setup_alertas_ui(self._tab_alertas)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change)
         
         self._setup_productos_ui(paned)
         self._setup_movimientos_ui(paned)
         self._setup_footer()
 
+    def _setup_alertas_ui(self, frame):
+        """Tabla de productos en o bajo el mínimo con la reposición sugerida."""
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        cols = ("nombre", "stock", "minimo", "por_dia", "dias", "sugerido")
+        tabla = ttk.Treeview(frame, columns=cols, show="headings",
+                             selectmode="browse", style="Custom.Treeview")
+        for col, texto, ancho in (
+            ("nombre", "Producto", 200), ("stock", "Stock", 70), ("minimo", "Mínimo", 70),
+            ("por_dia", "Ventas/día", 90), ("dias", "Días restantes", 110),
+            ("sugerido", "Reponer", 80),
+        ):
+            tabla.heading(col, text=texto)
+            tabla.column(col, width=ancho, anchor="w" if col == "nombre" else "e")
+        tabla.tag_configure("bajo_stock", background=COLOR_PALETTE["warning"])
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=scroll.set)
+        tabla.grid(row=0, column=0, sticky="nsew")
+        scroll.grid(row=0, column=1, sticky="ns")
+        self._alertas_sync = SincronizadorTabla(tabla)
+        self._version_alertas = None
+
     def _setup_productos_ui(self, paned):
         frame = ttk.Labelframe(paned, text="Productos", padding=10)
         paned.add(frame, weight=1)
@@ -349,12 +642,13 @@ class BodegaApp:
             .pack(side="left", fill="x", expand=True, padx=5)
         ttk.Button(prod_search, text="×", style="Warning.TButton",
                    command=lambda: self.prod_search_var.set("")).pack(side="left")
-        self.prod_search_var.trace_add("write", lambda *a: self._refresh_productos())
+        self._prod_buscador = BuscadorDiferido(self.root, self._buscar_productos)
+        self.prod_search_var.trace_add("write", self._prod_buscador.programar)
 
         # Tabla de productos
         cols = ("Código","Nombre","Descripción","Precio","Stock","Mínimo")
         self.prod_table = ttk.Treeview(frame, columns=cols, show="headings",
-                                       selectmode="browse", style="Custom.Treeview")
+                                       selectmode="extended", style="Custom.Treeview")
         for c,w in zip(cols,(100,100,100,80,80,80)):
             self.prod_table.heading(c, text=c)
             self.prod_table.column(c, width=w, anchor="center")
@@ -364,6 +658,8 @@ class BodegaApp:
         self.prod_table.configure(yscrollcommand=vsb1.set)
         vsb1.grid(row=1, column=1, sticky="ns")
 
+        self._prod_sync = SincronizadorTabla(self.prod_table)
+
         # Configuración de estilos de la tabla
         self.prod_table.tag_configure('even', background=COLOR_PALETTE["hover"])
         self.prod_table.tag_configure("bajo_stock", background=COLOR_PALETTE["warning"])
@@ -382,9 +678,16 @@ class BodegaApp:
             self.mov_table.column(c, width=w, anchor="center")
         self.mov_table.grid(row=0, column=0, sticky="nsew")
         self.mov_table.bind("<<TreeviewSelect>>", self._on_mov_select)
-        vsb2 = ttk.Scrollbar(frame, orient="vertical", command=self.mov_table.yview)
-        self.mov_table.configure(yscrollcommand=vsb2.set)
-        vsb2.grid(row=0, column=1, sticky="ns")
+        self._mov_vsb = ttk.Scrollbar(frame, orient="vertical", command=self.mov_table.yview)
+        self.mov_table.configure(yscrollcommand=self._on_mov_scroll)
+        self._mov_vsb.grid(row=0, column=1, sticky="ns")
+
+        # Estado de la paginación por cursor
+        self._mov_sync = SincronizadorTabla(self.mov_table)
+        self._mov_cursor = None
+        self._mov_fin = False
+        self._mov_cargando = False
+        self._mov_epoca = 0
 
         self.ganancias_label = ttk.Label(
             frame, text="Ganancias Totales: 0.00 Bs.", style="header.TLabel"
@@ -426,6 +729,12 @@ class BodegaApp:
         )
         self.btn_del_prod.pack(side="left", padx=2)
 
+        ttk.Button(
+            product_frame, 
+            text="📥 Importar", 
+            command=self.importar_productos
+        ).pack(side="left", padx=2)
+
         # Grupo 2: Operaciones de Venta
         sales_frame = ttk.Frame(main_container)
         sales_frame.grid(row=0, column=1, padx=5, pady=2, sticky="w")
@@ -453,11 +762,29 @@ class BodegaApp:
             text="💲 Tasa Dólar", 
             command=self.verificar_o_modificar_tasa
         ).pack(side="left", padx=2)
+
+        ttk.Button(
+            config_frame, 
+            text="💱 Ajustar Precios", 
+            command=self.ajustar_precios
+        ).pack(side="left", padx=2)
+
+        ttk.Button(
+            config_frame, 
+            text="🩺 Diagnóstico", 
+            command=self.abrir_diagnostico
+        ).pack(side="left", padx=2)
+
+        ttk.Button(
+            config_frame, 
+            text="🗄 Archivar", 
+            command=self.archivar_historial
+        ).pack(side="left", padx=2)
         
         ttk.Button(
             config_frame, 
             text="🔄 Refrescar", 
-            command=self.refresh_tables
+            command=lambda: self.refresh_tables(forzar=True)
         ).pack(side="left", padx=2)
 
         # Grupo 4: Gestión de Movimientos
@@ -496,43 +823,119 @@ class BodegaApp:
         main_container.columnconfigure(1, weight=1)
         main_container.columnconfigure(2, weight=1)
 
-    def refresh_tables(self):
-        """Refresca productos, movimientos y tasa."""
-        self._load_tasa()
-        self._refresh_productos()
-        self._refresh_movimientos()
+    def refresh_tables(self, forzar=False):
+        """Refresca productos, movimientos y tasa si los datos cambiaron."""
+        if forzar:
+            servicio_tasa.invalidar()
+        version = version_datos()
+        cambiaron = forzar or version != self._version_vista
+        filtro = self.prod_search_var.get()
+        cargadas = max(len(self._mov_sync), self.MOV_PAGINA)
+        self._mov_epoca += 1
+
+        def leer():
+            datos = {"tasa": servicio_tasa.actual()}
+            if cambiaron:
+                catalogo.actualizar(forzar=forzar)
+                datos["productos"] = catalogo.filtrar(filtro)
+                datos["movimientos"] = obtener_movimientos_pagina(None, cargadas)
+                datos["total"] = obtener_total_movimientos()
+                datos["alertas"] = contar_bajo_stock()
+            return datos
+
+        def aplicar(datos):
+            self.tasa_var.set(f"USD: {datos['tasa']:.2f} Bs.")
+            if cambiaron:
+                self._version_vista = version
+                self._aplicar_productos(datos["productos"])
+                self._aplicar_movimientos(datos["movimientos"], cargadas, datos["total"])
+                self._titulo_alertas(datos["alertas"])
+                if self.notebook.select() == str(self._tab_graficos):
+                    self._actualizar_graficos()
+                elif self.notebook.select() == str(self._tab_alertas):
+                    self._actualizar_alertas()
+
+        self.db.enviar(leer, al_terminar=aplicar, al_fallar=self._error_datos)
+        for tabla in (self.prod_table, self.mov_table):
+            tabla.selection_remove(*tabla.selection())
         self.btn_mod_prod.config(state="disabled")
         self.btn_del_prod.config(state="disabled")
         self.btn_del_mov.config(state="disabled")
 
-    def _refresh_productos(self):
+    def _error_datos(self, error):
+        """Muestra un error producido en una tarea de base de datos."""
+        messagebox.showerror("Error", f"Ocurrió un error: {error}")
+
+    def _buscar_productos(self, generacion):
+        """Refresca productos al terminar de escribir en el buscador."""
+        cancelado = lambda: not self._prod_buscador.vigente(generacion)
+
+        def aplicar(productos):
+            if productos is not None and not cancelado():
+                self._aplicar_productos(productos)
+
+        self.db.enviar(catalogo.filtrar, self.prod_search_var.get(),
+                       cancelado=cancelado, al_terminar=aplicar)
+
+    def _aplicar_productos(self, productos):
         """Carga productos; marca en rojo los bajo stock."""
-        self.prod_table.delete(*self.prod_table.get_children())
-        filtro = self.prod_search_var.get().lower()
-        for p in sorted(obtener_productos(), key=lambda x: x[1]):
-            if filtro and filtro not in p[1].lower():
-                continue
+        if productos is None:
+            return
+        filas = []
+        for p in productos:
             values = (p[0], p[1], p[2], f"{p[3]:,.2f}", p[4], p[5])
             tag = "bajo_stock" if p[4] <= p[5] else ""
-            self.prod_table.insert("", "end", iid=p[0], values=values, tags=(tag,))
-
-    def _refresh_movimientos(self):
-        """Carga movimientos con columnas separadas de nombre y cantidad."""
-        self.mov_table.delete(*self.mov_table.get_children())
-        total = 0.0
-        for m in obtener_movimientos():
-            det = m[3] if isinstance(m[3], dict) else {}
-            total += m[2]
-            nombre = m[1]
-            cantidad = det.get("cantidad", "")
-            self.mov_table.insert("", "end", values=(
-                m[0], nombre, cantidad, f"{m[2]:,.2f}", det.get("cliente", "")
-            ))
+            filas.append((p[0], values, (tag,)))
+        self._prod_sync.sincronizar(filas)
+
+    @staticmethod
+    def _fila_movimiento(m):
+        """Convierte un movimiento en (iid, values, tags) para la tabla."""
+        return (str(m["id"]), (
+            m["fecha"], m["detalle"], m["cantidad"] or "", f"{m['total_bs']:,.2f}", m["cliente"] or ""
+        ), ())
+
+    def _aplicar_movimientos(self, pagina, cargadas, total):
+        """Sincroniza las páginas ya cargadas de movimientos con la base."""
+        self._mov_sync.sincronizar(self._fila_movimiento(m) for m in pagina)
+        self._mov_cursor = (pagina[-1]["fecha"], pagina[-1]["id"]) if pagina else None
+        self._mov_fin = len(pagina) < cargadas
         self.ganancias_label.config(text=f"Ganancias Totales: {total:,.2f} Bs.")
 
+    def _cargar_mas_movimientos(self):
+        """Pide la siguiente página de movimientos para el final de la tabla."""
+        if self._mov_fin or self._mov_cargando:
+            return
+        self._mov_cargando = True
+        epoca = self._mov_epoca
+
+        def aplicar(pagina):
+            self._mov_cargando = False
+            # Un refresco posterior ya recargó la tabla: la página está vieja
+            if epoca != self._mov_epoca:
+                return
+            self._mov_sync.agregar(self._fila_movimiento(m) for m in pagina)
+            if pagina:
+                self._mov_cursor = (pagina[-1]["fecha"], pagina[-1]["id"])
+            self._mov_fin = len(pagina) < self.MOV_PAGINA
+
+        def fallo(error):
+            self._mov_cargando = False
+            self._error_datos(error)
+
+        self.db.enviar(obtener_movimientos_pagina, self._mov_cursor, self.MOV_PAGINA,
+                       al_terminar=aplicar, al_fallar=fallo)
+
+    def _on_mov_scroll(self, first, last):
+        """Actualiza la barra y pide otra página al acercarse al final."""
+        self._mov_vsb.set(first, last)
+        if float(last) > 0.9 and not self._mov_fin:
+            self.root.after_idle(self._cargar_mas_movimientos)
+
     def _on_prod_select(self, _):
-        """Activa botones Modificar/Eliminar producto."""
-        sel = bool(self.prod_table.selection())
+        """Activa botones Modificar/Eliminar producto (sólo con uno seleccionado)."""
+        # La selección múltiple es para el ajuste de precios en lote
+        sel = len(self.prod_table.selection()) == 1
         state = "normal" if sel else "disabled"
         self.btn_mod_prod.config(state=state)
         self.btn_del_prod.config(state=state)
@@ -545,11 +948,12 @@ class BodegaApp:
     def confirm_delete_prod(self):
         """Elimina el producto seleccionado tras confirmación."""
         sel = self.prod_table.selection()
-        if not sel: return
+        if len(sel) != 1: return
         cod, nombre = self.prod_table.item(sel[0], "values")[:2]
         if messagebox.askyesno("Confirmar", f"Eliminar {nombre}?"):
-            eliminar_producto(cod)
-            self.refresh_tables()
+            self.db.enviar(eliminar_producto, cod,
+                           al_terminar=lambda _: self.refresh_tables(),
+                           al_fallar=self._error_datos)
 
     def confirm_delete_mov(self):
         """Elimina movimiento y devuelve stock si corresponde."""
@@ -558,16 +962,11 @@ class BodegaApp:
         fecha = self.mov_table.item(sel[0], "values")[0]
         if not messagebox.askyesno("Confirmar", f"Eliminar movimiento {fecha}?"):
             return
-        mov = next((m for m in obtener_movimientos() if m[0] == fecha), None)
-        if mov and isinstance(mov[3], dict):
-            pid = mov[3].get("producto_id")
-            cnt = mov[3].get("cantidad", 0)
-            if pid and cnt:
-                prod = obtener_producto_por_codigo(pid)
-                if prod is not None:
-                    actualizar_producto(pid, prod[1], prod[2], prod[3], prod[4]+cnt, prod[5])
-        eliminar_movimiento(fecha)
-        self.refresh_tables()
+        # El iid de la fila es el id del movimiento; la reversión de stock
+        # se hace en la misma transacción que el borrado
+        self.db.enviar(eliminar_movimiento, int(sel[0]),
+                       al_terminar=lambda _: self.refresh_tables(),
+                       al_fallar=self._error_datos)
 
     def open_prod_form(self):
         """Abre modal para crear un nuevo producto."""
@@ -597,15 +996,22 @@ class BodegaApp:
                     if t == "int":
                         val = int(val)
                     data[lbl] = val
-                agregar_producto(
-                    str(uuid.uuid4())[:8],
-                    data["Nombre"], data["Descripción"],
-                    data["Precio"], data["Stock"], data["Mínimo"]
-                )
+            except Exception as e:
+                return messagebox.showerror("Error", str(e))
+
+            def listo(ok):
+                if not ok:
+                    return messagebox.showerror("Error", "No se pudo guardar el producto")
                 win.destroy()
                 self.refresh_tables()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+
+            self.db.enviar(
+                agregar_producto,
+                str(uuid.uuid4())[:8],
+                data["Nombre"], data["Descripción"],
+                data["Precio"], data["Stock"], data["Mínimo"],
+                al_terminar=listo, al_fallar=self._error_datos
+            )
 
         btn_frame = ttk.Frame(win)
         btn_frame.grid(row=len(campos), column=0, columnspan=2, pady=15)
@@ -617,12 +1023,19 @@ class BodegaApp:
     def open_mod_prod_form(self):
         """Abre modal para modificar el producto seleccionado."""
         sel = self.prod_table.selection()
-        if not sel: return
+        if len(sel) != 1: return
         pid = self.prod_table.item(sel[0], "values")[0]
-        p = obtener_producto_por_codigo(pid)
-        if not p:
-            return messagebox.showerror("Error", "Producto no encontrado")
 
+        def abrir(p):
+            if not p:
+                return messagebox.showerror("Error", "Producto no encontrado")
+            self._form_modificar_producto(pid, p)
+
+        self.db.enviar(obtener_producto_por_codigo, pid,
+                       al_terminar=abrir, al_fallar=self._error_datos)
+
+    def _form_modificar_producto(self, pid, p):
+        """Formulario de modificación con los datos leídos del producto."""
         win = tk.Toplevel(self.root)
         win.title("Modificar Producto"); win.geometry("400x350"); win.grab_set()
         campos = [
@@ -654,15 +1067,22 @@ class BodegaApp:
                     if t == "int":
                         val = int(val)
                     data[lbl] = val
-                actualizar_producto(
-                    pid,
-                    data["Nombre"], data["Descripción"],
-                    data["Precio"], data["Stock"], data["Mínimo"]
-                )
+            except Exception as e:
+                return messagebox.showerror("Error", str(e))
+
+            def listo(ok):
+                if not ok:
+                    return messagebox.showerror("Error", "No se pudo modificar el producto")
                 win.destroy()
                 self.refresh_tables()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+
+            self.db.enviar(
+                actualizar_producto,
+                pid,
+                data["Nombre"], data["Descripción"],
+                data["Precio"], data["Stock"], data["Mínimo"],
+                al_terminar=listo, al_fallar=self._error_datos
+            )
 
         btn_frame = ttk.Frame(win)
         btn_frame.grid(row=len(campos), column=0, columnspan=2, pady=15)
@@ -674,8 +1094,8 @@ class BodegaApp:
     def open_single_sale(self):
         """Modal para venta individual de un producto."""
         sel = self.prod_table.selection()
-        if not sel:
-            return messagebox.showwarning("Atención", "Seleccione un producto")
+        if len(sel) != 1:
+            return messagebox.showwarning("Atención", "Seleccione un solo producto")
         pid, nombre, _, precio_str, stock_str, _ = self.prod_table.item(sel[0], "values")
         precio = float(precio_str.replace(",", ""))
         stock = int(stock_str)
@@ -694,34 +1114,50 @@ class BodegaApp:
             c = cantidad.get()
             if c < 1 or c > stock:
                 return messagebox.showerror("Error", "Cantidad inválida")
-            total = precio * c
-            detalles = {"producto_id": pid, "cantidad": c, "cliente": cliente.get().strip() or None}
-            registrar_movimiento(f"{c}x {nombre}", total, detalles)
-            prod = obtener_producto_por_codigo(pid)
-            if prod is None:
-                messagebox.showerror("Error", "Producto no encontrado")
-                return
-            actualizar_producto(pid, prod[1], prod[2], prod[3], prod[4] - c, prod[5])
-            win.destroy()
-            self.refresh_tables()
+            btn_vender.config(state="disabled")
+
+            def listo(_):
+                win.destroy()
+                self.refresh_tables()
+
+            def fallo(error):
+                btn_vender.config(state="normal")
+                messagebox.showerror("Error", str(error))
+
+            self.db.enviar(vender, [(pid, c)], cliente.get().strip() or None,
+                           al_terminar=listo, al_fallar=fallo)
 
         btn_frame = ttk.Frame(win)
         btn_frame.pack(pady=15)
-        ttk.Button(btn_frame, text="Vender", style="Accent.TButton", command=procesar)\
-            .pack(side="left", padx=5)
+        btn_vender = ttk.Button(btn_frame, text="Vender", style="Accent.TButton", command=procesar)
+        btn_vender.pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=win.destroy)\
             .pack(side="left", padx=5)
 
     def open_batch_sale(self):
         """Modal para venta por lote con filtrado, selección y total dinámico."""
+        self.db.enviar(servicio_tasa.actual, al_terminar=self._ventana_venta_lote,
+                       al_fallar=self._error_datos)
+
+    def _ventana_venta_lote(self, tasa):
+        """Ventana de la venta por lote con la tasa vigente ya leída."""
         win = tk.Toplevel(self.root)
         win.title("Venta por Lote"); win.geometry("900x650"); win.grab_set()
         win.columnconfigure(0, weight=1); win.rowconfigure(3, weight=1)
 
         # Tasa de dólar
-        tasa = obtener_tasa_dolar()
         ttk.Label(win, text=f"Tasa USD: {tasa:.2f} Bs.", style="bold.TLabel")\
             .grid(row=0, column=0, sticky="ne", padx=10, pady=5)
+        carrito = Carrito(tasa)
+
+        # Escáner: cada código leído suma una unidad al carrito
+        scan_var = tk.StringVar(master=win)
+        scan_msg = tk.StringVar(master=win)
+        scf = ttk.Frame(win); scf.grid(row=0, column=0, sticky="nw", padx=10, pady=5)
+        ttk.Label(scf, text="Escanear:", style="bold.TLabel").pack(side="left")
+        scan_entry = ttk.Entry(scf, textvariable=scan_var, width=12)
+        scan_entry.pack(side="left", padx=5)
+        ttk.Label(scf, textvariable=scan_msg).pack(side="left")
 
         # Búsqueda
         sv = tk.StringVar()
@@ -740,16 +1176,67 @@ class BodegaApp:
         tree.configure(yscrollcommand=vsb.set); vsb.grid(row=3, column=1, sticky="ns")
 
         spins = {}
-        def load_prods():
-            tree.delete(*tree.get_children())
-            for p in obtener_productos():
-                if sv.get().lower() not in p[1].lower():
-                    continue
-                iid = p[0]
-                tree.insert("", "end", iid=iid, values=(
-                    p[0], p[1], p[2], f"{p[3]:,.2f}", p[4], p[5], 0
-                ))
-        load_prods(); sv.trace_add("write", lambda *a: load_prods())
+        def load_prods(generacion=None):
+            generacion = buscador.generacion if generacion is None else generacion
+            cancelado = lambda: not buscador.vigente(generacion)
+
+            def aplicar(productos):
+                if productos is None or cancelado() or not tree.winfo_exists():
+                    return
+                tree.delete(*tree.get_children())
+                for p in productos:
+                    iid = p[0]
+                    tree.insert("", "end", iid=iid, values=(
+                        p[0], p[1], p[2], f"{p[3]:,.2f}", p[4], p[5], carrito.cantidad(iid)
+                    ))
+
+            self.db.enviar(catalogo.filtrar, sv.get(), cancelado=cancelado, al_terminar=aplicar)
+        buscador = BuscadorDiferido(win, load_prods)
+        win.bind("<Destroy>", lambda e: buscador.cancelar() if e.widget is win else None)
+        load_prods(); sv.trace_add("write", buscador.programar)
+
+        def mostrar_linea(codigo):
+            if tree.exists(codigo):
+                tree.set(codigo, "Cantidad a Vender", carrito.cantidad(codigo))
+            total_var.set(f"{carrito.total_bs:,.2f}")
+            usd_var.set(f"{carrito.total_usd:,.2f}")
+
+        def escanear(codigo, reintentar=True):
+            producto = catalogo.producto(codigo)
+            if producto is None:
+                if reintentar:
+                    # El catálogo puede no estar cargado o ser anterior al producto
+                    self.db.enviar(catalogo.actualizar,
+                                   al_terminar=lambda _: win.winfo_exists() and escanear(codigo, False))
+                else:
+                    win.bell(); scan_msg.set(f"Código {codigo} no encontrado")
+                return
+            try:
+                linea = carrito.agregar(producto)
+            except VentaError as e:
+                win.bell(); scan_msg.set(str(e))
+                return
+            mostrar_linea(codigo)
+            scan_msg.set(f"{linea.nombre}: {linea.cantidad}")
+            if tree.exists(codigo):
+                tree.see(codigo); tree.selection_set(codigo)
+
+        def on_scan(*_):
+            codigo = scan_var.get().strip()
+            if len(codigo) == 8:
+                scan_var.set("")
+                escanear(codigo)
+
+        def on_scan_enter(e):
+            if scan_var.get().strip():
+                # Lo que no tiene 8 caracteres no es un código
+                win.bell(); scan_msg.set(f"Código inválido: {scan_var.get().strip()}")
+                scan_var.set("")
+            return "break"
+
+        scan_var.trace_add("write", on_scan)
+        scan_entry.bind("<Return>", on_scan_enter)
+        scan_entry.focus_set()
 
         def on_double(e):
             region = tree.identify("region", e.x, e.y)
@@ -769,69 +1256,74 @@ class BodegaApp:
                 sb.set(tree.set(iid,"Cantidad a Vender"))
                 spins[iid]=sb
                 def finish(evt=None):
-                    tree.set(iid,"Cantidad a Vender", sb.get())
-                    sb.destroy(); del spins[iid]; calc_total()
+                    try:
+                        c = max(0, min(int(sb.get()), mx))
+                    except ValueError:
+                        c = carrito.cantidad(iid)
+                    sb.destroy(); del spins[iid]
+                    producto = catalogo.producto(iid)
+                    if producto is not None:
+                        carrito.fijar(producto, min(c, producto[4]))
+                    mostrar_linea(iid)
                 sb.bind("<FocusOut>", finish); sb.bind("<Return>", finish); sb.focus()
         tree.bind("<Double-1>", on_double)
 
         # Total dinámico
         total_var = tk.StringVar(master=win, value="0.00")
-        def calc_total():
-            tot=0.0
-            for iid in tree.get_children():
-                pr=float(tree.set(iid,"Precio Bs.").replace(",",""))
-                c = int(tree.set(iid,"Cantidad a Vender"))
-                tot += pr*c
-            total_var.set(f"{tot:,.2f}")
-
-        ttk.Button(win, text="Recalcular Total", command=calc_total)\
-            .grid(row=2, column=0, sticky="e", padx=10)
+        usd_var = tk.StringVar(master=win, value="0.00")
         ttk.Label(win, text="Total Bs.:", style="bold.TLabel")\
             .grid(row=2, column=0, sticky="w", padx=10)
         ttk.Label(win, textvariable=total_var, style="header.TLabel")\
             .grid(row=2, column=0, sticky="w", padx=100)
+        ttk.Label(win, text="Total USD:", style="bold.TLabel")\
+            .grid(row=2, column=0, sticky="e", padx=(0, 120))
+        ttk.Label(win, textvariable=usd_var, style="header.TLabel")\
+            .grid(row=2, column=0, sticky="e", padx=10)
 
         # Botones de acción
         btn_frame = ttk.Frame(win); btn_frame.grid(row=4, column=0, pady=15)
         def procesar_lote():
-            ventas=[]
-            for iid in tree.get_children():
-                c=int(tree.set(iid,"Cantidad a Vender"))
-                if c<=0: continue
-                p=obtener_producto_por_codigo(iid)
-                if p is None:
-                    messagebox.showerror("Error", f"Producto con código {iid} no encontrado")
-                    return
-                if c>p[4]:
-                    return messagebox.showerror("Error",f"Stock insuficiente de {p[1]}")
-                ventas.append((iid,p[1],p[3]*c,c))
-            if not ventas:
+            if not carrito:
                 return messagebox.showwarning("Atención","No hay productos seleccionados")
             if not messagebox.askyesno("Confirmar",f"Registrar venta lote por {total_var.get()} Bs.?"):
                 return
-            for cod,nom,total,c in ventas:
-                registrar_movimiento(f"{c}x {nom}",total,{"producto_id":cod,"cantidad":c})
-                p = obtener_producto_por_codigo(cod)
-                if p is not None:
-                    actualizar_producto(cod, p[1], p[2], p[3], p[4]-c, p[5])
-                else:
-                    messagebox.showerror("Error", f"Producto con código {cod} no encontrado")
-            win.destroy(); self.refresh_tables()
+            btn_lote.config(state="disabled")
 
-        ttk.Button(btn_frame, text="Vender Lote", style="Accent.TButton", command=procesar_lote)\
-            .pack(side="left", padx=5)
+            def listo(_):
+                win.destroy(); self.refresh_tables()
+
+            def fallo(error):
+                btn_lote.config(state="normal")
+                messagebox.showerror("Error", str(error))
+
+            self.db.enviar(carrito.vender, al_terminar=listo, al_fallar=fallo)
+
+        btn_lote = ttk.Button(btn_frame, text="Vender Lote", style="Accent.TButton", command=procesar_lote)
+        btn_lote.pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Cancelar", command=win.destroy)\
             .pack(side="left", padx=5)
 
     def verificar_o_modificar_tasa(self):
         """Modal para ver/actualizar tasa de cambio."""
+        self.db.enviar(servicio_tasa.actual, al_terminar=self._modificar_tasa,
+                       al_fallar=self._error_datos)
+
+    def _modificar_tasa(self, t):
         try:
-            t = obtener_tasa_dolar()
             if messagebox.askyesno("Tasa", f"Tasa actual: {t:.2f}\n¿Modificar?"):
                 nt = simpledialog.askfloat("Nueva tasa","Valor:", initialvalue=t)
                 if nt and nt > 0:
-                    actualizar_tasa_dolar(nt)
-                    messagebox.showinfo("Listo", f"Tasa actualizada a {nt:.2f}")
+                    def listo(ok):
+                        if not ok:
+                            return messagebox.showerror("Error", "No se pudo actualizar la tasa")
+                        self._load_tasa()
+                        if messagebox.askyesno(
+                            "Listo", f"Tasa actualizada a {nt:.2f}\n¿Ajustar precios a la nueva tasa?"
+                        ):
+                            self.ajustar_precios(modo="dolar", tasa_anterior=t)
+
+                    self.db.enviar(servicio_tasa.actualizar, nt,
+                                   al_terminar=listo, al_fallar=self._error_datos)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -0,0 +1,397 @@
+# src/migraciones.py
+"""
+Migraciones versionadas del esquema de inventario.db.
+
+La versión aplicada se guarda en ``PRAGMA user_version``. Cada migración es
+una tupla (version, descripcion, pasos) donde cada paso es una sentencia SQL
+o una función que recibe la conexión. Las migraciones pendientes se aplican
+en orden, cada una en su propia transacción, sobre la base existente.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_TRIGGERS_BUSQUEDA = (
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, codigo, nombre, descripcion)
+        VALUES (new.rowid, new.codigo, new.nombre, new.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, descripcion)
+        VALUES ('delete', old.rowid, old.codigo, old.nombre, old.descripcion);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_au
+    AFTER UPDATE OF codigo, nombre, descripcion ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, descripcion)
+        VALUES ('delete', old.rowid, old.codigo, old.nombre, old.descripcion);
+        INSERT INTO productos_fts(rowid, codigo, nombre, descripcion)
+        VALUES (new.rowid, new.codigo, new.nombre, new.descripcion);
+    END""",
+)
+
+def _crear_indice_busqueda(conn):
+    """
+    Índice FTS5 (tokenizador trigram) sobre codigo/nombre/descripcion de
+    productos, sincronizado por triggers. Si la versión de SQLite no incluye
+    FTS5 o trigram se omite y la búsqueda usa LIKE.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                codigo, nombre, descripcion,
+                content='productos', content_rowid='rowid', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("Índice de búsqueda FTS5 no disponible: %s", e)
+        return
+    for trigger in _TRIGGERS_BUSQUEDA:
+        conn.execute(trigger)
+    conn.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+
+# El índice guarda su propia copia del código: no depende del rowid implícito
+# de productos, que VACUUM puede renumerar. Las filas de un producto se
+# localizan con una búsqueda por la columna codigo; el tokenizador trigram no
+# encuentra textos de menos de 3 caracteres, así que esos códigos se buscan
+# recorriendo el índice.
+_BORRAR_DEL_INDICE = """
+    DELETE FROM productos_fts
+    WHERE length(old.codigo) >= 3
+      AND productos_fts MATCH ('codigo : "' || replace(old.codigo, '"', '""') || '"')
+      AND codigo = old.codigo;
+    DELETE FROM productos_fts
+    WHERE length(old.codigo) < 3 AND codigo = old.codigo;
+"""
+
+_TRIGGERS_BUSQUEDA_CODIGO = (
+    """CREATE TRIGGER productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(codigo, nombre, descripcion)
+        VALUES (new.codigo, new.nombre, new.descripcion);
+    END""",
+    f"""CREATE TRIGGER productos_fts_ad AFTER DELETE ON productos BEGIN
+        {_BORRAR_DEL_INDICE}
+    END""",
+    f"""CREATE TRIGGER productos_fts_au
+    AFTER UPDATE OF codigo, nombre, descripcion ON productos BEGIN
+        {_BORRAR_DEL_INDICE}
+        INSERT INTO productos_fts(codigo, nombre, descripcion)
+        VALUES (new.codigo, new.nombre, new.descripcion);
+    END""",
+)
+
+def crear_indice_busqueda(conn):
+    """
+    Crea el índice FTS5 (trigram) de productos con sus triggers, reemplazando
+    el anterior si existe.
+
+    Returns:
+        bool: False si esta versión de SQLite no incluye FTS5 o trigram; la
+            búsqueda usa entonces LIKE
+    """
+    conn.execute("SAVEPOINT indice_busqueda")
+    try:
+        for trigger in ("productos_fts_ai", "productos_fts_ad", "productos_fts_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS productos_fts")
+        conn.execute("""
+            CREATE VIRTUAL TABLE productos_fts USING fts5(
+                codigo, nombre, descripcion, tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        conn.execute("ROLLBACK TO indice_busqueda")
+        conn.execute("RELEASE indice_busqueda")
+        logger.warning("Índice de búsqueda FTS5 no disponible, se usará LIKE: %s", e)
+        return False
+    for trigger in _TRIGGERS_BUSQUEDA_CODIGO:
+        conn.execute(trigger)
+    conn.execute("""
+        INSERT INTO productos_fts(codigo, nombre, descripcion)
+        SELECT codigo, nombre, descripcion FROM productos
+    """)
+    conn.execute("RELEASE indice_busqueda")
+    return True
+
+def asegurar_indice_busqueda(conn):
+    """
+    Crea el índice de búsqueda si falta (p. ej. la base se migró con un
+    SQLite sin FTS5 y ahora está disponible).
+
+    Args:
+        conn (sqlite3.Connection): Conexión sin transacción abierta
+    """
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+    ).fetchone():
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        creado = crear_indice_busqueda(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    if creado:
+        logger.info("Índice de búsqueda de productos creado")
+
+def _sumar_venta(signo, fila, clave=None):
+    """
+    Sentencias que suman (signo '+') o restan ('-') una venta a los acumulados.
+    ``clave`` es la expresión del producto (por defecto ``fila.producto``).
+    """
+    clave = clave or f"{fila}.producto"
+    return f"""
+        INSERT INTO ventas_diarias (dia, total, unidades)
+        VALUES (date({fila}.fecha), {signo}{fila}.precio * {fila}.cantidad, {signo}{fila}.cantidad)
+        ON CONFLICT(dia) DO UPDATE SET
+            total = total + excluded.total, unidades = unidades + excluded.unidades;
+        INSERT INTO ventas_por_producto (producto, total, unidades)
+        VALUES ({clave}, {signo}{fila}.precio * {fila}.cantidad, {signo}{fila}.cantidad)
+        ON CONFLICT(producto) DO UPDATE SET
+            total = total + excluded.total, unidades = unidades + excluded.unidades;
+    """
+
+_ACUMULADOS_VENTAS = (
+    """CREATE TABLE IF NOT EXISTS ventas_diarias (
+        dia TEXT PRIMARY KEY,
+        total REAL NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS ventas_por_producto (
+        producto TEXT PRIMARY KEY,
+        total REAL NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS ventas_acumulados_ai AFTER INSERT ON ventas BEGIN
+        {_sumar_venta('+', 'new')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ventas_acumulados_ad AFTER DELETE ON ventas BEGIN
+        {_sumar_venta('-', 'old')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ventas_acumulados_au AFTER UPDATE ON ventas BEGIN
+        {_sumar_venta('-', 'old')}
+        {_sumar_venta('+', 'new')}
+    END""",
+    """INSERT OR REPLACE INTO ventas_diarias (dia, total, unidades)
+        SELECT date(fecha), SUM(precio * cantidad), SUM(cantidad) FROM ventas GROUP BY date(fecha)""",
+    """INSERT OR REPLACE INTO ventas_por_producto (producto, total, unidades)
+        SELECT producto, SUM(precio * cantidad), SUM(cantidad) FROM ventas GROUP BY producto""",
+)
+
+# Los acumulados por producto usan ventas.codigo, que se conserva cuando el
+# producto se elimina y la clave foránea ``producto`` pasa a NULL
+_TRIGGERS_VENTAS = (
+    f"""CREATE TRIGGER ventas_acumulados_ai AFTER INSERT ON ventas BEGIN
+        {_sumar_venta('+', 'new', 'new.codigo')}
+    END""",
+    f"""CREATE TRIGGER ventas_acumulados_ad AFTER DELETE ON ventas BEGIN
+        {_sumar_venta('-', 'old', 'old.codigo')}
+    END""",
+    f"""CREATE TRIGGER ventas_acumulados_au AFTER UPDATE ON ventas BEGIN
+        {_sumar_venta('-', 'old', 'old.codigo')}
+        {_sumar_venta('+', 'new', 'new.codigo')}
+    END""",
+)
+
+def _items_json(detalles_json):
+    """Pares (codigo, cantidad) y cliente guardados en detalles_extra"""
+    try:
+        det = json.loads(detalles_json) if detalles_json else None
+    except (TypeError, ValueError):
+        det = None
+    if not isinstance(det, dict):
+        return [], None
+    if det.get("producto_id"):
+        items = [det]
+    else:
+        items = det.get("productos") or []
+    return [
+        (item["producto_id"], int(item.get("cantidad") or 0))
+        for item in items if item.get("producto_id") and item.get("cantidad")
+    ], det.get("cliente")
+
+def _segundos(fecha):
+    try:
+        return datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def _normalizar_ventas(conn):
+    """
+    Convierte ventas en las líneas de cada movimiento (cabecera) con claves
+    foráneas a movimientos y productos, y pasa a ellas los productos y el
+    cliente guardados como JSON en movimientos.detalles_extra.
+
+    Las filas de ventas ya registradas junto con su movimiento (mismo
+    producto y cantidad, a lo sumo 2 s de diferencia) se enlazan a él; para
+    el resto de los movimientos las líneas se reconstruyen desde el JSON.
+    """
+    conn.execute("ALTER TABLE movimientos ADD COLUMN cliente TEXT")
+    conn.execute("""
+        CREATE TABLE ventas_lineas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movimiento_id INTEGER REFERENCES movimientos(id) ON DELETE CASCADE,
+            producto TEXT REFERENCES productos(codigo)
+                ON UPDATE CASCADE ON DELETE SET NULL,
+            codigo TEXT NOT NULL,
+            cantidad INTEGER NOT NULL CHECK(cantidad > 0),
+            precio REAL NOT NULL CHECK(precio > 0),
+            fecha TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    productos = dict(conn.execute("SELECT codigo, precio FROM productos").fetchall())
+
+    # Ventas existentes sin movimiento, agrupadas por (producto, cantidad)
+    sueltas = {}
+    for id_, producto, cantidad, precio, fecha in conn.execute(
+        "SELECT id, producto, cantidad, precio, fecha FROM ventas ORDER BY id"
+    ):
+        sueltas.setdefault((producto, cantidad), []).append([id_, precio, fecha, None])
+
+    nuevas = []
+    clientes = []
+    movimientos = conn.execute(
+        "SELECT id, fecha, total_bs, detalles_extra FROM movimientos WHERE detalles_extra IS NOT NULL"
+    ).fetchall()
+    for mov_id, fecha, total_bs, detalles_json in movimientos:
+        items, cliente = _items_json(detalles_json)
+        if not items:
+            continue
+        clientes.append((cliente, mov_id))
+        momento = _segundos(fecha)
+        enlazadas = []
+        for codigo, cantidad in items:
+            candidata = next((
+                v for v in sueltas.get((codigo, cantidad), ())
+                if v[3] is None and momento is not None
+                and _segundos(v[2]) is not None and abs(_segundos(v[2]) - momento) <= 2
+            ), None)
+            if candidata is None:
+                break
+            enlazadas.append(candidata)
+        if len(enlazadas) == len(items):
+            for venta in enlazadas:
+                venta[3] = mov_id
+            continue
+        # Sin filas en ventas: precio actual del producto, salvo en ventas
+        # de un solo producto o de productos ya eliminados, que se reparten
+        # lo que falta del total del movimiento
+        if len(items) == 1:
+            conocidos = {}
+        else:
+            conocidos = {codigo: productos[codigo] for codigo, _ in items if codigo in productos}
+        resto = total_bs - sum(conocidos[c] * n for c, n in items if c in conocidos)
+        sin_precio = sum(n for c, n in items if c not in conocidos)
+        for codigo, cantidad in items:
+            precio = conocidos.get(codigo) or max(resto, 0.01 * sin_precio) / sin_precio
+            nuevas.append((mov_id, codigo if codigo in productos else None,
+                           codigo, cantidad, precio, fecha))
+
+    for (producto, cantidad), ventas in sueltas.items():
+        existe = producto in productos
+        for id_, precio, fecha, mov_id in ventas:
+            nuevas.append((mov_id, producto if existe else None, producto, cantidad, precio, fecha))
+
+    nuevas.sort(key=lambda fila: (fila[5] or "", fila[0] or 0))
+    conn.executemany("""
+        INSERT INTO ventas_lineas (movimiento_id, producto, codigo, cantidad, precio, fecha)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, nuevas)
+    conn.executemany("UPDATE movimientos SET cliente = ? WHERE id = ?", clientes)
+    conn.execute("""
+        UPDATE movimientos SET detalles_extra = NULL
+        WHERE id IN (SELECT movimiento_id FROM ventas_lineas)
+    """)
+
+    conn.execute("DROP TABLE ventas")
+    conn.execute("ALTER TABLE ventas_lineas RENAME TO ventas")
+    for paso in (
+        "CREATE INDEX idx_ventas_fecha ON ventas(fecha)",
+        "CREATE INDEX idx_ventas_producto ON ventas(producto)",
+        "CREATE INDEX idx_ventas_codigo ON ventas(codigo)",
+        "CREATE INDEX idx_ventas_movimiento ON ventas(movimiento_id)",
+        *_TRIGGERS_VENTAS,
+        "DELETE FROM ventas_diarias",
+        "DELETE FROM ventas_por_producto",
+        """INSERT INTO ventas_diarias (dia, total, unidades)
+            SELECT date(fecha), SUM(precio * cantidad), SUM(cantidad) FROM ventas GROUP BY date(fecha)""",
+        """INSERT INTO ventas_por_producto (producto, total, unidades)
+            SELECT codigo, SUM(precio * cantidad), SUM(cantidad) FROM ventas GROUP BY codigo""",
+    ):
+        conn.execute(paso)
+
+MIGRACIONES = [
+    (1, "Índices para fechas, productos de ventas y búsqueda por nombre", (
+        "CREATE INDEX IF NOT EXISTS idx_movimientos_fecha ON movimientos(fecha)",
+        "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha)",
+        "CREATE INDEX IF NOT EXISTS idx_ventas_producto ON ventas(producto)",
+        "CREATE INDEX IF NOT EXISTS idx_tasa_dolar_fecha ON tasa_dolar(fecha)",
+        "CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre COLLATE NOCASE)",
+    )),
+    (2, "Índice de texto completo para la búsqueda de productos", (
+        _crear_indice_busqueda,
+    )),
+    (3, "Acumulados de ventas por día y por producto mantenidos por triggers",
+        _ACUMULADOS_VENTAS),
+    (4, "Ventas como líneas de cada movimiento con claves foráneas", (
+        _normalizar_ventas,
+    )),
+    (5, "Índice parcial de stock bajo y ventas por producto y fecha", (
+        "CREATE INDEX IF NOT EXISTS idx_productos_bajo_stock ON productos(codigo) "
+        "WHERE stock <= stock_minimo",
+        "DROP INDEX IF EXISTS idx_ventas_codigo",
+        "CREATE INDEX IF NOT EXISTS idx_ventas_codigo_fecha ON ventas(codigo, fecha)",
+    )),
+    (6, "Índice de búsqueda con su propio código en lugar del rowid de productos", (
+        crear_indice_busqueda,
+    )),
+    (7, "Índice de búsqueda sin filas viejas de productos con códigos cortos", (
+        crear_indice_busqueda,
+    )),
+    (8, "Totales por año de los movimientos archivados", (
+        """CREATE TABLE IF NOT EXISTS movimientos_archivados (
+            anio INTEGER PRIMARY KEY,
+            movimientos INTEGER NOT NULL DEFAULT 0,
+            total_bs REAL NOT NULL DEFAULT 0
+        )""",
+    )),
+]
+
+def version_actual(conn):
+    """Devuelve la versión de esquema aplicada a la base"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migraciones(conn, migraciones=None):
+    """
+    Aplica las migraciones pendientes.
+
+    Args:
+        conn (sqlite3.Connection): Conexión sin transacción abierta
+        migraciones (list, optional): Lista a aplicar (por defecto MIGRACIONES)
+
+    Returns:
+        int: Versión final del esquema
+    """
+    version = version_actual(conn)
+    for numero, descripcion, pasos in sorted(migraciones or MIGRACIONES):
+        if numero <= version:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for paso in pasos:
+                if callable(paso):
+                    paso(conn)
+                else:
+                    conn.execute(paso)
+            conn.execute(f"PRAGMA user_version = {int(numero)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise RuntimeError(f"Error en migración {numero} ({descripcion}): {e}")
+        logger.info("Migración aplicada: %s - %s", numero, descripcion)
+        version = numero
+    return version
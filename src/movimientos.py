@@ -4,14 +4,9 @@ import json
 import logging
 import sqlite3
 from database import conectar_db
+from catalogo import cache_productos
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='data/app.log',
-    encoding='utf-8'
-)
+logger = logging.getLogger(__name__)
 
 def registrar_movimiento(detalle, total_bs, detalles_extra=None):
     """
@@ -34,7 +29,7 @@ def registrar_movimiento(detalle, total_bs, detalles_extra=None):
         bool: True si se registró correctamente.
     """
     if not detalle or total_bs <= 0:
-        logging.warning("Datos inválidos al registrar movimiento.")
+        logger.warning("Datos inválidos al registrar movimiento.")
         return False
 
     try:
@@ -45,75 +40,138 @@ def registrar_movimiento(detalle, total_bs, detalles_extra=None):
                 (detalle, total_bs, detalles_json)
             )
             conn.commit()
-        logging.info(f"Movimiento registrado: {detalle} - {total_bs:.2f} Bs.")
+        logger.info("Movimiento registrado: %s - %.2f Bs.", detalle, total_bs)
         return True
 
     except (sqlite3.Error, json.JSONDecodeError) as e:
-        logging.error(f"Error al registrar movimiento: {e}")
+        logger.error("Error al registrar movimiento: %s", e)
         return False
     except Exception as e:
-        logging.error(f"Error inesperado: {e}")
+        logger.error("Error inesperado: %s", e)
         return False
 
 def obtener_movimientos(limite=None):
     """
-    Obtiene los movimientos ordenados por fecha DESC.
+    Obtiene los movimientos ordenados por fecha DESC (y por id a igual fecha),
+    con las unidades vendidas en sus líneas de venta.
     """
     try:
         with conectar_db() as conn:
-            query = "SELECT fecha, detalle, total_bs, detalles_extra FROM movimientos ORDER BY fecha DESC"
+            query = """
+                SELECT id, fecha, detalle, total_bs, cliente, detalles_extra,
+                       (SELECT SUM(cantidad) FROM ventas v WHERE v.movimiento_id = m.id) AS cantidad
+                FROM movimientos m ORDER BY fecha DESC, id DESC
+            """
             if limite:
                 query += f" LIMIT {int(limite)}"
             cursor = conn.execute(query)
             return cursor.fetchall()
     except sqlite3.Error as e:
-        logging.error(f"Error al obtener movimientos: {e}")
+        logger.error("Error al obtener movimientos: %s", e)
         return []
 
-def eliminar_movimiento(fecha):
+def obtener_movimientos_pagina(despues_de=None, limite=100):
     """
-    Elimina un movimiento por su fecha y revierte el stock según detalles_extra.
-    
+    Obtiene una página de movimientos con paginación por cursor (keyset).
+
+    Args:
+        despues_de (tuple, optional): (fecha, id) de la última fila de la
+            página anterior; None para la primera página.
+        limite (int): Máximo de filas a devolver.
+    Returns:
+        list: Filas ordenadas por fecha DESC, id DESC.
+    """
+    try:
+        with conectar_db() as conn:
+            if despues_de is None:
+                return conn.execute("""
+                    SELECT id, fecha, detalle, total_bs, cliente, detalles_extra,
+                           (SELECT SUM(cantidad) FROM ventas v WHERE v.movimiento_id = m.id) AS cantidad
+                    FROM movimientos m ORDER BY fecha DESC, id DESC LIMIT ?
+                """, (int(limite),)).fetchall()
+            return conn.execute("""
+                SELECT id, fecha, detalle, total_bs, cliente, detalles_extra,
+                       (SELECT SUM(cantidad) FROM ventas v WHERE v.movimiento_id = m.id) AS cantidad
+                FROM movimientos m WHERE (fecha, id) < (?, ?)
+                ORDER BY fecha DESC, id DESC LIMIT ?
+            """, (*despues_de, int(limite))).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error al obtener página de movimientos: %s", e)
+        return []
+
+def obtener_total_movimientos():
+    """
+    Suma total_bs de todos los movimientos sin materializar las filas,
+    incluidos los de años archivados (ver archivado).
+    """
+    try:
+        with conectar_db() as conn:
+            return conn.execute("""
+                SELECT (SELECT COALESCE(SUM(total_bs), 0) FROM movimientos)
+                     + (SELECT COALESCE(SUM(total_bs), 0) FROM movimientos_archivados)
+            """).fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error("Error al totalizar movimientos: %s", e)
+        return 0.0
+
+def obtener_lineas_venta(movimiento_id):
+    """
+    Líneas de venta de un movimiento.
+
+    Returns:
+        list: Filas (producto, nombre, cantidad, precio)
+    """
+    try:
+        with conectar_db() as conn:
+            return conn.execute("""
+                SELECT v.codigo AS producto, COALESCE(p.nombre, v.codigo) AS nombre,
+                       v.cantidad, v.precio
+                FROM ventas v LEFT JOIN productos p ON p.codigo = v.producto
+                WHERE v.movimiento_id = ? ORDER BY v.id
+            """, (movimiento_id,)).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error al obtener líneas del movimiento %s: %s", movimiento_id, e)
+        return []
+
+def eliminar_movimiento(movimiento_id):
+    """
+    Elimina un movimiento por su id y revierte el stock de sus líneas de venta.
+
+    Las líneas se borran en cascada junto con el movimiento (y con ellas se
+    descuentan de los acumulados de reportes).
+
     Args:
-        fecha (str): Fecha ISO del movimiento.
+        movimiento_id (int): Clave primaria del movimiento.
     Returns:
         bool: True si se eliminó correctamente.
     """
     try:
         with conectar_db() as conn:
-            # Leer detalles_extra
-            cur = conn.execute("SELECT detalles_extra FROM movimientos WHERE fecha = ?", (fecha,))
-            fila = cur.fetchone()
-            if not fila:
-                logging.warning(f"No encontrado movimiento {fecha}")
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM movimientos WHERE id = ?", (movimiento_id,)).fetchone() is None:
+                logger.warning("No encontrado movimiento %s", movimiento_id)
                 return False
 
-            detalles_json = fila[0]
-            if detalles_json:
-                det = json.loads(detalles_json)
-                # Venta individual
-                if det.get("producto_id"):
-                    conn.execute(
-                        "UPDATE productos SET stock = stock + ? WHERE codigo = ?",
-                        (det.get("cantidad", 0), det["producto_id"])
-                    )
-                # Venta por lote
-                elif det.get("productos"):
-                    for item in det["productos"]:
-                        conn.execute(
-                            "UPDATE productos SET stock = stock + ? WHERE codigo = ?",
-                            (item.get("cantidad", 0), item["producto_id"])
-                        )
-
-            # Eliminar el movimiento
-            conn.execute("DELETE FROM movimientos WHERE fecha = ?", (fecha,))
-            conn.commit()
-        logging.info(f"Movimiento eliminado y stock revertido: {fecha}")
+            revertidos = [fila[0] for fila in conn.execute(
+                "SELECT DISTINCT producto FROM ventas WHERE movimiento_id = ? AND producto IS NOT NULL",
+                (movimiento_id,)
+            )]
+            conn.execute("""
+                UPDATE productos SET stock = stock + (
+                    SELECT SUM(cantidad) FROM ventas
+                    WHERE movimiento_id = ? AND producto = productos.codigo
+                )
+                WHERE codigo IN (SELECT producto FROM ventas WHERE movimiento_id = ?)
+            """, (movimiento_id, movimiento_id))
+            conn.execute("DELETE FROM movimientos WHERE id = ?", (movimiento_id,))
+        cache_productos.invalidar(*revertidos)
+        logger.info("Movimiento eliminado y stock revertido: %s", movimiento_id)
         return True
 
-    except (sqlite3.Error, json.JSONDecodeError) as e:
-        logging.error(f"Error al eliminar movimiento: {e}")
+    except sqlite3.Error as e:
+        logger.error("Error al eliminar movimiento: %s", e)
         return False
     except Exception as e:
-        logging.error(f"Error inesperado al eliminar movimiento: {e}")
-        return False
\ No newline at end of file
+        logger.error("Error inesperado al eliminar movimiento: %s", e)
+        return False
@@ -0,0 +1,260 @@
+# src/perfilado.py
+"""
+Perfilado de consultas SQLite.
+
+Las conexiones del pool se crean con ConexionPerfilada. Mientras el
+perfilador está inactivo ``execute`` delega directamente en sqlite3; al
+activarlo cada sentencia se ejecuta en un CursorPerfilado que mide el tiempo
+de ejecución y de lectura de filas, cuenta las filas leídas o modificadas y
+registra desde qué función de la aplicación se lanzó. Las sentencias lentas
+guardan su EXPLAIN QUERY PLAN. Además, mientras está activo, el texto de
+cada sentencia que ejecuta SQLite (también las de triggers) se cuenta con
+``set_trace_callback``.
+"""
+
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los intervalos del histograma de latencia
+LIMITES_HISTOGRAMA = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_ESPACIOS = re.compile(r"\s+")
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ARCHIVOS_INTERNOS = (os.path.basename(__file__), "database.py")
+
+
+def _normalizar(sql):
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+def _origen():
+    """Primera función fuera de la capa de conexión que lanzó la consulta"""
+    marco = sys._getframe(2)
+    while marco is not None:
+        archivo = os.path.basename(marco.f_code.co_filename)
+        if archivo not in _ARCHIVOS_INTERNOS and archivo != "contextlib.py":
+            return f"{archivo[:-3]}.{marco.f_code.co_name}"
+        marco = marco.f_back
+    return "?"
+
+
+class EstadisticaConsulta:
+    """Acumulados de una sentencia SQL"""
+
+    __slots__ = ("sql", "llamadas", "total_ms", "max_ms", "filas",
+                 "histograma", "origenes", "plan")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.llamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.filas = 0
+        self.histograma = [0] * (len(LIMITES_HISTOGRAMA) + 1)
+        self.origenes = Counter()
+        self.plan = None
+
+    @property
+    def media_ms(self):
+        return self.total_ms / self.llamadas if self.llamadas else 0.0
+
+
+class PerfiladorConsultas:
+    """
+    Registro de latencias por sentencia.
+
+    Args:
+        umbral_lento_ms (float): Ejecuciones con esta duración o más guardan
+            el plan de la consulta y se registran en el log
+    """
+
+    def __init__(self, umbral_lento_ms=50.0):
+        self.umbral_lento_ms = umbral_lento_ms
+        self.activo = False
+        # Reentrante: el recolector puede finalizar un CursorPerfilado (y
+        # registrar su muestra) mientras este mismo hilo tiene el lock
+        self._lock = threading.RLock()
+        self._consultas = {}
+        self._trazas = Counter()
+
+    def activar(self, activo=True):
+        self.activo = activo
+        logger.info("Perfilado de consultas %s", 'activado' if activo else 'desactivado')
+
+    def reiniciar(self):
+        with self._lock:
+            self._consultas.clear()
+            self._trazas.clear()
+
+    def _estadistica(self, sql):
+        clave = _normalizar(sql)
+        with self._lock:
+            est = self._consultas.get(clave)
+            if est is None:
+                est = self._consultas[clave] = EstadisticaConsulta(clave)
+            return est
+
+    def registrar(self, est, duracion_ms, filas, origen):
+        """Suma una ejecución completa (ejecución y lectura de filas)"""
+        with self._lock:
+            est.llamadas += 1
+            est.total_ms += duracion_ms
+            est.max_ms = max(est.max_ms, duracion_ms)
+            est.filas += filas
+            est.histograma[bisect.bisect_left(LIMITES_HISTOGRAMA, duracion_ms)] += 1
+            est.origenes[origen] += 1
+
+    def trazar(self, sql):
+        """Callback de ``set_trace_callback``: cuenta cada sentencia ejecutada"""
+        if self.activo:
+            # El texto llega con los parámetros ya sustituidos
+            sql = _LITERALES.sub("?", _normalizar(sql))
+            with self._lock:
+                self._trazas[sql] += 1
+
+    def consultas(self):
+        """Estadísticas de todas las sentencias, de mayor a menor tiempo total"""
+        with self._lock:
+            return sorted(self._consultas.values(), key=lambda e: e.total_ms, reverse=True)
+
+    def trazas(self):
+        """Sentencias vistas por el trace callback con su cantidad de ejecuciones"""
+        with self._lock:
+            return self._trazas.most_common()
+
+    def _explicar(self, conn, est, sql, parametros, duracion_ms):
+        if est.plan is not None or duracion_ms < self.umbral_lento_ms or parametros is None:
+            return
+        if sql.lstrip()[:6].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+            return
+        try:
+            filas = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parametros)
+            est.plan = "\n".join(fila[3] for fila in filas)
+        except sqlite3.Error as e:
+            est.plan = f"(sin plan: {e})"
+        logger.warning("Consulta lenta (%.1f ms): %s\n%s", duracion_ms, est.sql, est.plan)
+
+
+perfilador = PerfiladorConsultas()
+# BODEGA_PERFILAR=1 activa el perfilado desde el arranque
+perfilador.activo = os.environ.get("BODEGA_PERFILAR") == "1"
+
+
+class CursorPerfilado(sqlite3.Cursor):
+    """Cursor que mide ejecución y lectura de filas para el perfilador"""
+
+    _est = None
+
+    def _cerrar_muestra(self):
+        est, self._est = self._est, None
+        if est is not None:
+            filas = self._filas if self._filas else max(self.rowcount, 0)
+            perfilador.registrar(est, self._ms, filas, self._origen)
+
+    def _medir(self, metodo, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(self, *args)
+        self._ms += (time.perf_counter() - inicio) * 1000
+        return resultado
+
+    def _iniciar(self, metodo, sql, parametros):
+        self._cerrar_muestra()
+        self._ms, self._filas, self._origen = 0.0, 0, _origen()
+        resultado = self._medir(metodo, sql, parametros)
+        self._est = perfilador._estadistica(sql)
+        perfilador._explicar(self.connection, self._est, sql,
+                             parametros if metodo is sqlite3.Cursor.execute else None, self._ms)
+        if self.description is None:
+            self._cerrar_muestra()
+        return resultado
+
+    def execute(self, sql, parametros=()):
+        return self._iniciar(sqlite3.Cursor.execute, sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self._iniciar(sqlite3.Cursor.executemany, sql, parametros)
+
+    def fetchone(self):
+        fila = self._medir(sqlite3.Cursor.fetchone)
+        if fila is None:
+            self._cerrar_muestra()
+        else:
+            self._filas += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = self._medir(sqlite3.Cursor.fetchmany, size or self.arraysize)
+        self._filas += len(filas)
+        if not filas:
+            self._cerrar_muestra()
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(sqlite3.Cursor.fetchall)
+        self._filas += len(filas)
+        self._cerrar_muestra()
+        return filas
+
+    def __next__(self):
+        try:
+            fila = self._medir(sqlite3.Cursor.__next__)
+        except StopIteration:
+            self._cerrar_muestra()
+            raise
+        self._filas += 1
+        return fila
+
+    def close(self):
+        self._cerrar_muestra()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._cerrar_muestra()
+        except Exception:
+            pass
+
+
+class ConexionPerfilada(sqlite3.Connection):
+    """
+    Conexión cuyo ``execute`` se mide cuando el perfilador está activo.
+    Los cursores pedidos con ``cursor()`` mientras está activo también se
+    miden.
+    """
+
+    _trazando = False
+
+    def _cursor_perfilado(self):
+        if not self._trazando:
+            self.set_trace_callback(perfilador.trazar)
+            self._trazando = True
+        return super().cursor(CursorPerfilado)
+
+    def cursor(self, factory=None):
+        if factory is None:
+            if perfilador.activo:
+                return self._cursor_perfilado()
+            factory = sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        if not perfilador.activo:
+            if self._trazando:
+                self.set_trace_callback(None)
+                self._trazando = False
+            return super().execute(sql, parametros)
+        return self._cursor_perfilado().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        if not perfilador.activo:
+            return super().executemany(sql, parametros)
+        return self._cursor_perfilado().executemany(sql, parametros)
@@ -0,0 +1,156 @@
+# src/precios.py
+"""
+Ajuste masivo de precios.
+
+Los nuevos precios se calculan en SQL y se aplican con un solo UPDATE sobre
+todos los productos o sobre un subconjunto (por códigos o por nombre). Antes
+de actualizar se guardan los precios anteriores para poder deshacer el ajuste.
+
+Modos:
+    porcentaje: precio * (1 + valor / 100)
+    fijo:       precio + valor (Bs.)
+    dolar:      precio * tasa_actual / tasa_anterior, es decir, mantiene el
+                precio en dólares que tenía cada producto con la tasa anterior
+"""
+
+import json
+import logging
+import sqlite3
+from database import conectar_db
+from catalogo import cache_productos
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('porcentaje', 'fijo', 'dolar')
+
+
+def _expresion(modo, valor, tasa_anterior=None, tasa_actual=None):
+    if modo == 'porcentaje':
+        return "ROUND(precio * (1 + ? / 100.0), 2)", [float(valor)]
+    if modo == 'fijo':
+        return "ROUND(precio + ?, 2)", [float(valor)]
+    if modo == 'dolar':
+        if not tasa_anterior or not tasa_actual or tasa_anterior <= 0 or tasa_actual <= 0:
+            raise ValueError("Se requieren la tasa anterior y la actual")
+        return "ROUND(precio * ? / ?, 2)", [float(tasa_actual), float(tasa_anterior)]
+    raise ValueError(f"Modo de ajuste inválido: {modo}")
+
+
+def _filtro(codigos=None, filtro=None):
+    condiciones, params = [], []
+    if codigos:
+        condiciones.append("codigo IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(codigos)))
+    if filtro:
+        condiciones.append("nombre LIKE ?")
+        params.append(f"%{filtro.strip()}%")
+    return condiciones, params
+
+
+def _consulta_ajuste(modo, valor, tasa_anterior, tasa_actual, codigos, filtro):
+    expresion, params_expr = _expresion(modo, valor, tasa_anterior, tasa_actual)
+    condiciones, params = _filtro(codigos, filtro)
+    # Los productos cuyo precio quedaría en cero o negativo no se tocan
+    condiciones.append(f"{expresion} > 0")
+    params += params_expr
+    return expresion, params_expr, " AND ".join(condiciones), params
+
+
+def tasa_anterior():
+    """Penúltima tasa registrada (None si hay menos de dos)"""
+    try:
+        with conectar_db() as conn:
+            fila = conn.execute('''
+                SELECT monto FROM tasa_dolar
+                ORDER BY fecha DESC, id DESC LIMIT 1 OFFSET 1
+            ''').fetchone()
+        return fila['monto'] if fila else None
+    except sqlite3.Error as e:
+        logger.error("Error obteniendo tasa anterior: %s", e)
+        return None
+
+
+def previsualizar_ajuste(modo, valor, tasa_anterior=None, tasa_actual=None,
+                         codigos=None, filtro=None, limite=50):
+    """
+    Muestra el efecto de un ajuste sin aplicarlo.
+
+    Returns:
+        tuple: (total_afectados, filas) con filas (codigo, nombre, precio, nuevo)
+            limitadas a ``limite``
+    """
+    expresion, params_expr, where, params = _consulta_ajuste(
+        modo, valor, tasa_anterior, tasa_actual, codigos, filtro
+    )
+    with conectar_db() as conn:
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM productos WHERE {where}", params
+        ).fetchone()[0]
+        filas = conn.execute(f'''
+            SELECT codigo, nombre, precio, {expresion} AS nuevo
+            FROM productos WHERE {where} ORDER BY nombre LIMIT ?
+        ''', params_expr + params + [int(limite)]).fetchall()
+    return total, filas
+
+
+def aplicar_ajuste(modo, valor, tasa_anterior=None, tasa_actual=None,
+                   codigos=None, filtro=None):
+    """
+    Aplica el ajuste en una única transacción.
+
+    Returns:
+        list: Pares (codigo, precio_anterior, precio_nuevo) para deshacer_ajuste
+
+    Raises:
+        ValueError: Si el modo o las tasas no son válidos
+        RuntimeError: Si falla la base de datos
+    """
+    expresion, params_expr, where, params = _consulta_ajuste(
+        modo, valor, tasa_anterior, tasa_actual, codigos, filtro
+    )
+    try:
+        with conectar_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            anteriores = [tuple(f) for f in conn.execute(
+                f"SELECT codigo, precio, {expresion} FROM productos WHERE {where}",
+                params_expr + params
+            )]
+            conn.execute(
+                f"UPDATE productos SET precio = {expresion} WHERE {where}",
+                params_expr + params
+            )
+    except sqlite3.Error as e:
+        logger.error("Error ajustando precios (%s %s): %s", modo, valor, e)
+        raise RuntimeError(f"Error de base de datos: {e}")
+    finally:
+        cache_productos.limpiar()
+
+    logger.info("Precios ajustados (%s %s): %s productos", modo, valor, len(anteriores))
+    return anteriores
+
+
+def deshacer_ajuste(anteriores):
+    """
+    Restaura los precios guardados por aplicar_ajuste. Los productos cuyo
+    precio se modificó después del ajuste se dejan como están.
+
+    Returns:
+        int: Productos restaurados
+    """
+    try:
+        with conectar_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            antes = conn.total_changes
+            conn.executemany(
+                "UPDATE productos SET precio = ? WHERE codigo = ? AND precio = ?",
+                [(precio, codigo, nuevo) for codigo, precio, nuevo in anteriores]
+            )
+            restaurados = conn.total_changes - antes
+    except sqlite3.Error as e:
+        logger.error("Error deshaciendo ajuste de precios: %s", e)
+        raise RuntimeError(f"Error de base de datos: {e}")
+    finally:
+        cache_productos.limpiar()
+
+    logger.info("Ajuste de precios deshecho: %s de %s productos", restaurados, len(anteriores))
+    return restaurados
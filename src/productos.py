@@ -1,20 +1,16 @@
 # src/productos.py
 import logging
 from database import conectar_db
+from catalogo import cache_productos
 import sqlite3
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='data/app.log',
-    encoding='utf-8'
-)
+logger = logging.getLogger(__name__)
 
 def _validar_datos_producto(precio, stock, stock_minimo):
     """Valida los datos básicos de un producto"""
     if any(not isinstance(valor, (int, float)) or valor < 0 
            for valor in [precio, stock, stock_minimo]):
-        logging.warning("Datos numéricos inválidos")
+        logger.warning("Datos numéricos inválidos")
         return False
     return True
 
@@ -38,7 +34,7 @@ def agregar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
             return False
             
         if not codigo or len(codigo) != 8 or not nombre.strip():
-            logging.error("Código/nombre inválido")
+            logger.error("Código/nombre inválido")
             return False
 
         with conectar_db() as conn:
@@ -48,15 +44,18 @@ def agregar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
             ''', (codigo, nombre.strip(), descripcion.strip(), 
                  precio, stock, stock_minimo))
             conn.commit()
+            cache_productos.guardar(codigo, conn.execute(
+                "SELECT * FROM productos WHERE codigo = ?", (codigo,)
+            ).fetchone())
             
-        logging.info(f"Producto agregado: {nombre} ({codigo})")
+        logger.info("Producto agregado: %s (%s)", nombre, codigo)
         return True
         
     except sqlite3.IntegrityError:
-        logging.warning(f"Código duplicado: {codigo}")
+        logger.warning("Código duplicado: %s", codigo)
         return False
     except Exception as e:
-        logging.error(f"Error agregando producto {codigo}: {str(e)}")
+        logger.error("Error agregando producto %s: %s", codigo, e)
         return False
 
 def obtener_productos(filtro=None):
@@ -86,12 +85,12 @@ def obtener_productos(filtro=None):
             return conn.execute(query, params).fetchall()
             
     except Exception as e:
-        logging.error(f"Error obteniendo productos: {str(e)}")
+        logger.error("Error obteniendo productos: %s", e)
         return []
 
 def obtener_producto_por_codigo(codigo):
     """
-    Obtiene un producto por su código único
+    Obtiene un producto por su código único (desde la caché si está)
     
     Args:
         codigo (str): Código de 8 caracteres
@@ -100,13 +99,9 @@ def obtener_producto_por_codigo(codigo):
         sqlite3.Row: Objeto con los datos del producto o None
     """
     try:
-        with conectar_db() as conn:
-            return conn.execute(
-                "SELECT * FROM productos WHERE codigo = ?",
-                (codigo,)
-            ).fetchone()
+        return cache_productos.obtener(codigo)
     except Exception as e:
-        logging.error(f"Error buscando producto {codigo}: {str(e)}")
+        logger.error("Error buscando producto %s: %s", codigo, e)
         return None
 
 def actualizar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo):
@@ -143,14 +138,19 @@ def actualizar_producto(codigo, nombre, descripcion, precio, stock, stock_minimo
             conn.commit()
             
             if cursor.rowcount == 0:
-                logging.warning(f"Producto no encontrado: {codigo}")
+                cache_productos.invalidar(codigo)
+                logger.warning("Producto no encontrado: %s", codigo)
                 return False
+
+            cache_productos.guardar(codigo, conn.execute(
+                "SELECT * FROM productos WHERE codigo = ?", (codigo,)
+            ).fetchone())
                 
-        logging.info(f"Producto actualizado: {codigo}")
+        logger.info("Producto actualizado: %s", codigo)
         return True
         
     except Exception as e:
-        logging.error(f"Error actualizando producto {codigo}: {str(e)}")
+        logger.error("Error actualizando producto %s: %s", codigo, e)
         return False
 
 def eliminar_producto(codigo):
@@ -176,15 +176,16 @@ def eliminar_producto(codigo):
                 (codigo,)
             )
             conn.commit()
+            cache_productos.invalidar(codigo)
             
             if cursor.rowcount > 0:
                 nombre = producto['nombre'] if producto else 'Desconocido'
-                logging.info(f"Producto eliminado: {nombre} ({codigo})")
+                logger.info("Producto eliminado: %s (%s)", nombre, codigo)
                 return True
                 
-        logging.warning(f"Producto no encontrado: {codigo}")
+        logger.warning("Producto no encontrado: %s", codigo)
         return False
         
     except Exception as e:
-        logging.error(f"Error eliminando producto {codigo}: {str(e)}")
+        logger.error("Error eliminando producto %s: %s", codigo, e)
         return False
\ No newline at end of file
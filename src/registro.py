@@ -0,0 +1,96 @@
+# src/registro.py
+"""
+Configuración central del log de la aplicación.
+
+Los módulos sólo crean su ``logging.getLogger(__name__)``. Los registros se
+encolan con un QueueHandler y un QueueListener los escribe en segundo plano
+en data/app.log con rotación, de modo que las operaciones (p. ej. una
+venta) no esperan la escritura en disco.
+
+Los niveles por módulo se pueden ajustar con ``niveles`` o con la variable
+de entorno BODEGA_LOG_NIVELES, por ejemplo ``productos=WARNING,perfilado=DEBUG``.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from pathlib import Path
+
+FORMATO = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+_oyente = None
+
+
+def _niveles_entorno():
+    niveles = {}
+    for par in os.environ.get("BODEGA_LOG_NIVELES", "").split(","):
+        if "=" in par:
+            modulo, nivel = par.split("=", 1)
+            niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def configurar_registro(ruta="data/app.log", nivel=logging.INFO, niveles=None,
+                        rotacion="tamano", max_bytes=2 * 1024 * 1024, copias=5):
+    """
+    Instala el log asíncrono con rotación. Llamadas repetidas no tienen efecto.
+
+    Args:
+        ruta (str): Archivo de log
+        nivel (int | str): Nivel del logger raíz
+        niveles (dict, optional): Nivel por módulo, {'productos': 'WARNING'}
+        rotacion (str): 'tamano' (al llegar a ``max_bytes``) o 'diaria'
+            (a medianoche)
+        max_bytes (int): Tamaño máximo por archivo con rotación por tamaño
+        copias (int): Archivos anteriores que se conservan
+
+    Returns:
+        logging.handlers.QueueListener
+    """
+    global _oyente
+    if _oyente is not None:
+        return _oyente
+
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    if rotacion == "diaria":
+        archivo = logging.handlers.TimedRotatingFileHandler(
+            ruta, when="midnight", backupCount=copias, encoding="utf-8"
+        )
+    else:
+        archivo = logging.handlers.RotatingFileHandler(
+            ruta, maxBytes=max_bytes, backupCount=copias, encoding="utf-8"
+        )
+    archivo.setFormatter(logging.Formatter(FORMATO))
+
+    cola = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(logging.handlers.QueueHandler(cola))
+    raiz.setLevel(nivel)
+    for modulo, nivel_modulo in {**(niveles or {}), **_niveles_entorno()}.items():
+        logging.getLogger(modulo).setLevel(nivel_modulo)
+
+    _oyente = logging.handlers.QueueListener(cola, archivo, respect_handler_level=True)
+    _oyente.start()
+    atexit.register(detener_registro)
+    return _oyente
+
+
+def detener_registro():
+    """
+    Escribe los registros pendientes y detiene el hilo de escritura. Lo que
+    se registre después (p. ej. al cerrar conexiones) se escribe directamente.
+    """
+    global _oyente
+    if _oyente is not None:
+        _oyente.stop()
+        raiz = logging.getLogger()
+        for handler in list(raiz.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                raiz.removeHandler(handler)
+        for handler in _oyente.handlers:
+            raiz.addHandler(handler)
+        _oyente = None
@@ -0,0 +1,142 @@
+# src/reportes.py
+"""
+Consultas de reportes sobre los acumulados de ventas.
+
+Las tablas ventas_diarias y ventas_por_producto se mantienen por triggers al
+insertar, modificar o borrar líneas de venta (ver migraciones), así que los
+totales por día, semana, mes o producto se calculan sobre pocos registros en
+lugar de recorrer toda la tabla ventas. Los reportes de un rango de fechas
+agregan las líneas de ventas usando sus índices por fecha y producto,
+incluyendo las de los años archivados que caen en el rango (ver archivado).
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta
+from database import conectar_db
+from archivado import consultar_historial
+
+logger = logging.getLogger(__name__)
+
+PERIODOS = ('dia', 'semana', 'mes')
+
+def rango_periodo(periodo, hoy=None):
+    """
+    Días inicial y final (inclusive) del periodo que contiene ``hoy``.
+
+    Args:
+        periodo (str): 'dia', 'semana' (lunes a domingo) o 'mes'
+        hoy (date, optional): Fecha de referencia (hoy por defecto)
+    Returns:
+        tuple: (date, date) o None si el periodo no es válido
+    """
+    hoy = hoy or date.today()
+    if isinstance(hoy, datetime):
+        hoy = hoy.date()
+    if periodo == 'dia':
+        return hoy, hoy
+    if periodo == 'semana':
+        inicio = hoy - timedelta(days=hoy.weekday())
+        return inicio, inicio + timedelta(days=6)
+    if periodo == 'mes':
+        inicio = hoy.replace(day=1)
+        siguiente = (inicio + timedelta(days=32)).replace(day=1)
+        return inicio, siguiente - timedelta(days=1)
+    return None
+
+def total_ventas(desde, hasta):
+    """Total vendido entre dos días (inclusive)"""
+    try:
+        with conectar_db() as conn:
+            fila = conn.execute('''
+                SELECT COALESCE(SUM(total), 0) FROM ventas_diarias
+                WHERE dia BETWEEN ? AND ?
+            ''', (str(desde), str(hasta))).fetchone()
+        return fila[0]
+    except sqlite3.Error as e:
+        logger.error("Error totalizando ventas %s - %s: %s", desde, hasta, e)
+        return 0.0
+
+def ganancias_por_periodo(periodo, hoy=None):
+    """
+    Total de ventas del día, semana o mes actual.
+
+    Returns:
+        float: Total en Bs. (0.0 si el periodo no es válido)
+    """
+    rango = rango_periodo(periodo, hoy)
+    if rango is None:
+        return 0.0
+    return total_ventas(*rango)
+
+def totales_diarios(desde, hasta):
+    """Lista de (dia, total, unidades) con ventas entre dos días"""
+    try:
+        with conectar_db() as conn:
+            return conn.execute('''
+                SELECT dia, total, unidades FROM ventas_diarias
+                WHERE dia BETWEEN ? AND ? AND unidades > 0
+                ORDER BY dia
+            ''', (str(desde), str(hasta))).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error obteniendo totales diarios: %s", e)
+        return []
+
+def ventas_por_producto(limite=None, desde=None, hasta=None):
+    """
+    Total vendido por producto, de mayor a menor.
+
+    Args:
+        limite (int, optional): Cantidad máxima de productos
+        desde (date, optional): Día inicial (inclusive)
+        hasta (date, optional): Día final (inclusive)
+    Returns:
+        list: Filas (producto, nombre, total, unidades)
+    Raises:
+        RuntimeError: Con rango de fechas, si falla la lectura de la base o
+            de un archivo histórico (sin rango los errores devuelven [])
+    """
+    if desde is not None or hasta is not None:
+        return _ventas_por_producto_rango(limite, desde, hasta)
+    try:
+        query = '''
+            SELECT v.producto, COALESCE(p.nombre, v.producto) AS nombre,
+                   v.total, v.unidades
+            FROM ventas_por_producto v
+            LEFT JOIN productos p ON p.codigo = v.producto
+            WHERE v.unidades > 0 ORDER BY v.total DESC
+        '''
+        if limite:
+            query += f" LIMIT {int(limite)}"
+        with conectar_db() as conn:
+            return conn.execute(query).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Error obteniendo ventas por producto: %s", e)
+        return []
+
+def _ventas_por_producto_rango(limite, desde, hasta):
+    """Suma las líneas de ventas del rango tramo por tramo (ver archivado)"""
+    totales = {}
+    try:
+        for codigo, total, unidades in consultar_historial('''
+            SELECT codigo, SUM(precio * cantidad), SUM(cantidad) FROM {esquema}.ventas
+            WHERE fecha >= :inicio AND fecha < :fin
+            GROUP BY codigo
+        ''', desde, hasta):
+            acumulado = totales.setdefault(codigo, [0.0, 0])
+            acumulado[0] += total
+            acumulado[1] += unidades
+        orden = sorted(totales.items(), key=lambda par: par[1][0], reverse=True)
+        if limite:
+            orden = orden[:int(limite)]
+        with conectar_db() as conn:
+            nombres = dict(conn.execute(
+                "SELECT codigo, nombre FROM productos WHERE codigo IN (SELECT value FROM json_each(?))",
+                (json.dumps([codigo for codigo, _ in orden]),)
+            ).fetchall())
+    except (sqlite3.Error, RuntimeError) as e:
+        logger.error("Error obteniendo ventas por producto de %s a %s: %s", desde, hasta, e)
+        raise RuntimeError(f"Error obteniendo ventas por producto: {e}")
+    return [(codigo, nombres.get(codigo, codigo), total, unidades)
+            for codigo, (total, unidades) in orden]
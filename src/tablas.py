@@ -0,0 +1,143 @@
+# src/tablas.py
+"""
+Refresco incremental de tablas ttk.Treeview.
+
+En lugar de borrar y volver a insertar todas las filas, se compara el nuevo
+contenido con el último aplicado y sólo se insertan, actualizan, mueven o
+eliminan las filas que cambiaron. De las filas que cambian de lugar sólo se
+mueven las que quedan fuera de la subsecuencia más larga que conserva su
+orden; si son muchas se reordena la tabla entera en una sola llamada.
+"""
+
+from bisect import bisect_left
+
+
+def _subsecuencia_creciente(posiciones):
+    """
+    Índices de una subsecuencia creciente de longitud máxima (O(n log n)).
+
+    Args:
+        posiciones (list): Números distintos
+    Returns:
+        set: Índices en ``posiciones`` de los elementos de la subsecuencia
+    """
+    if posiciones == sorted(posiciones):
+        return set(range(len(posiciones)))
+    finales = []     # menor último valor de cada longitud
+    indices = []     # índice de ese último valor
+    previo = [-1] * len(posiciones)
+    for i, valor in enumerate(posiciones):
+        k = bisect_left(finales, valor)
+        if k == len(finales):
+            finales.append(valor)
+            indices.append(i)
+        else:
+            finales[k] = valor
+            indices[k] = i
+        previo[i] = indices[k - 1] if k else -1
+    resultado = set()
+    i = indices[-1] if indices else -1
+    while i >= 0:
+        resultado.add(i)
+        i = previo[i]
+    return resultado
+
+
+class SincronizadorTabla:
+    """
+    Mantiene un Treeview sincronizado con una lista ordenada de filas.
+
+    Args:
+        tree (ttk.Treeview): Tabla a sincronizar; sus filas deben crearse
+            únicamente a través de este objeto.
+    """
+
+    # Fracción de filas movidas a partir de la cual se reordena todo junto
+    FRACCION_REORDEN = 8
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._filas = {}
+        self._orden = []
+
+    def sincronizar(self, filas):
+        """
+        Aplica el contenido nuevo a la tabla.
+
+        Args:
+            filas (iterable): Tuplas (iid, values, tags) en el orden deseado
+        Returns:
+            int: Cantidad de operaciones realizadas sobre el Treeview
+        """
+        nuevas = {}
+        orden = []
+        for iid, values, tags in filas:
+            nuevas[iid] = (tuple(values), tuple(tags))
+            orden.append(iid)
+
+        operaciones = 0
+        eliminadas = [iid for iid in self._orden if iid not in nuevas]
+        if eliminadas:
+            self.tree.delete(*eliminadas)
+            operaciones += len(eliminadas)
+
+        posicion = {iid: pos for pos, iid in enumerate(orden)}
+        conservadas = [iid for iid in self._orden if iid in nuevas]
+        fijas = _subsecuencia_creciente([posicion[iid] for iid in conservadas])
+        movidas = {iid for i, iid in enumerate(conservadas) if i not in fijas}
+
+        for iid in conservadas:
+            if self._filas[iid] != nuevas[iid]:
+                values, tags = nuevas[iid]
+                self.tree.item(iid, values=values, tags=tags)
+                operaciones += 1
+
+        if len(movidas) * self.FRACCION_REORDEN > len(orden):
+            for iid in orden:
+                if iid not in self._filas:
+                    values, tags = nuevas[iid]
+                    self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+                    operaciones += 1
+            self.tree.set_children("", *orden)
+            operaciones += 1
+        else:
+            # Sin las filas movidas, las que quedan ya están en orden: cada
+            # fila insertada o vuelta a poner en su posición la conserva
+            if movidas:
+                self.tree.detach(*movidas)
+                operaciones += 1
+            for pos, iid in enumerate(orden):
+                if iid in movidas:
+                    self.tree.move(iid, "", pos)
+                    operaciones += 1
+                elif iid not in self._filas:
+                    values, tags = nuevas[iid]
+                    self.tree.insert("", pos, iid=iid, values=values, tags=tags)
+                    operaciones += 1
+
+        self._filas = nuevas
+        self._orden = orden
+        return operaciones
+
+    def agregar(self, filas):
+        """
+        Agrega filas al final sin comparar las existentes (p. ej. otra página).
+
+        Args:
+            filas (iterable): Tuplas (iid, values, tags) que aún no están en la tabla
+        """
+        for iid, values, tags in filas:
+            datos = (tuple(values), tuple(tags))
+            self.tree.insert("", "end", iid=iid, values=datos[0], tags=datos[1])
+            self._filas[iid] = datos
+            self._orden.append(iid)
+
+    def limpiar(self):
+        """Elimina todas las filas de la tabla"""
+        if self._orden:
+            self.tree.delete(*self._orden)
+        self._filas = {}
+        self._orden = []
+
+    def __len__(self):
+        return len(self._orden)
@@ -0,0 +1,140 @@
+# src/tasas.py
+"""
+Servicio de tasa de cambio Bs./USD.
+
+Mantiene la tasa vigente en memoria durante ``ttl`` segundos (o hasta que la
+propia aplicación la cambie) y resuelve la tasa vigente en una fecha dada
+usando el índice sobre tasa_dolar(fecha). Para reportes con muchas fechas,
+``historial()`` carga la serie una sola vez y la consulta en memoria.
+"""
+
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from database import conectar_db, obtener_tasa_dolar, actualizar_tasa_dolar
+
+logger = logging.getLogger(__name__)
+
+TASA_POR_DEFECTO = 36.0
+
+
+class HistorialTasas:
+    """
+    Serie de tasas ordenada por fecha para conversiones en lote.
+
+    Args:
+        filas (list): Pares (fecha, monto) ordenados por fecha ascendente
+    """
+
+    def __init__(self, filas):
+        self._fechas = [str(fecha) for fecha, _ in filas]
+        self._montos = [monto for _, monto in filas]
+
+    def tasa_en(self, fecha):
+        """Tasa vigente en la fecha (la primera registrada si es anterior)"""
+        if not self._montos:
+            return TASA_POR_DEFECTO
+        pos = bisect.bisect_right(self._fechas, str(fecha))
+        return self._montos[max(pos - 1, 0)]
+
+    def a_dolares(self, monto_bs, fecha):
+        return monto_bs / self.tasa_en(fecha)
+
+
+class ServicioTasa:
+    """
+    Tasa vigente en caché con expiración.
+
+    Args:
+        ttl (float): Segundos que se reutiliza la tasa leída de la base
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._tasa = None
+        self._leida = 0.0
+        self._lock = threading.Lock()
+
+    def actual(self):
+        """Devuelve la tasa vigente"""
+        with self._lock:
+            if self._tasa is not None and time.monotonic() - self._leida < self.ttl:
+                return self._tasa
+        tasa = obtener_tasa_dolar()
+        with self._lock:
+            self._tasa, self._leida = tasa, time.monotonic()
+        return tasa
+
+    def actualizar(self, monto):
+        """Registra una nueva tasa y la deja como vigente en la caché"""
+        if not actualizar_tasa_dolar(monto):
+            self.invalidar()
+            return False
+        with self._lock:
+            self._tasa, self._leida = monto, time.monotonic()
+        return True
+
+    def invalidar(self):
+        with self._lock:
+            self._tasa = None
+
+    def tasa_en(self, fecha):
+        """
+        Tasa vigente en una fecha ('YYYY-MM-DD HH:MM:SS' o datetime).
+
+        Returns:
+            float: Última tasa registrada hasta esa fecha, o la primera
+                registrada si la fecha es anterior a todas
+        """
+        try:
+            with conectar_db() as conn:
+                fila = conn.execute('''
+                    SELECT monto FROM tasa_dolar WHERE fecha <= ?
+                    ORDER BY fecha DESC, id DESC LIMIT 1
+                ''', (str(fecha),)).fetchone()
+                if fila is None:
+                    fila = conn.execute(
+                        "SELECT monto FROM tasa_dolar ORDER BY fecha, id LIMIT 1"
+                    ).fetchone()
+            return fila['monto'] if fila else TASA_POR_DEFECTO
+        except sqlite3.Error as e:
+            logger.error("Error obteniendo tasa en %s: %s", fecha, e)
+            return self.actual()
+
+    def historial(self, desde=None, hasta=None):
+        """
+        Carga la serie de tasas para convertir muchas fechas sin consultas
+        por fila. Incluye la tasa vigente al inicio del rango.
+
+        Returns:
+            HistorialTasas
+        """
+        try:
+            with conectar_db() as conn:
+                filas = []
+                if desde is not None:
+                    previa = conn.execute('''
+                        SELECT fecha, monto FROM tasa_dolar WHERE fecha <= ?
+                        ORDER BY fecha DESC, id DESC LIMIT 1
+                    ''', (str(desde),)).fetchone()
+                    if previa:
+                        filas.append(tuple(previa))
+                query = "SELECT fecha, monto FROM tasa_dolar WHERE 1 = 1"
+                params = []
+                if desde is not None:
+                    query += " AND fecha > ?"
+                    params.append(str(desde))
+                if hasta is not None:
+                    query += " AND fecha <= ?"
+                    params.append(str(hasta))
+                query += " ORDER BY fecha, id"
+                filas += [tuple(f) for f in conn.execute(query, params)]
+            return HistorialTasas(filas)
+        except sqlite3.Error as e:
+            logger.error("Error cargando historial de tasas: %s", e)
+            return HistorialTasas([])
+
+
+servicio_tasa = ServicioTasa()
@@ -0,0 +1,120 @@
+# src/trabajador.py
+"""
+Ejecución de acceso a datos fuera del hilo de Tk.
+
+EjecutorDB corre las funciones en un hilo de trabajo y entrega el resultado
+(o la excepción) a callbacks que se invocan en el hilo de la interfaz,
+sondeando una cola con ``root.after`` sólo mientras hay tareas pendientes.
+Las tareas largas (importar, exportar, archivar) van por un hilo aparte para
+no demorar las ventas y refrescos encolados detrás de ellas.
+"""
+
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Tipos de mensaje de la cola de despacho
+_RESULTADO = "resultado"   # (tipo, futuro, al_terminar, al_fallar)
+_LLAMADA = "llamada"       # (tipo, funcion, args)
+
+
+class EjecutorDB:
+    """
+    Cola de tareas de base de datos con despacho de resultados a Tk.
+
+    Args:
+        root (tk.Tk): Ventana principal, usada para programar el despacho
+        hilos (int): Hilos de trabajo; con 1 las tareas se ejecutan en el
+            orden en que se enviaron
+        intervalo_ms (int): Periodo de sondeo de resultados
+    """
+
+    def __init__(self, root, hilos=1, intervalo_ms=30):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="bodega-db")
+        self._pool_largo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bodega-db-largo")
+        self._resultados = queue.SimpleQueue()
+        self._pendientes = 0
+        self._sondeo = None
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None, **kwargs):
+        """
+        Ejecuta ``funcion(*args, **kwargs)`` en el hilo de trabajo.
+
+        Debe llamarse desde el hilo de Tk.
+
+        Args:
+            al_terminar (callable, optional): Recibe el resultado, en el hilo de Tk
+            al_fallar (callable, optional): Recibe la excepción, en el hilo de Tk;
+                si se omite, el error sólo se registra en el log
+        Returns:
+            concurrent.futures.Future
+        """
+        return self._enviar(self._pool, funcion, args, kwargs, al_terminar, al_fallar)
+
+    def enviar_largo(self, funcion, *args, al_terminar=None, al_fallar=None, **kwargs):
+        """
+        Como ``enviar``, pero en el hilo de tareas largas: las tareas
+        enviadas con ``enviar`` no esperan a que termine.
+        """
+        return self._enviar(self._pool_largo, funcion, args, kwargs, al_terminar, al_fallar)
+
+    def _enviar(self, pool, funcion, args, kwargs, al_terminar, al_fallar):
+        futuro = pool.submit(funcion, *args, **kwargs)
+        self._pendientes += 1
+        futuro.add_done_callback(
+            lambda f: self._resultados.put((_RESULTADO, f, al_terminar, al_fallar))
+        )
+        if self._sondeo is None:
+            self._sondeo = self.root.after(self.intervalo_ms, self._despachar)
+        return futuro
+
+    def en_hilo_ui(self, funcion, *args):
+        """
+        Programa ``funcion(*args)`` en el hilo de Tk desde una tarea en curso
+        (p. ej. para informar progreso).
+        """
+        self._resultados.put((_LLAMADA, funcion, args))
+
+    def _despachar(self):
+        self._sondeo = None
+        while True:
+            try:
+                tipo, *mensaje = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == _LLAMADA:
+                funcion, args = mensaje
+                try:
+                    funcion(*args)
+                except Exception as e:
+                    logger.error("Error en notificación de tarea: %s", e, exc_info=True)
+                continue
+            futuro, al_terminar, al_fallar = mensaje
+            self._pendientes -= 1
+            if futuro.cancelled():
+                continue
+            error = futuro.exception()
+            try:
+                if error is not None:
+                    if al_fallar is not None:
+                        al_fallar(error)
+                    else:
+                        logger.error("Error en tarea de base de datos: %s", error)
+                elif al_terminar is not None:
+                    al_terminar(futuro.result())
+            except Exception as e:
+                logger.error("Error procesando resultado de tarea: %s", e, exc_info=True)
+        if self._pendientes > 0:
+            self._sondeo = self.root.after(self.intervalo_ms, self._despachar)
+
+    def cerrar(self):
+        """Descarta las tareas en espera y espera a que termine la actual"""
+        if self._sondeo is not None:
+            self.root.after_cancel(self._sondeo)
+            self._sondeo = None
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool_largo.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,98 @@
+# src/ventas.py
+
+import logging
+import sqlite3
+from database import conectar_db
+from catalogo import cache_productos
+
+logger = logging.getLogger(__name__)
+
+class VentaError(Exception):
+    """Error de validación o de stock al registrar una venta"""
+
+def _agrupar_items(items):
+    """Normaliza los items a {codigo: cantidad} sumando códigos repetidos"""
+    cantidades = {}
+    for item in items:
+        if isinstance(item, dict):
+            codigo, cantidad = item.get("producto_id"), item.get("cantidad")
+        else:
+            codigo, cantidad = item
+        if not codigo or not isinstance(cantidad, int) or cantidad <= 0:
+            raise VentaError(f"Item inválido: {codigo} x {cantidad}")
+        cantidades[codigo] = cantidades.get(codigo, 0) + cantidad
+    return cantidades
+
+def vender(items, cliente=None):
+    """
+    Registra una venta completa en una única transacción.
+
+    Descuenta el stock con ``UPDATE ... WHERE stock >= ? RETURNING``, que
+    devuelve nombre y precio sin otra consulta por producto, inserta un
+    movimiento (cabecera) para toda la operación y una línea en ventas por
+    producto. Si algún producto no existe o no tiene stock suficiente no se
+    guarda nada.
+
+    Args:
+        items (iterable): Pares (codigo, cantidad) o dicts
+            {'producto_id': str, 'cantidad': int}
+        cliente (str, optional): Nombre del cliente
+
+    Returns:
+        int: id del movimiento registrado
+
+    Raises:
+        VentaError: Si los datos son inválidos o falta stock
+    """
+    cantidades = _agrupar_items(items)
+    if not cantidades:
+        raise VentaError("No hay productos en la venta")
+
+    try:
+        with conectar_db() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            lineas = []
+            for codigo, cantidad in cantidades.items():
+                prod = conn.execute("""
+                    UPDATE productos SET stock = stock - ?
+                    WHERE codigo = ? AND stock >= ?
+                    RETURNING nombre, precio
+                """, (cantidad, codigo, cantidad)).fetchone()
+                if prod is None:
+                    prod = conn.execute(
+                        "SELECT nombre FROM productos WHERE codigo = ?", (codigo,)
+                    ).fetchone()
+                    if prod is None:
+                        raise VentaError(f"Producto con código {codigo} no encontrado")
+                    raise VentaError(f"Stock insuficiente de {prod['nombre']}")
+                lineas.append((codigo, prod['nombre'], cantidad, prod['precio']))
+
+            total = sum(cantidad * precio for _, _, cantidad, precio in lineas)
+            if len(lineas) == 1:
+                _, nombre, cantidad, _ = lineas[0]
+                detalle = f"{cantidad}x {nombre}"
+            else:
+                detalle = f"Venta lote ({len(lineas)} productos)"
+            cursor = conn.execute(
+                "INSERT INTO movimientos (detalle, total_bs, cliente) VALUES (?, ?, ?)",
+                (detalle, total, cliente)
+            )
+            movimiento_id = cursor.lastrowid
+
+            conn.executemany("""
+                INSERT INTO ventas (movimiento_id, producto, codigo, cantidad, precio)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(movimiento_id, codigo, codigo, cantidad, precio)
+                  for codigo, _, cantidad, precio in lineas])
+
+        # El stock cambió: descartar las copias en caché
+        cache_productos.invalidar(*cantidades)
+
+        logger.info("Venta registrada: %s - %.2f Bs.", detalle, total)
+        return movimiento_id
+
+    except sqlite3.Error as e:
+        logger.error("Error al registrar venta: %s", e)
+        raise VentaError(f"Error de base de datos: {e}")
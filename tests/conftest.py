@@ -0,0 +1,50 @@
+# tests/conftest.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import database
+from catalogo import cache_productos
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base de datos temporal con el esquema actual y el pool apuntando a ella"""
+    database.configurar_pool(ruta=tmp_path / "inventario.db")
+    database.crear_tablas()
+    cache_productos.limpiar()
+    yield tmp_path / "inventario.db"
+    database.cerrar_conexiones()
+    cache_productos.limpiar()
+
+
+@pytest.fixture
+def productos(base):
+    """Tres productos de prueba: (codigo, precio, stock)"""
+    datos = [("A1", 10.0, 5), ("B2", 2.5, 20), ("C3", 100.0, 1)]
+    for codigo, precio, stock in datos:
+        assert database.agregar_producto(codigo, f"Producto {codigo}", "", precio, stock, 0)
+    return datos
+
+
+def stock(codigo):
+    return database.obtener_producto_por_codigo(codigo)["stock"]
+
+
+def acumulados():
+    """Totales de ventas_diarias y ventas_por_producto, y la suma de ventas"""
+    with database.conectar_db() as conn:
+        return tuple(
+            tuple(round(v or 0, 6) for v in conn.execute(
+                f"SELECT SUM({total}), SUM({unidades}) FROM {tabla}"
+            ).fetchone())
+            for tabla, total, unidades in (
+                ("ventas_diarias", "total", "unidades"),
+                ("ventas_por_producto", "total", "unidades"),
+                ("ventas", "precio * cantidad", "cantidad"),
+            )
+        )
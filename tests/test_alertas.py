@@ -0,0 +1,38 @@
+# tests/test_alertas.py
+
+import database
+from alertas import contar_bajo_stock, sugerencias_reposicion
+from database import conectar_db
+from ventas import vender
+
+
+def test_producto_en_el_minimo_esta_en_alerta(base):
+    database.agregar_producto("A1", "Justo", "", 1.0, 5, 5)
+    database.agregar_producto("B2", "Debajo", "", 1.0, 1, 3)
+    database.agregar_producto("C3", "Sobra", "", 1.0, 6, 5)
+
+    assert contar_bajo_stock() == 2
+    assert sorted(s["codigo"] for s in sugerencias_reposicion()) == ["A1", "B2"]
+
+
+def test_sugerencia_segun_velocidad_de_venta(base):
+    database.agregar_producto("A1", "Rápido", "", 1.0, 33, 3)
+    database.agregar_producto("B2", "Sin ventas", "", 1.0, 0, 0)
+    vender([("A1", 30)])
+
+    rapido, sin_ventas = sugerencias_reposicion(dias=30, cobertura_dias=14)
+
+    assert rapido["codigo"] == "A1"
+    assert rapido["por_dia"] == 1.0
+    assert rapido["dias_restantes"] == 3.0
+    assert rapido["sugerido"] == 3 + 14 - 3
+    assert sin_ventas["dias_restantes"] is None
+    assert sin_ventas["sugerido"] == 1
+
+
+def test_consulta_usa_el_indice_parcial(base):
+    with conectar_db() as conn:
+        plan = " ".join(fila[-1] for fila in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM productos WHERE stock <= stock_minimo"
+        ))
+    assert "idx_productos_bajo_stock" in plan
@@ -0,0 +1,168 @@
+# tests/test_archivado.py
+
+import csv
+import sqlite3
+from datetime import date
+
+import pytest
+
+import archivado
+from conftest import acumulados
+from database import conectar_db
+from exportacion import exportar_ventas
+from movimientos import obtener_total_movimientos
+from reportes import ventas_por_producto
+from ventas import vender
+
+HOY = date(2026, 6, 1)
+
+
+def vender_el(fecha, items):
+    """Registra una venta y la mueve a ``fecha``"""
+    movimiento_id = vender(items)
+    with conectar_db() as conn:
+        conn.execute("UPDATE movimientos SET fecha = ? WHERE id = ?", (fecha, movimiento_id))
+        conn.execute("UPDATE ventas SET fecha = ? WHERE movimiento_id = ?", (fecha, movimiento_id))
+    return movimiento_id
+
+
+@pytest.fixture
+def ventas_anios(productos):
+    vender_el("2024-05-10 10:00:00", [("A1", 2)])
+    vender_el("2024-12-31 23:00:00", [("B2", 4)])
+    vender_el("2025-01-01 08:00:00", [("A1", 1)])
+    vender_el("2026-02-01 09:00:00", [("B2", 2)])
+
+
+def contar(tabla, esquema="main"):
+    with conectar_db() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {esquema}.{tabla}").fetchone()[0]
+
+
+def resumen(filas):
+    return [(codigo, round(total, 6), unidades) for codigo, _, total, unidades in filas]
+
+
+def test_archivar_anio_compensa_acumulados(ventas_anios):
+    diarias, por_producto, _ = acumulados()
+
+    assert archivado.archivar_anio(2024, HOY) == {"movimientos": 2, "ventas": 2}
+
+    assert acumulados()[:2] == (diarias, por_producto)
+    assert acumulados()[2] == (15.0, 3)
+    assert archivado.anios_archivados() == [2024]
+    assert archivado.anios_archivables(HOY) == [2025]
+    archivo = sqlite3.connect(archivado.ruta_archivo(2024))
+    try:
+        assert archivo.execute("SELECT COUNT(*) FROM movimientos").fetchone()[0] == 2
+        assert archivo.execute("SELECT SUM(precio * cantidad) FROM ventas").fetchone()[0] == 30.0
+    finally:
+        archivo.close()
+
+    # Repetirlo no mueve nada ni vuelve a compensar
+    assert archivado.archivar_anio(2024, HOY) == {"movimientos": 0, "ventas": 0}
+    assert acumulados()[:2] == (diarias, por_producto)
+
+
+def test_archivar_anio_conserva_total_de_movimientos(ventas_anios):
+    total = obtener_total_movimientos()
+
+    archivado.archivar_anio(2024, HOY)
+    assert obtener_total_movimientos() == pytest.approx(total)
+
+    archivado.archivar_anio(2024, HOY)
+    assert obtener_total_movimientos() == pytest.approx(total)
+    with conectar_db() as conn:
+        assert tuple(conn.execute(
+            "SELECT anio, movimientos, total_bs FROM movimientos_archivados"
+        ).fetchone()) == (2024, 2, 30.0)
+
+
+def test_archivar_anteriores_no_compacta(ventas_anios, monkeypatch):
+    def compactar():
+        raise AssertionError("archivar no debe compactar la base")
+    monkeypatch.setattr(archivado, "compactar", compactar)
+
+    assert sorted(archivado.archivar_anteriores(HOY)) == [2024, 2025]
+
+
+def test_archivar_anio_abierto(ventas_anios):
+    with pytest.raises(ValueError):
+        archivado.archivar_anio(2026, HOY)
+    assert contar("ventas") == 4
+
+
+def test_tramos():
+    assert archivado.tramos("2024-06-01", "2026-01-31") == [(None, "2024-06-01", "2026-02-01")]
+
+
+def test_tramos_con_archivos(ventas_anios):
+    archivado.archivar_anio(2024, HOY)
+    assert archivado.tramos("2023-06-01", "2025-01-31") == [
+        (None, "2023-06-01", "2024-01-01"),
+        (2024, "2024-01-01", "2025-01-01"),
+        (None, "2025-01-01", "2025-02-01"),
+    ]
+    assert archivado.tramos("2024-03-01", "2024-03-31") == [(2024, "2024-03-01", "2024-04-01")]
+    assert archivado.tramos() == [
+        (None, "0000-01-01", "2024-01-01"),
+        (2024, "2024-01-01", "2025-01-01"),
+        (None, "2025-01-01", "9999-12-31"),
+    ]
+
+
+@pytest.mark.parametrize("archivar", [False, True])
+def test_ventas_por_producto_por_rango(ventas_anios, archivar):
+    if archivar:
+        archivado.archivar_anteriores(HOY)
+
+    assert resumen(ventas_por_producto(desde="2024-01-01", hasta="2024-12-31")) == [
+        ("A1", 20.0, 2), ("B2", 10.0, 4)]
+    assert sorted(resumen(ventas_por_producto(desde="2024-12-31", hasta="2025-01-01"))) == [
+        ("A1", 10.0, 1), ("B2", 10.0, 4)]
+    assert resumen(ventas_por_producto(desde="2025-01-01")) == [("A1", 10.0, 1), ("B2", 5.0, 2)]
+    assert resumen(ventas_por_producto(limite=1, hasta="2030-01-01")) == [("A1", 30.0, 3)]
+    assert ventas_por_producto(desde="2023-01-01", hasta="2023-12-31") == []
+    assert resumen(ventas_por_producto(desde="2000-01-01")) == resumen(ventas_por_producto())
+
+
+@pytest.mark.parametrize("archivar", [False, True])
+def test_exportar_ventas_por_rango(ventas_anios, archivar, tmp_path):
+    if archivar:
+        archivado.archivar_anteriores(HOY)
+    ruta = tmp_path / "ventas.csv"
+
+    assert exportar_ventas(ruta) == 4
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        filas = list(csv.reader(f))
+    assert filas[0] == ["Producto", "Cantidad", "Precio", "Fecha"]
+    assert [fila[3] for fila in filas[1:5]] == [
+        "2024-05-10 10:00:00", "2024-12-31 23:00:00",
+        "2025-01-01 08:00:00", "2026-02-01 09:00:00",
+    ]
+    assert exportar_ventas(ruta, desde="2024-12-31", hasta="2025-01-01") == 2
+
+
+def test_historial_de_mas_de_diez_anios(productos):
+    for anio in range(2010, 2022):
+        vender_el(f"{anio}-07-01 12:00:00", [("B2", 1)])
+    archivado.archivar_anteriores(HOY)
+
+    assert archivado.anios_archivados() == list(range(2010, 2022))
+    assert contar("ventas") == 0
+    assert resumen(ventas_por_producto(desde="2000-01-01", hasta="2030-12-31")) == [("B2", 30.0, 12)]
+    with conectar_db() as conn:
+        assert len(conn.execute("PRAGMA database_list").fetchall()) == 2   # main y temp
+
+
+def test_ventas_por_producto_con_error_en_el_archivo(ventas_anios, monkeypatch):
+    archivado.archivar_anio(2024, HOY)
+
+    def falla(conn, anios):
+        raise sqlite3.OperationalError("archivo ilegible")
+
+    monkeypatch.setattr(archivado, "_adjuntar", falla)
+    with pytest.raises(RuntimeError, match="archivo ilegible"):
+        ventas_por_producto(desde="2024-01-01", hasta="2025-12-31")
+    # Sin rango se usan los acumulados, que no leen los archivos
+    assert len(ventas_por_producto()) == 2
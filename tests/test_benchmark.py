@@ -0,0 +1,14 @@
+# tests/test_benchmark.py
+
+import os
+
+import benchmark
+
+
+def test_medir_tamano_incluye_el_wal(tmp_path):
+    resultado = benchmark.medir_tamano(200, 200, 1, str(tmp_path))
+
+    ruta = tmp_path / "bench_200_200.db"
+    assert resultado["tamano_bytes"] >= os.path.getsize(ruta) > 4096
+    assert resultado["operaciones"]["vender"]
+    assert resultado["operaciones"]["refresco_productos_sin_cambios"]
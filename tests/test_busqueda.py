@@ -0,0 +1,58 @@
+# tests/test_busqueda.py
+
+import pytest
+
+import busqueda
+import database
+from busqueda import buscar_productos, codigos_indexados
+from database import conectar_db
+
+
+@pytest.fixture(autouse=True)
+def indice_nuevo(monkeypatch):
+    monkeypatch.setattr(busqueda, "_fts_disponible", None)
+
+
+def filas_indice():
+    with conectar_db() as conn:
+        return sorted(tuple(fila) for fila in conn.execute(
+            "SELECT codigo, nombre FROM productos_fts"
+        ))
+
+
+def codigos(filas):
+    return [fila["codigo"] for fila in filas]
+
+
+@pytest.mark.parametrize("codigo", ["A1", "X", "00001234", 'C"3'])
+def test_renombrar_y_eliminar_mantienen_el_indice(base, codigo):
+    assert database.agregar_producto(codigo, "Harina de maíz", "", 10.0, 5, 1)
+    assert codigos(buscar_productos("harina")) == [codigo]
+
+    assert database.actualizar_producto(codigo, "Arroz blanco", "", 10.0, 5, 1)
+    assert filas_indice() == [(codigo, "Arroz blanco")]
+    assert buscar_productos("harina") == []
+    assert codigos(buscar_productos("arroz")) == [codigo]
+
+    assert database.eliminar_producto(codigo)
+    assert filas_indice() == []
+    assert buscar_productos("arroz") == []
+
+
+def test_busca_por_codigo_nombre_y_descripcion(productos):
+    database.agregar_producto("00000042", "Café molido", "Paquete de 250 g", 5.0, 3, 0)
+    assert codigos(buscar_productos("0004")) == ["00000042"]
+    assert codigos(buscar_productos("CAFÉ")) == ["00000042"]
+    assert codigos(buscar_productos("paquete")) == ["00000042"]
+    assert sorted(codigos_indexados("producto")) == ["A1", "B2", "C3"]
+
+
+def test_textos_cortos_usan_like(productos):
+    assert codigos_indexados("B2") is None
+    assert codigos(buscar_productos("B2")) == ["B2"]
+    assert len(buscar_productos("")) == 3
+
+
+def test_limite_y_orden_por_nombre(productos):
+    assert codigos(buscar_productos("producto", limite=2)) == ["A1", "B2"]
+
@@ -0,0 +1,64 @@
+# tests/test_carrito.py
+
+import pytest
+
+from carrito import Carrito
+from conftest import stock
+from ventas import VentaError
+
+# Filas del catálogo: (codigo, nombre, descripcion, precio, stock, stock_minimo)
+HARINA = ("A1", "Harina", "", 10.0, 5, 0)
+ARROZ = ("B2", "Arroz", "", 2.5, 20, 0)
+
+
+def test_totales_incrementales():
+    carrito = Carrito(tasa=40.0)
+    carrito.agregar(HARINA)
+    carrito.agregar(HARINA, 2)
+    carrito.fijar(ARROZ, 4)
+
+    assert carrito.cantidad("A1") == 3
+    assert carrito.total_bs == 40.0
+    assert carrito.total_usd == 1.0
+    assert sorted(carrito.items()) == [("A1", 3), ("B2", 4)]
+
+    carrito.fijar(ARROZ, 2)
+    assert carrito.total_bs == 35.0
+    carrito.quitar("A1")
+    assert carrito.total_bs == 5.0 and len(carrito) == 1 and "A1" not in carrito
+
+
+def test_quitar_todo_deja_el_total_en_cero():
+    carrito = Carrito(tasa=0)
+    for _ in range(10):
+        carrito.agregar(("X", "Pan", "", 0.1, 100, 0))
+    carrito.fijar(("X", "Pan", "", 0.1, 100, 0), 0)
+    assert carrito.total_bs == 0.0 and carrito.total_usd == 0.0 and len(carrito) == 0
+
+
+def test_precio_nuevo_recalcula_la_linea():
+    carrito = Carrito(tasa=1.0)
+    carrito.fijar(HARINA, 2)
+    carrito.fijar(("A1", "Harina", "", 12.0, 5, 0), 2)
+    assert carrito.total_bs == 24.0
+
+
+@pytest.mark.parametrize("cantidad", [-1, 6])
+def test_cantidades_invalidas_no_cambian_el_carrito(cantidad):
+    carrito = Carrito(tasa=1.0)
+    carrito.fijar(HARINA, 1)
+    with pytest.raises(VentaError):
+        carrito.fijar(HARINA, cantidad)
+    assert carrito.cantidad("A1") == 1 and carrito.total_bs == 10.0
+
+
+def test_vender_el_carrito(productos):
+    carrito = Carrito(tasa=1.0)
+    carrito.fijar(HARINA, 2)
+    carrito.fijar(ARROZ, 3)
+    assert carrito.vender("Ana") > 0
+    assert stock("A1") == 3 and stock("B2") == 17
+
+    carrito.vaciar()
+    with pytest.raises(VentaError):
+        carrito.vender()
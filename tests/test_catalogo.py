@@ -0,0 +1,138 @@
+# tests/test_catalogo.py
+
+import sqlite3
+
+import pytest
+
+import catalogo as catalogo_modulo
+import database
+from busqueda import codigos_indexados
+from catalogo import cache_productos, catalogo
+from ventas import vender
+
+
+@pytest.fixture
+def sin_verificaciones(monkeypatch):
+    """Caché que sólo comprueba cambios externos al confirmar escrituras"""
+    monkeypatch.setattr(cache_productos, "intervalo_verificacion", 3600.0)
+
+
+def escribir_desde_afuera(base, sql, params=()):
+    conn = sqlite3.connect(base)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_guarda_y_reutiliza_filas(productos, sin_verificaciones):
+    fila = cache_productos.obtener("A1")
+    assert fila["nombre"] == "Producto A1"
+    assert cache_productos.obtener("A1") is fila
+    assert cache_productos.obtener("ZZ") is None
+
+
+def test_escritura_propia_invalida_solo_lo_afectado(productos, sin_verificaciones):
+    b2 = cache_productos.obtener("B2")
+    cache_productos.obtener("A1")
+
+    vender([("A1", 2)])
+
+    assert cache_productos.obtener("A1")["stock"] == 3
+    assert cache_productos.obtener("B2") is b2
+
+
+def test_detecta_cambios_externos(base, productos, monkeypatch):
+    monkeypatch.setattr(cache_productos, "intervalo_verificacion", 0.0)
+    cache_productos.obtener("B2")
+    escribir_desde_afuera(base, "UPDATE productos SET stock = 7 WHERE codigo = 'B2'")
+    assert cache_productos.obtener("B2")["stock"] == 7
+
+
+def test_escritura_propia_no_oculta_un_cambio_externo(base, productos, sin_verificaciones):
+    cache_productos.obtener("B2")
+    escribir_desde_afuera(base, "UPDATE productos SET stock = 7 WHERE codigo = 'B2'")
+
+    vender([("A1", 1)])
+
+    assert cache_productos.obtener("B2")["stock"] == 7
+
+
+def test_cambio_de_base_descarta_la_cache(base, productos, sin_verificaciones, tmp_path):
+    assert cache_productos.obtener("A1")["nombre"] == "Producto A1"
+
+    database.configurar_pool(ruta=tmp_path / "otra.db")
+    database.crear_tablas()
+    escribir_desde_afuera(
+        tmp_path / "otra.db", "INSERT INTO productos VALUES ('A1', 'Otro A1', '', 1, 1, 0)"
+    )
+
+    assert cache_productos.obtener("A1")["nombre"] == "Otro A1"
+    escribir_desde_afuera(tmp_path / "otra.db", "UPDATE productos SET stock = 9")
+    vender([("A1", 1)])
+    assert cache_productos.obtener("A1")["stock"] == 8
+
+
+@pytest.fixture
+def consultas_indice(monkeypatch):
+    """Registra los textos consultados al índice FTS5"""
+    textos = []
+
+    def registrar(texto, cancelado=None):
+        textos.append(texto)
+        return codigos_indexados(texto, cancelado)
+
+    monkeypatch.setattr(catalogo_modulo, "codigos_indexados", registrar)
+    return textos
+
+
+@pytest.fixture
+def surtido(base):
+    for codigo, nombre, descripcion in [("00000001", "Harina de maíz", "Blanca"),
+                                        ("00000002", "harina de trigo", ""),
+                                        ("00000003", "Arroz", "Tipo harinoso"),
+                                        ("00000004", "Café", "")]:
+        database.agregar_producto(codigo, nombre, descripcion, 1.0, 1, 0)
+
+
+def nombres(vista):
+    return [fila[1] for fila in vista]
+
+
+def test_filtrar_sin_texto_devuelve_todo_por_nombre(surtido):
+    vista = catalogo.filtrar("")
+    assert nombres(vista) == ["Arroz", "Café", "Harina de maíz", "harina de trigo"]
+    assert catalogo.producto("00000004") == ("00000004", "Café", "", 1.0, 1, 0)
+    assert "00000004" in catalogo and "99999999" not in catalogo
+
+
+def test_refinar_filtra_en_memoria(surtido, consultas_indice):
+    assert nombres(catalogo.filtrar("HARIN")) == ["Arroz", "Harina de maíz", "harina de trigo"]
+    assert nombres(catalogo.filtrar("harina d")) == ["Harina de maíz", "harina de trigo"]
+    assert nombres(catalogo.filtrar("harina de t")) == ["harina de trigo"]
+    assert consultas_indice == ["harin"]
+
+    # Un texto que no amplía el anterior vuelve a consultar el índice
+    assert nombres(catalogo.filtrar("arroz")) == ["Arroz"]
+    assert consultas_indice == ["harin", "arroz"]
+
+
+def test_textos_cortos_recorren_el_catalogo(surtido, consultas_indice):
+    assert nombres(catalogo.filtrar("fé")) == ["Café"]
+    assert nombres(catalogo.filtrar("00000003")) == ["Arroz"]
+    assert consultas_indice == ["fé", "00000003"]
+
+
+def test_recarga_tras_escrituras(base, surtido):
+    assert nombres(catalogo.filtrar("harina")) == ["Harina de maíz", "harina de trigo"]
+    database.eliminar_producto("00000002")
+    assert nombres(catalogo.filtrar("harina")) == ["Harina de maíz"]
+
+    escribir_desde_afuera(base, "INSERT INTO productos VALUES ('00000009', 'Harina leudante', '', 1, 1, 0)")
+    assert nombres(catalogo.filtrar("harina")) == ["Harina de maíz", "Harina leudante"]
+
+
+def test_filtro_cancelado(surtido):
+    assert catalogo.filtrar("harina", cancelado=lambda: True) is None
+    assert catalogo.filtrar("ha", cancelado=lambda: True) is None
@@ -0,0 +1,118 @@
+# tests/test_database.py
+
+import threading
+
+import pytest
+
+import database
+from database import PoolConexiones
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = PoolConexiones(tmp_path / "pool.db", tamano=2, timeout=0.2)
+    yield pool
+    pool.cerrar()
+
+
+def test_reutiliza_la_conexion(pool):
+    with pool.conexion() as primera:
+        pass
+    with pool.conexion() as segunda:
+        pass
+    assert primera is segunda
+
+
+def test_prestamos_anidados_comparten_transaccion(pool):
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO t VALUES (1)")
+        with pool.conexion() as anidada:
+            assert anidada is conn
+            assert anidada.in_transaction
+        # Salir del bloque anidado no confirma
+        assert conn.in_transaction
+    with pool.conexion() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_revierte_si_hay_excepcion(pool):
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(ZeroDivisionError):
+        with pool.conexion() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            1 / 0
+    with pool.conexion() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_version_cambia_solo_al_escribir(pool):
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    version = pool.version
+    with pool.conexion() as conn:
+        conn.execute("SELECT COUNT(*) FROM t").fetchone()
+    assert pool.version == version
+    with pool.conexion() as conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+    assert pool.version == version + 1
+
+
+def test_limita_conexiones_simultaneas(pool):
+    prestadas = threading.Barrier(3)
+    soltar = threading.Event()
+    errores = []
+
+    def ocupar():
+        with pool.conexion():
+            prestadas.wait()
+            soltar.wait()
+
+    hilos = [threading.Thread(target=ocupar) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    prestadas.wait()
+    try:
+        with pool.conexion():
+            pass
+    except RuntimeError as e:
+        errores.append(e)
+    soltar.set()
+    for hilo in hilos:
+        hilo.join()
+    assert len(errores) == 1
+    with pool.conexion():
+        pass
+
+
+def test_descarta_conexiones_cerradas(pool):
+    with pool.conexion() as conn:
+        pass
+    conn.close()
+    with pool.conexion() as nueva:
+        assert nueva is not conn
+        assert nueva.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_pool_cerrado(pool):
+    pool.cerrar()
+    with pytest.raises(RuntimeError):
+        with pool.conexion():
+            pass
+
+
+def test_configurar_pool_conserva_la_version(base):
+    version = database.version_datos()
+    database.configurar_pool(ruta=base)
+    assert database.version_datos() == version + 1
+    assert database.ruta_db() == base
+
+
+def test_errores_crud_van_al_log(productos, caplog):
+    with caplog.at_level("ERROR", logger="database"):
+        assert not database.agregar_producto("A1", "Repetido", "", 1.0, 1, 0)
+    registro, = caplog.records
+    assert registro.getMessage() == "Error agregando producto A1"
+    assert registro.exc_info is not None
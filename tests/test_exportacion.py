@@ -0,0 +1,67 @@
+# tests/test_exportacion.py
+
+import csv
+import sys
+
+import pytest
+
+from database import conectar_db
+from exportacion import COLUMNAS_VENTAS, exportar_ventas
+from ventas import vender
+
+
+@pytest.fixture
+def ventas_por_dia(productos):
+    for dia in range(1, 6):
+        movimiento_id = vender([("B2", dia)])
+        fecha = f"2025-03-0{dia} 10:00:00"
+        with conectar_db() as conn:
+            conn.execute("UPDATE movimientos SET fecha = ? WHERE id = ?", (fecha, movimiento_id))
+            conn.execute("UPDATE ventas SET fecha = ? WHERE movimiento_id = ?", (fecha, movimiento_id))
+
+
+def leer_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))
+
+
+def test_exporta_por_bloques_con_progreso(ventas_por_dia, tmp_path):
+    ruta = tmp_path / "ventas.csv"
+    avisos = []
+
+    assert exportar_ventas(ruta, progreso=lambda n, total: avisos.append((n, total)),
+                           tamano_bloque=2) == 5
+
+    assert avisos == [(2, 5), (4, 5), (5, 5)]
+    filas = leer_csv(ruta)
+    assert filas[0] == COLUMNAS_VENTAS
+    assert filas[1:6] == [["B2", str(n), "2.5", f"2025-03-0{n} 10:00:00"] for n in range(1, 6)]
+    assert filas[6:10] == [[]] * 4
+    assert filas[10][0] == "Periodo"
+
+
+@pytest.mark.parametrize("desde, hasta, dias", [
+    ("2025-03-02", "2025-03-04", [2, 3, 4]),
+    ("2025-03-04", None, [4, 5]),
+    (None, "2025-03-01", [1]),
+    ("2025-04-01", None, []),
+])
+def test_filtra_por_fechas_inclusive(ventas_por_dia, tmp_path, desde, hasta, dias):
+    ruta = tmp_path / "ventas.csv"
+    assert exportar_ventas(ruta, desde, hasta) == len(dias)
+    assert [int(fila[1]) for fila in leer_csv(ruta)[1:1 + len(dias)]] == dias
+
+
+def test_exporta_excel(ventas_por_dia, tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    ruta = tmp_path / "ventas.xlsx"
+    assert exportar_ventas(ruta) == 5
+    hoja = openpyxl.load_workbook(ruta)["Reporte"]
+    assert [celda.value for celda in hoja[1]] == COLUMNAS_VENTAS
+    assert hoja.cell(row=2, column=4).value.day == 1
+
+
+def test_excel_sin_openpyxl(ventas_por_dia, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "openpyxl", None)
+    with pytest.raises(RuntimeError, match="openpyxl"):
+        exportar_ventas(tmp_path / "ventas.xlsx")
@@ -0,0 +1,84 @@
+# tests/test_importacion.py
+
+import pytest
+
+import database
+from database import conectar_db
+from importacion import importar_productos, validar_fila
+
+
+def escribir(ruta, texto):
+    ruta.write_text(texto, encoding="utf-8")
+    return ruta
+
+
+def productos_en_base():
+    with conectar_db() as conn:
+        return {fila["codigo"]: tuple(fila)[1:] for fila in conn.execute("SELECT * FROM productos")}
+
+
+def test_inserta_y_actualiza_por_codigo(base, tmp_path):
+    database.agregar_producto("00000001", "Harina", "", 10.0, 5, 1)
+    ruta = escribir(tmp_path / "p.csv",
+                    "Código;Producto;Descripción;Precio Bs.;Existencia;Mínimo\n"
+                    "00000001;Harina PAN;1 kg;12,5;8;2\n"
+                    "00000002;Arroz;;7;3;0\n")
+
+    assert importar_productos(ruta) == {"importados": 2, "errores": []}
+    assert productos_en_base() == {
+        "00000001": ("Harina PAN", "1 kg", 12.5, 8, 2),
+        "00000002": ("Arroz", "", 7.0, 3, 0),
+    }
+
+
+def test_rechaza_filas_invalidas_y_sigue(base, tmp_path):
+    ruta = escribir(tmp_path / "p.csv",
+                    "codigo,nombre,precio,stock\n"
+                    "00000001,Bueno,5,1\n"
+                    "123,Código corto,5,1\n"
+                    "00000003,,5,1\n"
+                    "00000004,Sin precio,abc,1\n"
+                    "00000005,Infinito,inf,1\n"
+                    "00000006,Negativo,5,-1\n"
+                    "00000007,Fracción,5,1.5\n"
+                    "00000008,Enorme,5,1e400\n")
+
+    resultado = importar_productos(ruta)
+
+    assert resultado["importados"] == 1
+    assert [numero for numero, _ in resultado["errores"]] == [3, 4, 5, 6, 7, 8, 9]
+    assert list(productos_en_base()) == ["00000001"]
+
+
+def test_filas_sin_codigo_se_asocian_por_nombre(base, tmp_path):
+    database.agregar_producto("00000001", "Harina", "", 10.0, 5, 1)
+    ruta = escribir(tmp_path / "p.csv", "nombre,precio,stock\nHARINA,11,6\nAzúcar,4,2\n")
+
+    assert importar_productos(ruta)["importados"] == 2
+    assert importar_productos(ruta)["importados"] == 2
+
+    productos = productos_en_base()
+    assert len(productos) == 2
+    assert productos["00000001"] == ("HARINA", "", 11.0, 6, 0)
+    assert [datos[0] for datos in productos.values()].count("Azúcar") == 1
+
+
+def test_progreso_por_bloques(base, tmp_path):
+    filas = "".join(f"{n:08d},Producto {n},1,1\n" for n in range(1, 6))
+    ruta = escribir(tmp_path / "p.csv", "codigo,nombre,precio,stock\n" + filas)
+    avisos = []
+    importar_productos(ruta, progreso=avisos.append, tamano_bloque=2)
+    assert avisos == [2, 4, 5]
+
+
+def test_encabezados_obligatorios(base, tmp_path):
+    ruta = escribir(tmp_path / "p.csv", "codigo,stock\n00000001,1\n")
+    with pytest.raises(ValueError, match="nombre y precio"):
+        importar_productos(ruta)
+
+
+def test_validar_fila_acepta_numeros_de_excel():
+    assert validar_fila({"codigo": 12345678.0, "nombre": " Sal ", "precio": 3,
+                         "stock": 4.0, "stock_minimo": None}) == ("12345678", "Sal", "", 3.0, 4, 0)
+    with pytest.raises(ValueError, match="Código obligatorio"):
+        validar_fila({"nombre": "Sal", "precio": 3})
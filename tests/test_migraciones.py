@@ -0,0 +1,107 @@
+# tests/test_migraciones.py
+
+import json
+import sqlite3
+
+import pytest
+
+from migraciones import MIGRACIONES, aplicar_migraciones, version_actual
+
+# Esquema de la versión 0, con las ventas sin movimiento y los productos de
+# cada movimiento guardados como JSON en detalles_extra
+_ESQUEMA_V0 = (
+    """CREATE TABLE productos (
+        codigo TEXT PRIMARY KEY, nombre TEXT NOT NULL, descripcion TEXT DEFAULT '',
+        precio REAL NOT NULL, stock INTEGER NOT NULL, stock_minimo INTEGER NOT NULL
+    )""",
+    """CREATE TABLE movimientos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+        detalle TEXT NOT NULL, total_bs REAL NOT NULL, detalles_extra TEXT
+    )""",
+    """CREATE TABLE ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, producto TEXT NOT NULL,
+        cantidad INTEGER NOT NULL, precio REAL NOT NULL,
+        fecha TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )""",
+    """CREATE TABLE tasa_dolar (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, monto REAL NOT NULL,
+        fecha TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )""",
+)
+
+
+@pytest.fixture
+def base_v3(tmp_path):
+    conn = sqlite3.connect(tmp_path / "v3.db", isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    for ddl in _ESQUEMA_V0:
+        conn.execute(ddl)
+    assert aplicar_migraciones(conn, [m for m in MIGRACIONES if m[0] <= 3]) == 3
+
+    conn.executemany("INSERT INTO productos VALUES (?, ?, '', ?, 10, 0)",
+                     [("P1", "Harina", 10.0), ("P2", "Arroz", 4.0)])
+    movimientos = [
+        # Venta individual con su fila en ventas un segundo después
+        ("2024-03-01 10:00:00", "2x Harina", 20.0,
+         {"producto_id": "P1", "cantidad": 2, "cliente": "Luis"}),
+        # Lote sin filas en ventas: se reconstruye con los precios actuales
+        ("2024-03-02 09:00:00", "Venta lote (2 productos)", 18.0,
+         {"productos": [{"producto_id": "P1", "cantidad": 1},
+                        {"producto_id": "P2", "cantidad": 2}]}),
+        # Producto ya eliminado: el precio sale del total del movimiento
+        ("2024-03-03 08:00:00", "3x Azúcar", 9.0, {"producto_id": "GONE", "cantidad": 3}),
+        ("2024-03-04 08:00:00", "Ajuste de caja", 5.0, None),
+    ]
+    conn.executemany(
+        "INSERT INTO movimientos (fecha, detalle, total_bs, detalles_extra) VALUES (?, ?, ?, ?)",
+        [(fecha, detalle, total, json.dumps(extra) if extra else None)
+         for fecha, detalle, total, extra in movimientos]
+    )
+    conn.executemany(
+        "INSERT INTO ventas (producto, cantidad, precio, fecha) VALUES (?, ?, ?, ?)",
+        [("P1", 2, 10.0, "2024-03-01 10:00:01"),
+         ("P2", 1, 4.0, "2024-03-05 12:00:00")]   # venta suelta, sin movimiento
+    )
+    yield conn
+    conn.close()
+
+
+def test_migracion_4_reconstruye_lineas_de_venta(base_v3):
+    conn = base_v3
+    assert aplicar_migraciones(conn) == MIGRACIONES[-1][0]
+    assert version_actual(conn) == MIGRACIONES[-1][0]
+
+    lineas = conn.execute("""
+        SELECT movimiento_id, producto, codigo, cantidad, precio, fecha
+        FROM ventas ORDER BY fecha, id
+    """).fetchall()
+    assert lineas == [
+        (1, "P1", "P1", 2, 10.0, "2024-03-01 10:00:01"),
+        (2, "P1", "P1", 1, 10.0, "2024-03-02 09:00:00"),
+        (2, "P2", "P2", 2, 4.0, "2024-03-02 09:00:00"),
+        (3, None, "GONE", 3, 3.0, "2024-03-03 08:00:00"),
+        (None, "P2", "P2", 1, 4.0, "2024-03-05 12:00:00"),
+    ]
+    assert conn.execute(
+        "SELECT id, cliente, detalles_extra FROM movimientos ORDER BY id"
+    ).fetchall() == [(1, "Luis", None), (2, None, None), (3, None, None), (4, None, None)]
+
+
+def test_migracion_4_recalcula_acumulados(base_v3):
+    conn = base_v3
+    aplicar_migraciones(conn)
+
+    assert conn.execute(
+        "SELECT dia, total, unidades FROM ventas_diarias ORDER BY dia"
+    ).fetchall() == [("2024-03-01", 20.0, 2), ("2024-03-02", 18.0, 3),
+                     ("2024-03-03", 9.0, 3), ("2024-03-05", 4.0, 1)]
+    assert conn.execute(
+        "SELECT producto, total, unidades FROM ventas_por_producto ORDER BY producto"
+    ).fetchall() == [("GONE", 9.0, 3), ("P1", 30.0, 3), ("P2", 12.0, 3)]
+
+    # Los triggers nuevos siguen manteniendo los acumulados por código
+    conn.execute("DELETE FROM movimientos WHERE id = 3")
+    assert conn.execute(
+        "SELECT total, unidades FROM ventas_por_producto WHERE producto = 'GONE'"
+    ).fetchone() == (0.0, 0)
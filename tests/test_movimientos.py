@@ -0,0 +1,69 @@
+# tests/test_movimientos.py
+
+import database
+from conftest import acumulados, stock
+from database import conectar_db
+from movimientos import (
+    eliminar_movimiento, obtener_lineas_venta, obtener_movimientos,
+    obtener_movimientos_pagina
+)
+from ventas import vender
+
+
+def test_eliminar_por_id_con_fechas_repetidas(productos):
+    primero = vender([("A1", 1)])
+    segundo = vender([("A1", 1)])
+    with conectar_db() as conn:
+        conn.execute("UPDATE movimientos SET fecha = '2025-01-01 10:00:00'")
+
+    assert eliminar_movimiento(primero)
+
+    assert [fila["id"] for fila in obtener_movimientos()] == [segundo]
+    assert stock("A1") == 4
+
+
+def test_pagina_por_fecha_e_id(productos):
+    ids = [vender([("B2", 1)]) for _ in range(5)]
+    with conectar_db() as conn:
+        conn.execute("UPDATE movimientos SET fecha = '2025-01-01 10:00:00'")
+
+    pagina = obtener_movimientos_pagina(limite=2)
+    siguiente = obtener_movimientos_pagina((pagina[-1]["fecha"], pagina[-1]["id"]), limite=10)
+    assert [fila["id"] for fila in pagina + siguiente] == ids[::-1]
+
+
+def test_eliminar_movimiento_revierte_stock_y_acumulados(productos):
+    conservado = vender([("A1", 1)])
+    eliminado = vender([("A1", 2), ("B2", 3)])
+
+    assert eliminar_movimiento(eliminado)
+
+    assert stock("A1") == 4
+    assert stock("B2") == 20
+    assert obtener_lineas_venta(eliminado) == []
+    assert len(obtener_lineas_venta(conservado)) == 1
+    diarias, por_producto, ventas = acumulados()
+    assert diarias == por_producto == ventas == (10.0, 1)
+
+
+def test_eliminar_movimiento_inexistente(productos):
+    vender([("A1", 1)])
+    assert not eliminar_movimiento(999)
+    assert stock("A1") == 4
+
+
+def test_eliminar_movimiento_de_producto_eliminado(productos):
+    movimiento_id = vender([("B2", 2)])
+    assert database.eliminar_producto("B2")
+
+    assert eliminar_movimiento(movimiento_id)
+    assert acumulados() == ((0, 0),) * 3
+
+
+def test_eliminar_movimiento_dentro_de_otra_transaccion(productos):
+    movimiento_id = vender([("A1", 2)])
+    with conectar_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        assert eliminar_movimiento(movimiento_id)
+        assert conn.in_transaction
+    assert stock("A1") == 5
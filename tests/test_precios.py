@@ -0,0 +1,64 @@
+# tests/test_precios.py
+
+import pytest
+
+import database
+from catalogo import cache_productos
+from precios import aplicar_ajuste, deshacer_ajuste, previsualizar_ajuste, tasa_anterior
+from tasas import ServicioTasa
+
+
+def precios():
+    return {fila["codigo"]: fila["precio"] for fila in database.obtener_productos()}
+
+
+@pytest.mark.parametrize("modo, valor, esperado, ajustados", [
+    ("porcentaje", 10, {"A1": 11.0, "B2": 2.75, "C3": 110.0}, ["A1", "B2", "C3"]),
+    ("fijo", -5, {"A1": 5.0, "B2": 2.5, "C3": 95.0}, ["A1", "C3"]),   # B2 quedaría negativo
+])
+def test_aplicar_ajuste(productos, modo, valor, esperado, ajustados):
+    anteriores = aplicar_ajuste(modo, valor)
+    assert precios() == esperado
+    assert sorted(codigo for codigo, _, _ in anteriores) == ajustados
+
+
+def test_vista_previa_no_modifica(productos):
+    total, filas = previsualizar_ajuste("porcentaje", 50, codigos=["A1", "C3"], limite=1)
+    assert total == 2
+    assert [tuple(fila) for fila in filas] == [("A1", "Producto A1", 10.0, 15.0)]
+    assert precios() == {"A1": 10.0, "B2": 2.5, "C3": 100.0}
+
+
+def test_ajuste_por_dolar_y_filtro(productos):
+    database.agregar_producto("D4", "Otro", "", 20.0, 1, 0)
+    aplicar_ajuste("dolar", None, tasa_anterior=40.0, tasa_actual=50.0, filtro="producto")
+    assert precios() == {"A1": 12.5, "B2": 3.13, "C3": 125.0, "D4": 20.0}
+
+
+@pytest.mark.parametrize("modo, tasas", [("dolar", (None, 50.0)), ("dolar", (0, 50.0)),
+                                         ("otro", (None, None))])
+def test_parametros_invalidos(productos, modo, tasas):
+    with pytest.raises(ValueError):
+        previsualizar_ajuste(modo, 1, *tasas)
+
+
+def test_deshacer_respeta_cambios_posteriores(productos):
+    anteriores = aplicar_ajuste("fijo", 1)
+    database.actualizar_producto("B2", "Producto B2", "", 9.0, 20, 0)
+
+    assert deshacer_ajuste(anteriores) == 2
+    assert precios() == {"A1": 10.0, "B2": 9.0, "C3": 100.0}
+
+
+def test_ajuste_invalida_la_cache(productos):
+    assert cache_productos.obtener("A1")["precio"] == 10.0
+    anteriores = aplicar_ajuste("porcentaje", 100)
+    assert cache_productos.obtener("A1")["precio"] == 20.0
+    deshacer_ajuste(anteriores)
+    assert cache_productos.obtener("A1")["precio"] == 10.0
+
+
+def test_tasa_anterior(base):
+    assert tasa_anterior() is None
+    ServicioTasa().actualizar(40.0)
+    assert tasa_anterior() == 36.0
@@ -0,0 +1,129 @@
+# tests/test_tablas.py
+
+import random
+
+import pytest
+
+from tablas import SincronizadorTabla
+
+
+class ArbolOrdenado:
+    """Treeview en memoria con la semántica de índices de ttk"""
+
+    def __init__(self):
+        self.hijos = []
+        self.filas = {}
+        self.llamadas = 0
+
+    def _poner(self, iid, posicion):
+        self.hijos.insert(len(self.hijos) if posicion == "end" else posicion, iid)
+
+    def insert(self, padre, posicion, iid=None, values=(), tags=()):
+        assert iid not in self.filas
+        self.filas[iid] = (tuple(values), tuple(tags))
+        self._poner(iid, posicion)
+        self.llamadas += 1
+        return iid
+
+    def item(self, iid, values=None, tags=None):
+        self.filas[iid] = (tuple(values), tuple(tags))
+        self.llamadas += 1
+
+    def move(self, iid, padre, posicion):
+        if iid in self.hijos:
+            self.hijos.remove(iid)
+        self._poner(iid, posicion)
+        self.llamadas += 1
+
+    def detach(self, *iids):
+        self.hijos = [iid for iid in self.hijos if iid not in iids]
+        self.llamadas += 1
+
+    def set_children(self, padre, *iids):
+        assert set(iids) <= set(self.filas)
+        self.hijos = list(iids)
+        self.llamadas += 1
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.hijos.remove(iid)
+            del self.filas[iid]
+        self.llamadas += 1
+
+
+def filas(iids, valor=""):
+    return [(iid, (iid, valor), ()) for iid in iids]
+
+
+def verificar(arbol, contenido):
+    assert arbol.hijos == [iid for iid, _, _ in contenido]
+    assert all(arbol.filas[iid] == (tuple(v), tuple(t)) for iid, v, t in contenido)
+    assert len(arbol.filas) == len(contenido)
+
+
+@pytest.fixture
+def arbol():
+    return ArbolOrdenado()
+
+
+def test_sin_cambios_no_toca_la_tabla(arbol):
+    sync = SincronizadorTabla(arbol)
+    sync.sincronizar(filas("abcdef"))
+    assert sync.sincronizar(filas("abcdef")) == 0
+
+
+def test_inserta_actualiza_y_elimina(arbol):
+    sync = SincronizadorTabla(arbol)
+    sync.sincronizar(filas("abcde"))
+    nuevo = filas("xbd") + [("e", ("e", "cambiado"), ("bajo",))] + filas("y")
+    assert sync.sincronizar(nuevo) == 2 + 1 + 2   # a y c, e, x e y
+    verificar(arbol, nuevo)
+
+
+@pytest.mark.parametrize("antes, despues", [
+    (list(range(20000)), list(range(1, 20000)) + [0]),
+    (list(range(20000)), [19999] + list(range(19999))),
+])
+def test_mover_una_fila_es_una_operacion(arbol, antes, despues):
+    sync = SincronizadorTabla(arbol)
+    sync.sincronizar(filas(antes))
+    assert sync.sincronizar(filas(despues)) == 2   # detach y move
+    verificar(arbol, filas(despues))
+
+
+def test_muchos_movimientos_reordenan_de_una_vez(arbol):
+    sync = SincronizadorTabla(arbol)
+    sync.sincronizar(filas(range(1000)))
+    arbol.llamadas = 0
+    sync.sincronizar(filas(range(999, -1, -1)))
+    assert arbol.llamadas == 1
+    verificar(arbol, filas(range(999, -1, -1)))
+
+
+def test_contenidos_al_azar(arbol):
+    azar = random.Random(0)
+    sync = SincronizadorTabla(arbol)
+    actual = []
+    for _ in range(300):
+        actual = [iid for iid in actual if azar.random() > 0.1]
+        actual += [f"n{azar.randrange(500)}" for _ in range(azar.randrange(5))]
+        actual = list(dict.fromkeys(actual))
+        for _ in range(azar.randrange(4)):
+            if actual:
+                actual.insert(azar.randrange(len(actual) + 1),
+                              actual.pop(azar.randrange(len(actual))))
+        contenido = [(iid, (iid, azar.randrange(3)), ()) for iid in actual]
+        sync.sincronizar(contenido)
+        verificar(arbol, contenido)
+    assert len(sync) == len(actual)
+
+
+def test_agregar_y_limpiar(arbol):
+    sync = SincronizadorTabla(arbol)
+    sync.sincronizar(filas("ab"))
+    sync.agregar(filas("cd"))
+    verificar(arbol, filas("abcd"))
+    sync.sincronizar(filas("dcba"))
+    verificar(arbol, filas("dcba"))
+    sync.limpiar()
+    assert arbol.hijos == [] and len(sync) == 0
@@ -0,0 +1,70 @@
+# tests/test_tasas.py
+
+import pytest
+
+from database import conectar_db
+from tasas import TASA_POR_DEFECTO, HistorialTasas, ServicioTasa
+
+
+def registrar_tasas(*pares):
+    with conectar_db() as conn:
+        conn.execute("DELETE FROM tasa_dolar")
+        conn.executemany("INSERT INTO tasa_dolar (fecha, monto) VALUES (?, ?)", pares)
+
+
+@pytest.fixture
+def tasas(base):
+    registrar_tasas(("2025-01-01 00:00:00", 40.0),
+                    ("2025-02-01 12:00:00", 45.0),
+                    ("2025-03-01 00:00:00", 50.0))
+
+
+def test_actual_reutiliza_la_tasa_hasta_que_expira(tasas):
+    servicio = ServicioTasa(ttl=3600)
+    assert servicio.actual() == 50.0
+    registrar_tasas(("2025-04-01 00:00:00", 60.0))
+    assert servicio.actual() == 50.0
+    servicio.invalidar()
+    assert servicio.actual() == 60.0
+
+    servicio.ttl = 0
+    registrar_tasas(("2025-05-01 00:00:00", 70.0))
+    assert servicio.actual() == 70.0
+
+
+def test_actualizar_deja_la_tasa_vigente(tasas):
+    servicio = ServicioTasa(ttl=3600)
+    servicio.actual()
+    assert servicio.actualizar(55.5)
+    assert servicio.actual() == 55.5
+    assert ServicioTasa().actual() == 55.5
+
+
+def test_actualizar_rechaza_montos_invalidos(tasas):
+    servicio = ServicioTasa(ttl=3600)
+    assert not servicio.actualizar(-1)
+    assert servicio.actual() == 50.0
+
+
+@pytest.mark.parametrize("fecha, tasa", [
+    ("2024-12-31 23:59:59", 40.0),        # anterior a todas: la primera
+    ("2025-01-01 00:00:00", 40.0),
+    ("2025-02-01 11:59:59", 40.0),
+    ("2025-02-01 12:00:00", 45.0),
+    ("2025-02-15", 45.0),
+    ("2026-01-01 00:00:00", 50.0),
+])
+def test_tasa_en_fecha(tasas, fecha, tasa):
+    servicio = ServicioTasa()
+    assert servicio.tasa_en(fecha) == tasa
+    assert servicio.historial().tasa_en(fecha) == tasa
+
+
+def test_historial_incluye_la_tasa_vigente_al_inicio(tasas):
+    historial = ServicioTasa().historial("2025-02-10", "2025-02-28")
+    assert historial.tasa_en("2025-02-10 08:00:00") == 45.0
+    assert historial.a_dolares(90.0, "2025-02-20") == 2.0
+
+
+def test_historial_vacio():
+    assert HistorialTasas([]).tasa_en("2025-01-01") == TASA_POR_DEFECTO
@@ -0,0 +1,58 @@
+# tests/test_ventas.py
+
+import pytest
+
+from conftest import acumulados, stock
+from database import conectar_db
+from ventas import VentaError, vender
+
+
+def test_vender_descuenta_stock_y_registra_lineas(productos):
+    movimiento_id = vender([("A1", 2), ("B2", 4), ("A1", 1)], cliente="Ana")
+
+    assert stock("A1") == 2
+    assert stock("B2") == 16
+    with conectar_db() as conn:
+        mov = conn.execute(
+            "SELECT detalle, total_bs, cliente FROM movimientos WHERE id = ?", (movimiento_id,)
+        ).fetchone()
+        lineas = conn.execute(
+            "SELECT codigo, cantidad, precio FROM ventas WHERE movimiento_id = ? ORDER BY codigo",
+            (movimiento_id,)
+        ).fetchall()
+    assert tuple(mov) == ("Venta lote (2 productos)", 40.0, "Ana")
+    assert [tuple(l) for l in lineas] == [("A1", 3, 10.0), ("B2", 4, 2.5)]
+    diarias, por_producto, ventas = acumulados()
+    assert diarias == por_producto == ventas == (40.0, 7)
+
+
+def test_vender_sin_stock_no_guarda_nada(productos):
+    with pytest.raises(VentaError, match="Stock insuficiente"):
+        vender([("A1", 2), ("C3", 2)])
+
+    assert stock("A1") == 5
+    assert stock("C3") == 1
+    with conectar_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM movimientos").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 0
+    assert acumulados() == ((0, 0),) * 3
+
+
+def test_vender_producto_inexistente(productos):
+    with pytest.raises(VentaError, match="no encontrado"):
+        vender([("B2", 1), ("ZZ", 1)])
+    assert stock("B2") == 20
+
+
+@pytest.mark.parametrize("items", [[], [("A1", 0)], [("A1", -1)], [("A1", 1.5)], [("", 1)]])
+def test_vender_items_invalidos(productos, items):
+    with pytest.raises(VentaError):
+        vender(items)
+    assert stock("A1") == 5
+
+
+def test_vender_agota_el_stock_exacto(productos):
+    vender([("C3", 1)])
+    assert stock("C3") == 0
+    with pytest.raises(VentaError, match="Stock insuficiente"):
+        vender([("C3", 1)])